@@ -1,16 +1,37 @@
-from flask import Flask, render_template, jsonify, request, redirect, url_for
+from flask import Flask, render_template, jsonify, request, redirect, url_for, g, send_file, abort, has_request_context
+from werkzeug.security import safe_join
 import os
+import mimetypes
 import json
 import time
 import socket
-import webbrowser
 import threading
 import subprocess
 import sys
 import platform
-from utils.level_loader import load_level, save_level, generate_level, create_sample_levels, save_editor_level
-from utils.game_renderer import generate_level_preview, generate_game_screenshot
+import functools
+import math
+import atexit
+from utils.level_loader import load_level, save_level, generate_level, create_sample_levels, save_editor_level, read_level, list_levels, preload_levels
+from utils.game_renderer import generate_level_preview, generate_game_screenshot, warm_fonts
 from utils.game_engine import GameEngine
+from utils.snapshot import restore_engine
+from utils.session_manager import SessionManager, SESSION_COOKIE, SESSION_HEADER
+from utils import prefork
+from utils.assets import load_manifest, pick_encoding, IMMUTABLE_CACHE_CONTROL
+from utils.audio_sprite import load_sprite
+from utils import level_responses
+from utils.metrics import metrics
+from utils.level_edits import LevelEditStore, EditConflict
+from utils.level_prefetch import LevelPrefetcher
+from utils.level_prototype import get_prototype
+from utils import gc_control
+from utils import memory
+from utils import profiler
+from utils.rate_limit import RateLimiter, ConcurrencyLimit, RateLimited
+from utils import log
+
+logger = log.get_logger('app')
 
 def check_port_available(port, host='127.0.0.1'):
     """Check if the specified port is available on the host"""
@@ -103,6 +124,8 @@ def kill_process_on_port(port):
 def open_browser(port):
     """Open browser after a short delay to ensure server is running"""
     time.sleep(2)  # Wait for the Flask server to start
+    import webbrowser  # Only needed when launching interactively
+    
     url = f"http://127.0.0.1:{port}/"
     print(f"Opening browser at {url}")
     webbrowser.open(url)
@@ -113,8 +136,216 @@ app = Flask(__name__)
 # Load configuration
 app.config.from_object('config.DevelopmentConfig')
 
-# Initialize game engine with config
-game_engine = GameEngine(app.config['GAME_SETTINGS'])
+# Log through a queue to a background writer, tagging records with the session
+log.setup(app.config['LOG_LEVEL'], app.config['LOG_FORMAT'])
+log.add_context(lambda: {'session': g.get('session_id')} if has_request_context() else {})
+
+def game_engine_config():
+    """Return the engine configuration built from the app's settings"""
+    return {**app.config['GAME_SETTINGS'],
+            'LEVELS_DIR': app.config['LEVELS_DIR'],
+            'LEVEL_PACK': app.config['LEVEL_PACK'],
+            'HISTORY_TICKS': app.config['HISTORY_TICKS'],
+            'VECTOR_BALLS': app.config['VECTOR_BALLS']}
+
+def create_game_engine():
+    """Create a game engine using the app's game settings"""
+    return GameEngine(game_engine_config())
+
+def restore_game_engine(snapshot):
+    """Rebuild a hibernated session's game engine from its snapshot"""
+    return restore_engine(snapshot, game_engine_config())
+
+# One game engine per player session, created on first use so importing the
+# app has no side effects. Pre-fork workers only mint IDs routed to themselves.
+# Idle engines are hibernated to disk and restored on their next request.
+session_manager = SessionManager(
+    create_game_engine,
+    id_filter=prefork.owns_session,
+    hibernate_dir=app.config['HIBERNATE_DIR'],
+    idle_timeout=app.config['HIBERNATE_AFTER'],
+    max_live=app.config['MAX_LIVE_SESSIONS'],
+    engine_restorer=restore_game_engine
+)
+
+# Next levels prepared in the background while sessions finish the current one
+level_prefetcher = LevelPrefetcher(
+    app.config['LEVELS_DIR'],
+    pack_path=app.config['LEVEL_PACK'],
+    screen_width=app.config['GAME_SETTINGS']['SCREEN_WIDTH'],
+    screen_height=app.config['GAME_SETTINGS']['SCREEN_HEIGHT']
+)
+
+def levels_changed():
+    """Drop encoded and prepared copies of levels after a save"""
+    level_responses.invalidate()
+    level_prefetcher.invalidate()
+
+# Levels open in the editor, saved by a debounced writer (see utils/level_edits.py)
+level_edit_store = LevelEditStore(
+    app.config['LEVELS_DIR'],
+    pack_path=app.config['LEVEL_PACK'],
+    on_write=lambda level_id: levels_changed()
+)
+atexit.register(level_edit_store.flush)
+
+# Time every garbage collection for /admin/metrics
+gc_control.controller.install()
+
+# Subsystems owned by the app, reported by /admin/memory after the level caches
+memory.register('sessions', lambda sizer: dict(
+    memory.session_memory(list(session_manager.engines.values()), sizer),
+    hibernated=session_manager.hibernated_count))
+memory.register('level_edits', lambda sizer: {
+    'bytes': sizer.size(list(level_edit_store.documents.values())),
+    'documents': len(level_edit_store.documents)})
+memory.register('level_prefetch', lambda sizer: {
+    'bytes': sizer.size([future.result() for future in list(level_prefetcher.prepared.values()) if future.done()
+                         and future.exception() is None]),
+    'prepared': len(level_prefetcher.prepared)})
+memory.sampler.interval = app.config['MEMORY_SAMPLE_INTERVAL']
+
+def warm_long_lived_state(levels_dir):
+    """Load levels, their prototypes and the renderer's fonts, then freeze them out of GC scans"""
+    preload_levels(levels_dir)
+    for level_id in list_levels(levels_dir, app.config['LEVEL_PACK']):
+        level_data = read_level(levels_dir, level_id, app.config['LEVEL_PACK'])
+        if level_data is not None:
+            get_prototype(level_data)
+    warm_fonts()
+    return gc_control.controller.freeze()
+
+# Per-client token buckets by route class, and a cap on expensive work running at once
+rate_limiter = RateLimiter(app.config['RATE_LIMITS'])
+expensive_operations = ConcurrencyLimit(app.config['EXPENSIVE_CONCURRENCY'], app.config['EXPENSIVE_QUEUE'])
+
+def route_class(name):
+    """Mark a view's rate-limit class (unmarked views are 'default'); see utils/rate_limit.py"""
+    def mark(view):
+        view.route_class = name
+        return view
+    return mark
+
+def expensive_operation(view):
+    """Run the view in one of the expensive-operation slots (429 when none is free)"""
+    @functools.wraps(view)
+    def limited(*args, **kwargs):
+        with expensive_operations:
+            return view(*args, **kwargs)
+    return limited
+
+def client_key():
+    """Identify the client for rate limiting: its session if it is live, else its address"""
+    session_id = request.cookies.get(SESSION_COOKIE) or request.headers.get(SESSION_HEADER)
+    # Made-up session IDs can't buy a fresh bucket (hibernated sessions count by address until restored)
+    if session_id and session_id in session_manager.engines:
+        return session_id
+    return request.remote_addr
+
+def get_session_id():
+    """Return the current request's session ID, allocating one if needed"""
+    if 'session_id' not in g:
+        session_id = request.cookies.get(SESSION_COOKIE) or request.headers.get(SESSION_HEADER)
+        if not session_id:
+            session_id = session_manager.new_session_id()
+            g.new_session = True
+        g.session_id = session_id
+    return g.session_id
+
+def get_game_engine():
+    """Return the game engine for the current session, creating it on first use"""
+    return session_manager.get(get_session_id())
+
+@app.after_request
+def set_session_cookie(response):
+    """Hand newly allocated session IDs back to the client"""
+    if g.get('new_session'):
+        response.set_cookie(SESSION_COOKIE, g.session_id, httponly=True, samesite='Lax')
+    if prefork.current_worker is not None:
+        response.headers['X-Served-By'] = f"worker-{prefork.current_worker}"
+    return response
+
+def asset_url(filename):
+    """URL of a static asset: its fingerprinted copy once assets are built, the plain static file otherwise"""
+    hashed = load_manifest(app.config['ASSET_BUILD_DIR']).get(filename)
+    if hashed is None:
+        return url_for('static', filename=filename)
+    return url_for('built_asset', filename=hashed)
+
+def asset_urls(prefix):
+    """Fingerprinted URLs of every built asset under a path prefix, keyed by asset path"""
+    manifest = load_manifest(app.config['ASSET_BUILD_DIR'])
+    return {path: url_for('built_asset', filename=hashed)
+            for path, hashed in manifest.items() if path.startswith(prefix)}
+
+def audio_sprite():
+    """The sound sprite's manifest with its URL, or None if build_assets.py hasn't packed one"""
+    sprite = load_sprite(os.path.join(app.static_folder, 'sounds'))
+    if sprite is None:
+        return None
+    return dict(sprite, url=asset_url('sounds/' + sprite['file']))
+
+app.jinja_env.globals['asset_url'] = asset_url
+app.jinja_env.globals['asset_urls'] = asset_urls
+app.jinja_env.globals['audio_sprite'] = audio_sprite
+
+@app.before_request
+def admit_request():
+    """Reject the request with 429 if its client is over the route class's rate limit"""
+    if request.endpoint == 'static':
+        return
+    view = app.view_functions.get(request.endpoint)
+    rate_limiter.check(client_key(), getattr(view, 'route_class', 'default'))
+
+@app.errorhandler(RateLimited)
+def too_many_requests(error):
+    """Fast 429 with a Retry-After hint"""
+    metrics.incr(f"rate_limit.{error.reason}.{error.route_class}")
+    response = jsonify({'error': 'Too many requests', 'class': error.route_class, 'reason': error.reason,
+                        'retry_after': round(error.retry_after, 3)})
+    response.status_code = 429
+    response.headers['Retry-After'] = str(max(1, math.ceil(error.retry_after)))
+    return response
+
+@app.after_request
+def collect_between_ticks(response):
+    """Run due garbage collections once the response is sent, not during the next tick"""
+    response.call_on_close(gc_control.controller.between_ticks)
+    return response
+
+@app.before_request
+def tag_profiled_request():
+    """Tag this thread's profiler samples with the route it's serving"""
+    if profiler.profiler.running:
+        rule = request.url_rule.rule if request.url_rule is not None else '(unmatched)'
+        profiler.tag_thread(f"{request.method} {rule}")
+
+@app.teardown_request
+def untag_profiled_request(exc):
+    profiler.untag_thread()
+
+@app.after_request
+def sample_memory(response):
+    """Take the periodic memory report once the response is sent"""
+    response.call_on_close(memory.sampler.maybe_sample)
+    return response
+
+@app.route('/assets/<path:filename>')
+@route_class('static')
+def built_asset(filename):
+    """Serve a fingerprinted asset with immutable caching, precompressed when the client accepts it"""
+    path = safe_join(app.config['ASSET_BUILD_DIR'], filename)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+    
+    send_path, encoding = pick_encoding(path, request.headers.get('Accept-Encoding'))
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    response = send_file(send_path, mimetype=mimetype, conditional=True)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    return response
 
 @app.route('/')
 def index():
@@ -134,84 +365,125 @@ def about():
     return render_template('about.html')
 
 @app.route('/api/levels')
+@route_class('expensive')
+@expensive_operation
 def get_levels():
     """Return a list of available levels"""
-    levels_dir = os.path.join(os.path.dirname(__file__), 'levels')
+    levels_dir = app.config['LEVELS_DIR']
     
     # Create directory if it doesn't exist
     if not os.path.exists(levels_dir):
         os.makedirs(levels_dir)
         
-    # Create sample levels if no levels exist
-    level_files = [f for f in os.listdir(levels_dir) if f.endswith('.json')]
-    if not level_files:
+    # Create sample levels if no levels exist (in the directory or the level pack)
+    level_pack = app.config['LEVEL_PACK']
+    level_ids = list_levels(levels_dir, level_pack)
+    if not level_ids:
         create_sample_levels(levels_dir)
-        level_files = [f for f in os.listdir(levels_dir) if f.endswith('.json')]
+        level_ids = list_levels(levels_dir, level_pack)
     
     levels = []
     
-    for level_file in level_files:
-        level_path = os.path.join(levels_dir, level_file)
+    for level_file_id in level_ids:
         try:
-            with open(level_path, 'r') as f:
-                level_data = json.load(f)
-                
-                # Generate a preview image for this level
-                preview_image = generate_level_preview(level_data)
-                
-                # Extract level ID
-                level_id = level_data.get('id', level_file.split('.')[0])
-                
-                # Extract level name
-                level_name = level_data.get('name', f"Level {level_id}")
-                
-                # Try to extract a level number for sorting
-                level_num = 0
-                if level_id.startswith('level-'):
-                    parts = level_id.split('-')
-                    if len(parts) > 1:
-                        # Try to get the first numeric part
-                        part = parts[1].split('_')[0] if '_' in parts[1] else parts[1]
-                        if part.isdigit():
-                            level_num = int(part)
-                
-                # Check if this is an editor-created level
-                is_editor_level = level_data.get('editor_version', False)
-                
-                levels.append({
-                    'id': level_id,
-                    'name': level_name,
-                    'preview': preview_image,
-                    'level_num': level_num,  # Store level number separately for sorting
-                    'is_editor_level': is_editor_level  # Add flag for editor levels
-                })
+            level_data = read_level(levels_dir, level_file_id, level_pack)
+            
+            # Generate a preview image for this level
+            preview_image = generate_level_preview(level_data)
+            
+            # Extract level ID
+            level_id = level_data.get('id', level_file_id)
+            
+            # Extract level name
+            level_name = level_data.get('name', f"Level {level_id}")
+            
+            # Try to extract a level number for sorting
+            level_num = 0
+            if level_id.startswith('level-'):
+                parts = level_id.split('-')
+                if len(parts) > 1:
+                    # Try to get the first numeric part
+                    part = parts[1].split('_')[0] if '_' in parts[1] else parts[1]
+                    if part.isdigit():
+                        level_num = int(part)
+            
+            # Check if this is an editor-created level
+            is_editor_level = level_data.get('editor_version', False)
+            
+            levels.append({
+                'id': level_id,
+                'name': level_name,
+                'preview': preview_image,
+                'level_num': level_num,  # Store level number separately for sorting
+                'is_editor_level': is_editor_level  # Add flag for editor levels
+            })
         except Exception as e:
-            print(f"Error loading level file {level_file}: {e}")
+            logger.warning("Error loading level for the level list", extra={'level_id': level_file_id, 'error': str(e)})
     
     # Sort levels by their numeric id
     levels.sort(key=lambda x: x['level_num'])
     
     return jsonify(levels)
 
+def level_response(level_id, level_data, start=None):
+    """Respond with a level's JSON: 304 if the client has it, else the cached (gzip if accepted) body"""
+    encoded, cached = level_responses.get_body(level_id, level_data)
+    metrics.incr('levels.requests')
+    metrics.incr('levels.body_cache_hits' if cached else 'levels.body_cache_misses')
+    
+    if encoded.matches(request.if_none_match):
+        metrics.incr('levels.not_modified')
+        response = app.response_class(status=304)
+        response.set_etag(encoded.etag)
+    elif encoded.gzip_body is not None and request.accept_encodings['gzip']:
+        metrics.incr('levels.gzip_responses')
+        response = app.response_class(encoded.gzip_body, mimetype='application/json')
+        response.headers['Content-Encoding'] = 'gzip'
+        response.set_etag(encoded.gzip_etag)
+    else:
+        response = app.response_class(encoded.body, mimetype='application/json')
+        response.set_etag(encoded.etag)
+    
+    # Levels can be edited, so clients revalidate every time (a 304 is cheap)
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['Vary'] = 'Accept-Encoding'
+    sent = len(response.get_data()) if response.status_code == 200 else 0
+    metrics.incr('levels.bytes_sent', sent)
+    metrics.incr('levels.bytes_uncompressed', len(encoded.body))
+    
+    if __debug__ and log.debug_enabled:
+        logger.debug("Served level", extra={
+            'level_id': level_id,
+            'status': response.status_code,
+            'encoding': response.headers.get('Content-Encoding', 'identity'),
+            'bytes': sent,
+            'cached': cached,
+            'duration_ms': round((time.perf_counter() - start) * 1000, 3) if start is not None else None
+        })
+    return response
+
 @app.route('/api/levels/<level_id>')
+@route_class('game')
 def get_level(level_id):
     """Return data for a specific level"""
-    levels_dir = os.path.join(os.path.dirname(__file__), 'levels')
+    start = time.perf_counter()
+    levels_dir = app.config['LEVELS_DIR']
+    
+    # Readers see edits the debounced writer hasn't saved yet
+    level_edit_store.flush(level_id)
     
     # First try exact match with provided level_id
     level_file = f"{level_id}.json"
     level_path = os.path.join(levels_dir, level_file)
     
-    # Check if the file exists with the exact requested level_id
-    if os.path.exists(level_path):
-        try:
-            with open(level_path, 'r') as f:
-                level_data = json.load(f)
-            print(f"Found and loaded level: {level_id}")
-            return jsonify(level_data)
-        except Exception as e:
-            print(f"Error reading level file {level_path}: {e}")
-            return jsonify({'error': 'Invalid level file'}), 500
+    # Check if the level exists with the exact requested level_id (file or level pack)
+    try:
+        level_data = read_level(levels_dir, level_id, app.config['LEVEL_PACK'])
+    except Exception as e:
+        logger.error("Error reading level", extra={'level_id': level_id, 'error': str(e)})
+        return jsonify({'error': 'Invalid level file'}), 500
+    if level_data is not None:
+        return level_response(level_id, level_data, start)
     
     # If not found, try legacy format (level-N)
     if level_id.startswith('level-'):
@@ -225,63 +497,64 @@ def get_level(level_id):
                     level_num = int(level_num_part)
                     
                     # Try standard level file name format
-                    std_level_file = f"level-{level_num}.json"
-                    std_level_path = os.path.join(levels_dir, std_level_file)
+                    level_data = read_level(levels_dir, f"level-{level_num}", app.config['LEVEL_PACK'])
                     
-                    if os.path.exists(std_level_path):
-                        with open(std_level_path, 'r') as f:
-                            level_data = json.load(f)
-                        print(f"Found and loaded legacy level: {std_level_file}")
-                        return jsonify(level_data)
+                    if level_data is not None:
+                        return level_response(level_id, level_data, start)
         except Exception as e:
-            print(f"Error handling legacy level format: {e}")
+            logger.warning("Error handling legacy level format", extra={'level_id': level_id, 'error': str(e)})
     
-    # If not found, generate a level
-    print(f"Level {level_id} not found, generating a level")
-    try:
-        # Try to extract a level number for generation
-        level_num = 1  # Default
-        if level_id.startswith('level-'):
-            parts = level_id.split('-')
-            if len(parts) > 1:
-                try:
-                    # Try to get first numeric part
-                    for part in parts[1:]:
-                        if '_' in part:
-                            # Handle underscore separator
-                            subparts = part.split('_')
-                            if subparts[0].isdigit():
-                                level_num = int(subparts[0])
+    # Generating writes a file, so unknown IDs also count against the expensive limits
+    rate_limiter.check(client_key(), 'expensive')
+    with expensive_operations:
+        # If not found, generate a level
+        logger.info("Level not found, generating a level", extra={'level_id': level_id})
+        try:
+            # Try to extract a level number for generation
+            level_num = 1  # Default
+            if level_id.startswith('level-'):
+                parts = level_id.split('-')
+                if len(parts) > 1:
+                    try:
+                        # Try to get first numeric part
+                        for part in parts[1:]:
+                            if '_' in part:
+                                # Handle underscore separator
+                                subparts = part.split('_')
+                                if subparts[0].isdigit():
+                                    level_num = int(subparts[0])
+                                    break
+                            elif part.isdigit():
+                                level_num = int(part)
                                 break
-                        elif part.isdigit():
-                            level_num = int(part)
-                            break
-                except:
-                    pass
-        
-        # Generate the level
-        level_data = generate_level(level_num, 
-                                   app.config['GAME_SETTINGS']['SCREEN_WIDTH'],
-                                   app.config['GAME_SETTINGS']['SCREEN_HEIGHT'])
-        
-        # Ensure the level ID matches request
-        level_data['id'] = level_id
-        
-        # Save the generated level
-        with open(level_path, 'w') as f:
-            json.dump(level_data, f, indent=2)
-        
-        return jsonify(level_data)
-    except Exception as e:
-        print(f"Error generating level: {e}")
-        # Return a very basic level as fallback
-        return jsonify({
-            "id": level_id,
-            "name": f"Level {level_id}",
-            "bricks": []
-        })
+                    except:
+                        pass
+            
+            # Generate the level
+            level_data = generate_level(level_num, 
+                                       app.config['GAME_SETTINGS']['SCREEN_WIDTH'],
+                                       app.config['GAME_SETTINGS']['SCREEN_HEIGHT'])
+            
+            # Ensure the level ID matches request
+            level_data['id'] = level_id
+            
+            # Save the generated level
+            with open(level_path, 'w') as f:
+                json.dump(level_data, f, indent=2)
+            levels_changed()
+            
+            return jsonify(level_data)
+        except Exception as e:
+            logger.error("Error generating level", extra={'level_id': level_id, 'error': str(e)})
+            # Return a very basic level as fallback
+            return jsonify({
+                "id": level_id,
+                "name": f"Level {level_id}",
+                "bricks": []
+            })
 
 @app.route('/api/levels/<level_id>', methods=['POST'])
+@route_class('editor')
 def save_level_data(level_id):
     """Save data for a specific level"""
     if not request.is_json:
@@ -293,7 +566,7 @@ def save_level_data(level_id):
     level_data['id'] = level_id
     
     # Save the level data
-    levels_dir = os.path.join(os.path.dirname(__file__), 'levels')
+    levels_dir = app.config['LEVELS_DIR']
     
     # Extract level number if available
     level_num = 1  # Default
@@ -303,11 +576,14 @@ def save_level_data(level_id):
             level_num = int(parts[1])
     
     # Use standard save (not editor mode)
+    revision = level_edit_store.replace(f"level-{level_num}", level_data)
     save_level(level_data, level_num, levels_dir, editor_mode=False)
+    levels_changed()
     
-    return jsonify({'status': 'success'})
+    return jsonify({'status': 'success', 'revision': revision})
 
 @app.route('/api/editor/levels/create', methods=['POST'])
+@route_class('editor')
 def create_editor_level():
     """Create a new level from editor data with editor-specific handling"""
     if not request.is_json:
@@ -341,7 +617,7 @@ def create_editor_level():
                     brick['powerup_type'] = 0
         
         # Save the level
-        levels_dir = os.path.join(os.path.dirname(__file__), 'levels')
+        levels_dir = app.config['LEVELS_DIR']
         
         # Ensure the directory exists
         if not os.path.exists(levels_dir):
@@ -351,18 +627,22 @@ def create_editor_level():
         level_file = f"{level_id}.json"
         level_path = os.path.join(levels_dir, level_file)
         
-        # Save the level file
+        # Save the level file (as the next revision; unsaved edits are superseded)
+        revision = level_edit_store.replace(level_id, level_data)
         with open(level_path, 'w') as f:
             json.dump(level_data, f, indent=2)
+        levels_changed()
         
-        print(f"Successfully saved editor level: {level_id}")
-        return jsonify({'status': 'success'})
+        logger.info("Saved editor level", extra={'level_id': level_id, 'revision': revision,
+                                                 'bricks': len(level_data['bricks'])})
+        return jsonify({'status': 'success', 'revision': revision})
         
     except Exception as e:
-        print(f"Error creating editor level: {str(e)}")
+        logger.error("Error creating editor level", extra={'error': str(e)})
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/levels/create', methods=['POST'])
+@route_class('editor')
 def create_new_level():
     """Create a new level from editor data"""
     if not request.is_json:
@@ -381,7 +661,7 @@ def create_new_level():
     editor_mode = level_data.get('editor_version', False)
     
     # Save the level using the appropriate function
-    levels_dir = os.path.join(os.path.dirname(__file__), 'levels')
+    levels_dir = app.config['LEVELS_DIR']
     
     # Ensure the directory exists
     if not os.path.exists(levels_dir):
@@ -391,15 +671,50 @@ def create_new_level():
     level_file = f"{level_id}.json"
     level_path = os.path.join(levels_dir, level_file)
     
+    revision = level_edit_store.replace(level_id, level_data)
     with open(level_path, 'w') as f:
         json.dump(level_data, f, indent=2)
+    levels_changed()
     
-    return jsonify({'status': 'success'})
+    return jsonify({'status': 'success', 'revision': revision})
+
+@app.route('/api/editor/levels/<level_id>', methods=['PATCH'])
+@route_class('editor')
+def patch_editor_level(level_id):
+    """Apply brick-level edits to a level at a known revision"""
+    if not request.is_json:
+        return jsonify({'error': 'Request must be JSON'}), 400
+    
+    edits = request.json
+    revision = edits.get('revision') if isinstance(edits, dict) else None
+    if not isinstance(revision, int):
+        return jsonify({'error': "Expected {'revision': <int>, 'ops': [...]}"}), 400
+    
+    metrics.incr('editor.patches')
+    metrics.incr('editor.patch_bytes', request.content_length or 0)
+    try:
+        new_revision = level_edit_store.apply(level_id, revision, edits.get('ops', []))
+    except KeyError:
+        return jsonify({'error': f"Level {level_id} not found"}), 404
+    except EditConflict as e:
+        # Someone saved since this client loaded the level: it must reload and retry
+        metrics.incr('editor.conflicts')
+        return jsonify({'error': 'Stale revision', 'revision': e.revision}), 409
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    metrics.incr('editor.ops', len(edits.get('ops', [])))
+    
+    # Test runs read the file right away, so they ask for an immediate write
+    if edits.get('flush'):
+        level_edit_store.flush(level_id)
+    
+    return jsonify({'status': 'success', 'revision': new_revision})
 
 @app.route('/api/highscores', methods=['GET'])
+@route_class('game')
 def get_highscores():
     """Return the high scores list"""
-    high_scores_path = os.path.join(os.path.dirname(__file__), 'high_scores.json')
+    high_scores_path = app.config['HIGH_SCORES_FILE']
     
     if not os.path.exists(high_scores_path):
         # Create default high scores if file doesn't exist
@@ -421,6 +736,7 @@ def get_highscores():
     return jsonify(high_scores)
 
 @app.route('/api/highscores', methods=['POST'])
+@route_class('game')
 def add_highscore():
     """Add a new high score"""
     if not request.is_json:
@@ -433,7 +749,7 @@ def add_highscore():
         return jsonify({'error': 'Name and score are required'}), 400
     
     # Load existing high scores
-    high_scores_path = os.path.join(os.path.dirname(__file__), 'high_scores.json')
+    high_scores_path = app.config['HIGH_SCORES_FILE']
     
     if os.path.exists(high_scores_path):
         with open(high_scores_path, 'r') as f:
@@ -442,12 +758,13 @@ def add_highscore():
         high_scores = []
     
     # Add the new score
-    high_scores.append({
+    new_score = {
         'name': score_data['name'],
         'score': score_data['score'],
         'level': score_data.get('level', 1),
         'date': time.strftime('%Y-%m-%d')
-    })
+    }
+    high_scores.append(new_score)
     
     # Sort and limit to top 10
     high_scores.sort(key=lambda x: x['score'], reverse=True)
@@ -457,21 +774,21 @@ def add_highscore():
     with open(high_scores_path, 'w') as f:
         json.dump(high_scores, f)
     
-    return jsonify({'status': 'success', 'rank': high_scores.index(score_data) + 1})
+    # Rank is None when the score didn't make the top 10
+    rank = next((i + 1 for i, entry in enumerate(high_scores) if entry is new_score), None)
+    return jsonify({'status': 'success', 'rank': rank})
 
 @app.route('/api/level_preview/<level_id>')
+@route_class('expensive')
+@expensive_operation
 def get_level_preview(level_id):
     """Generate a preview image for a level"""
-    levels_dir = os.path.join(os.path.dirname(__file__), 'levels')
-    level_file = f"{level_id}.json"
-    level_path = os.path.join(levels_dir, level_file)
+    levels_dir = app.config['LEVELS_DIR']
+    level_data = read_level(levels_dir, level_id, app.config['LEVEL_PACK'])
     
-    if not os.path.exists(level_path):
+    if level_data is None:
         return jsonify({'error': 'Level not found'}), 404
     
-    with open(level_path, 'r') as f:
-        level_data = json.load(f)
-    
     # Generate the preview image
     preview_image = generate_level_preview(level_data)
     
@@ -483,7 +800,100 @@ def admin_levels():
     # In a real app, this would require authentication
     return render_template('admin_levels.html')
 
+@app.route('/admin/metrics')
+def admin_metrics():
+    """Report this process's counters and the rates derived from them"""
+    # In a real app, this would require authentication
+    return jsonify({
+        'counters': metrics.snapshot(),
+        'levels': {
+            'not_modified_rate': metrics.ratio('levels.not_modified', 'levels.requests'),
+            'body_cache_hit_rate': metrics.ratio('levels.body_cache_hits', 'levels.requests'),
+            'gzip_rate': metrics.ratio('levels.gzip_responses', 'levels.requests'),
+            'bytes_sent': metrics.get('levels.bytes_sent'),
+            'bytes_saved': metrics.get('levels.bytes_uncompressed') - metrics.get('levels.bytes_sent')
+        },
+        'editor': {
+            'patches': metrics.get('editor.patches'),
+            'conflicts': metrics.get('editor.conflicts'),
+            'bytes_per_patch': metrics.ratio('editor.patch_bytes', 'editor.patches'),
+            'writes': level_edit_store.writes,
+            'pending': sum(1 for document in level_edit_store.documents.values() if document.dirty)
+        },
+        'prefetch': dict(level_prefetcher.snapshot(),
+                         advance_ms=round(metrics.ratio('levels.advance_seconds', 'levels.advances') * 1000, 3)),
+        'gc': gc_control.controller.snapshot(),
+        'memory': memory.sampler.summary(),
+        'rate_limits': dict(rate_limiter.snapshot(), expensive=expensive_operations.snapshot()),
+        'sessions': {
+            'live': len(session_manager),
+            'hibernated': session_manager.hibernated_count,
+            'restored': session_manager.restored_count
+        }
+    })
+
+@app.route('/admin/memory')
+def admin_memory():
+    """Report approximate bytes held by each subsystem"""
+    # In a real app, this would require authentication
+    return jsonify(memory.report())
+
+@app.route('/admin/memory/trace', methods=['GET', 'POST', 'DELETE'])
+def admin_memory_trace():
+    """Start tracing allocations (POST), diff against the baseline (GET) or stop (DELETE)"""
+    # In a real app, this would require authentication
+    tracer = memory.tracer
+    if request.method == 'POST':
+        tracer.start()
+        return jsonify({'status': 'tracing', 'frames': tracer.frames})
+    if request.method == 'DELETE':
+        tracer.stop()
+        return jsonify({'status': 'stopped'})
+    
+    limit = request.args.get('limit', type=int)
+    diff = tracer.diff(rebase=request.args.get('rebase') == '1', limit=limit)
+    if diff is None:
+        return jsonify({'error': 'Not tracing; POST to start'}), 409
+    return jsonify(diff)
+
+@app.route('/admin/profile', methods=['GET', 'POST', 'DELETE'])
+def admin_profile():
+    """Start a sampling profile (POST), report on it (GET) or end it early (DELETE)"""
+    # In a real app, this would require authentication
+    sampler = profiler.profiler
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or {}
+        try:
+            seconds = float(data.get('seconds', profiler.DEFAULT_SECONDS))
+            rate = int(data.get('rate', profiler.DEFAULT_RATE))
+            if not sampler.start(seconds, rate):
+                return jsonify({'error': 'A profile is already running'}), 409
+        except (TypeError, ValueError) as e:
+            return jsonify({'error': str(e)}), 400
+        logger.info("Started sampling profile", extra={'seconds': seconds, 'rate': rate})
+        return jsonify(sampler.summary()), 202
+    if request.method == 'DELETE':
+        sampler.stop()
+    return jsonify(sampler.summary())
+
+@app.route('/admin/profile/collapsed')
+def admin_profile_collapsed():
+    """Download the last profile as collapsed stacks (for flamegraph.pl, speedscope, ...)"""
+    # In a real app, this would require authentication
+    response = app.response_class(profiler.profiler.collapsed(), mimetype='text/plain')
+    response.headers['Content-Disposition'] = 'attachment; filename=brick_breaker.collapsed'
+    return response
+
+@app.route('/admin/profile/flamegraph.svg')
+def admin_profile_flamegraph():
+    """Draw the last profile as a flamegraph"""
+    # In a real app, this would require authentication
+    svg = profiler.flamegraph_svg(profiler.profiler.collapsed())
+    return app.response_class(svg, mimetype='image/svg+xml')
+
 @app.route('/admin/create_level/<int:level_num>', methods=['GET'])
+@route_class('expensive')
+@expensive_operation
 def create_level(level_num):
     """Create a new level"""
     # Generate the level
@@ -492,16 +902,80 @@ def create_level(level_num):
                                app.config['GAME_SETTINGS']['SCREEN_HEIGHT'])
     
     # Save the level
-    levels_dir = os.path.join(os.path.dirname(__file__), 'levels')
+    levels_dir = app.config['LEVELS_DIR']
+    level_edit_store.replace(f"level-{level_num}", level_data)
     save_level(level_data, level_num, levels_dir)
+    levels_changed()
     
     return redirect(url_for('admin_levels'))
 
+@app.route('/api/game/inputs', methods=['POST'])
+@route_class('game')
+def submit_inputs():
+    """Queue a batch of tick-stamped inputs for the session's engine"""
+    if not request.is_json:
+        return jsonify({'error': 'Request must be JSON'}), 400
+    
+    data = request.json
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Request must be a JSON object'}), 400
+    
+    engine = get_game_engine()
+    try:
+        replayed = engine.submit_inputs(data.get('inputs', []))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    response = {'status': 'success', 'tick': engine.tick, 'queued': len(engine.inputs), 'replayed': replayed}
+    
+    # Optionally simulate up to a tick (e.g. the last one in the batch) and return the state
+    advance_to = data.get('advance_to')
+    if advance_to is not None:
+        if not isinstance(advance_to, int) or isinstance(advance_to, bool):
+            return jsonify({'error': 'advance_to must be an integer tick'}), 400
+        dt = 1 / engine.fps
+        for _ in range(min(advance_to - engine.tick, engine.inputs.max_ahead)):
+            engine.update(dt)
+        response['tick'] = engine.tick
+        response['queued'] = len(engine.inputs)
+        response['state'] = engine.get_game_state()
+        prefetch_next_level(engine)
+    
+    return jsonify(response)
+
+def prefetch_next_level(engine):
+    """Start preparing the engine's next level once few of its bricks are left"""
+    if not engine.game_over and len(engine.bricks) <= app.config['PREFETCH_BRICKS']:
+        level_prefetcher.prefetch(engine.level + 1)
+
+@app.route('/api/levels/prefetch', methods=['POST'])
+@route_class('game')
+def prefetch_level():
+    """Hint from the client that its level is nearly cleared: prepare the next one in the background"""
+    # Only the session's own next level: a level number from the client could
+    # have the server generate and save any number of levels
+    level_num = get_game_engine().level + 1
+    started = level_prefetcher.prefetch(level_num)
+    return jsonify({'status': 'success', 'level': level_num, 'started': started})
+
 @app.route('/api/levels/advance', methods=['POST'])
+@route_class('game')
 def advance_level():
-    """Advance to the next level"""
-    game_engine.advance_to_next_level()
-    return jsonify({'status': 'success'})
+    """Advance to the next level, returning its level data inline"""
+    start = time.perf_counter()
+    engine = get_game_engine()
+    prepared = level_prefetcher.take(engine.level + 1)
+    if prepared is None:
+        # Couldn't prepare it: let the engine load the level itself; the client fetches it
+        engine.advance_to_next_level()
+        return jsonify({'status': 'success', 'level': engine.level})
+    
+    engine.advance_to_next_level(prepared.prototype)
+    metrics.incr('levels.advances')
+    metrics.incr('levels.advance_seconds', time.perf_counter() - start)
+    # The level is already encoded, so it's spliced into the response as is
+    body = b'{"status":"success","level":%d,"level_data":%s}' % (engine.level, prepared.body.body)
+    return app.response_class(body, mimetype='application/json')
 
 
 @app.route('/editor')
@@ -514,36 +988,67 @@ if __name__ == '__main__':
     import argparse
     parser = argparse.ArgumentParser(description='Run the Super Brick Breaker Deluxe game')
     parser.add_argument('--debug', action='store_true', help='Run in debug mode (may use other ports)')
+    parser.add_argument('--port', type=int, default=5000, help='Port to listen on (default 5000)')
+    parser.add_argument('--skip-port-check', action='store_true',
+                        help='Start immediately without scanning for or killing processes on the port')
+    parser.add_argument('--no-browser', action='store_true', help='Do not open a browser window')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Serve with N pre-forked worker processes (sessions stick to one worker)')
+    parser.add_argument('--level-pack', help='Serve levels from this level pack as well as the levels directory')
     args = parser.parse_args()
+    
+    if args.level_pack:
+        app.config['LEVEL_PACK'] = args.level_pack
+        level_prefetcher.pack_path = args.level_pack
 
     # Create levels directory if it doesn't exist
-    levels_dir = os.path.join(os.path.dirname(__file__), 'levels')
+    levels_dir = app.config['LEVELS_DIR']
     if not os.path.exists(levels_dir):
         os.makedirs(levels_dir)
         # Create sample levels
         create_sample_levels(levels_dir)
     
-    port = 5000
+    port = args.port
     
-    # If we're not in debug mode, ensure port 5000 is available
+    # If we're not in debug mode, ensure the port is available
     if not args.debug:
-        print(f"Checking if port {port} is available...")
-        if not check_port_available(port):
-            print(f"Port {port} is busy, attempting to kill processes...")
-            if kill_process_on_port(port):
-                print(f"Successfully freed port {port}")
-            else:
-                print(f"WARNING: Could not free port {port}, but will try to use it anyway")
+        if args.skip_port_check:
+            print(f"Skipping port check for port {port}")
+        else:
+            print(f"Checking if port {port} is available...")
+            if not check_port_available(port):
+                print(f"Port {port} is busy, attempting to kill processes...")
+                if kill_process_on_port(port):
+                    print(f"Successfully freed port {port}")
+                else:
+                    print(f"WARNING: Could not free port {port}, but will try to use it anyway")
     
         # Launch browser in a separate thread
-        browser_thread = threading.Thread(target=open_browser, args=(port,))
-        browser_thread.daemon = True
-        browser_thread.start()
+        if not args.no_browser:
+            browser_thread = threading.Thread(target=open_browser, args=(port,))
+            browser_thread.daemon = True
+            browser_thread.start()
         
-        # Run Flask with debug mode OFF
-        print(f"Starting Super Brick Breaker Deluxe on port {port} (debug mode OFF)")
-        app.run(debug=False, port=port)
+        if args.workers > 1:
+            # Warm shared read-only state once, then fork the workers
+            print(f"Starting Super Brick Breaker Deluxe on port {port} with {args.workers} workers")
+            shared_state = prefork.warm_shared_state(levels_dir, app.config['LEVEL_PACK'])
+            # Freeze before forking so workers' collectors leave shared pages alone
+            frozen = warm_long_lived_state(levels_dir)
+            gc_control.controller.schedule()
+            print(f"Froze {frozen} long-lived objects; collections run between requests")
+            try:
+                prefork.PreforkServer(app, '127.0.0.1', port, args.workers).serve_forever()
+            finally:
+                shared_state['shared_levels'].close()
+        else:
+            # Run Flask with debug mode OFF
+            print(f"Starting Super Brick Breaker Deluxe on port {port} (debug mode OFF)")
+            frozen = warm_long_lived_state(levels_dir)
+            gc_control.controller.schedule()
+            print(f"Froze {frozen} long-lived objects; collections run between requests")
+            app.run(debug=False, port=port)
     else:
         # In debug mode, Flask will handle port conflicts automatically
         print(f"Starting Super Brick Breaker Deluxe in debug mode (may use alternate port)")
-        app.run(debug=True)
\ No newline at end of file
+        app.run(debug=True, port=port)
\ No newline at end of file
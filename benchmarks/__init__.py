@@ -0,0 +1,5 @@
+"""Benchmark suite for the Brick Breaker server.
+
+Run ``python -m benchmarks.run`` from the repository root. See
+``benchmarks/run.py`` for the available options.
+"""
@@ -0,0 +1,75 @@
+"""
+Batched stepping benchmark
+
+Builds populations of 10, 50, 100 and 500 mid-game sessions (1-4 balls
+each, lasers firing on half of them) and advances them with BatchStepper
+(batching every population, whatever its min_sessions) and with
+engine.update one engine at a time. Results are reported per
+session-tick; ops_per_sec in the saved results is session-ticks/sec, and
+the throughput of both ways is printed for each population.
+"""
+
+from .common import level_files, make_engine, quiet, tick
+from .harness import measure, result
+
+POPULATIONS = [10, 50, 100, 500]
+TICKS_PER_SAMPLE = 10
+WARMUP_TICKS = 60
+
+def bench_batch_stepper(options):
+    from utils import vector_physics
+    from utils.batch_stepper import BatchStepper
+
+    if not vector_physics.available():
+        print("  NumPy is not installed; BatchStepper falls back to engine.update")
+
+    levels = level_files()
+    populations = POPULATIONS[:2] if options.quick else POPULATIONS
+    results = []
+    for sessions in populations:
+        engines = _population(levels, sessions)
+        inputs = [{'mouse_x': 400}] * sessions
+        stepper = BatchStepper(min_sessions=0)
+        rates = {}
+
+        for mode in ('sequential', 'batch'):
+            def run():
+                with quiet():
+                    for _ in range(TICKS_PER_SAMPLE):
+                        if mode == 'batch':
+                            stepper.step(engines, 1 / 60, inputs)
+                        else:
+                            for engine, input_data in zip(engines, inputs):
+                                engine.update(1 / 60, input_data)
+
+            stats = _per_session_tick(measure(run, repeat=options.repeat), sessions)
+            results.append(result('batch_stepper.step', stats, unit='s/session-tick', mode=mode, sessions=sessions))
+            rates[mode] = stats['ops_per_sec']
+
+        print(f"  {sessions} sessions: {rates['sequential']:,.0f} session-ticks/s one by one, "
+              f"{rates['batch']:,.0f} batched (x{rates['batch'] / rates['sequential']:.2f})")
+    return results
+
+def _population(levels, sessions):
+    """Build mid-game engines cycling through the level files"""
+    engines = []
+    for i in range(sessions):
+        _, level_data = levels[i % len(levels)]
+        engine = make_engine(level_data, ball_count=1 + i % 4, seed=i, settings={'VECTOR_BALLS': 0})
+        engine.paddle.laser_active = i % 2 == 0
+        engine.paddle.laser_time = float('inf')
+        with quiet():
+            tick(engine, WARMUP_TICKS)
+        engines.append(engine)
+    return engines
+
+def _per_session_tick(stats, sessions):
+    session_ticks = sessions * TICKS_PER_SAMPLE
+    scaled = {key: value / session_ticks for key, value in stats.items() if key not in ('samples', 'ops_per_sec')}
+    scaled['samples'] = stats['samples']
+    scaled['ops_per_sec'] = stats['ops_per_sec'] * session_ticks
+    return scaled
+
+BENCHMARKS = {
+    'batch_stepper': bench_batch_stepper
+}
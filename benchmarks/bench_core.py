@@ -0,0 +1,192 @@
+"""
+Core benchmarks: engine ticks, level resets, state encoding, level
+generation, preview rendering and the level listing API.
+"""
+
+import json
+import os
+import random
+import shutil
+import tempfile
+
+from .common import GAME_SETTINGS, LEVELS_DIR, level_files, make_engine, quiet, scratch_levels_dir, tick
+from .harness import measure, result, summarize
+
+TICKS_PER_SAMPLE = 300
+RESETS_PER_SAMPLE = 100
+
+def bench_engine_update(options):
+    """GameEngine.update ticks/sec for every level file with 1, 3 and 30 balls"""
+    results = []
+    for name, level_data in level_files():
+        for ball_count in (1, 3, 30):
+            stats = measure(
+                lambda engine: tick(engine, TICKS_PER_SAMPLE),
+                repeat=options.repeat,
+                setup=lambda: make_engine(level_data, ball_count)
+            )
+            # Report per tick rather than per 300-tick sample
+            stats = _per_tick(stats, TICKS_PER_SAMPLE)
+            results.append(result('engine.update', stats, unit='s/tick',
+                                  level=name, balls=ball_count))
+    return results
+
+def bench_entities(options):
+    """Steady-state ticks with lasers firing, and removal from an EntityStore vs a list"""
+    from utils.entity_store import EntityStore
+    from utils.game_objects import Laser
+    
+    results = []
+    for name, level_data in level_files():
+        engine = make_engine(level_data, ball_count=3)
+        engine.paddle.laser_active = True
+        engine.paddle.laser_time = float('inf')
+        with quiet():
+            tick(engine, TICKS_PER_SAMPLE)
+        stores = (engine.balls, engine.powerups, engine.lasers)
+        created = sum(store.created for store in stores)
+        
+        stats = measure(lambda: tick(engine, TICKS_PER_SAMPLE), repeat=options.repeat)
+        results.append(result('entities.update', _per_tick(stats, TICKS_PER_SAMPLE), unit='s/tick', level=name))
+        
+        # Objects the stores had to build (rather than reuse) once warmed up
+        created = sum(store.created for store in stores) - created
+        results.append(result('entities.created', summarize([float(created)]), unit='objects', level=name))
+    
+    for count in (10, 100, 1000):
+        def fill_store():
+            store = EntityStore(Laser)
+            for i in range(count):
+                store.spawn(i, 0)
+            return store, _shuffled(store)
+        
+        def fill_list():
+            items = [Laser(i, 0) for i in range(count)]
+            return items, _shuffled(items)
+        
+        # Remove every entity, in random order
+        stats = measure(lambda arg: [arg[0].remove(laser) for laser in arg[1]],
+                        repeat=options.repeat, setup=fill_store)
+        results.append(result('entities.remove_all', stats, unit='s/batch', container='store', entities=count))
+        stats = measure(lambda arg: [arg[0].remove(laser) for laser in arg[1]],
+                        repeat=options.repeat, setup=fill_list)
+        results.append(result('entities.remove_all', stats, unit='s/batch', container='list', entities=count))
+    return results
+
+def bench_reset_level(options):
+    """GameEngine.reset_level on the level file with the most bricks, with and without a cached prototype"""
+    from utils import level_prototype
+    from utils.game_engine import GameEngine
+    
+    name, level_data = max(level_files(), key=lambda item: len(item[1].get('bricks', [])))
+    directory = tempfile.mkdtemp(prefix='bb-reset-')
+    results = []
+    try:
+        shutil.copy(os.path.join(LEVELS_DIR, name), os.path.join(directory, 'level-1.json'))
+        with quiet():
+            engine = GameEngine({**GAME_SETTINGS, 'LEVELS_DIR': directory, 'SEED': 0})
+        
+        # 'compile' rebuilds the prototype on every reset, as loading the level data used to
+        for mode, clear in (('prototype', False), ('compile', True)):
+            def reset():
+                with quiet():
+                    for _ in range(RESETS_PER_SAMPLE):
+                        if clear:
+                            level_prototype.clear_cache()
+                        engine.reset_level()
+            
+            stats = _per_tick(measure(reset, repeat=options.repeat), RESETS_PER_SAMPLE)
+            results.append(result('engine.reset_level', stats, unit='s/reset', mode=mode,
+                                  level=name, bricks=len(level_data.get('bricks', []))))
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    return results
+
+def bench_game_state(options):
+    """get_game_state plus JSON encoding on each level, mid-game with particles"""
+    results = []
+    for name, level_data in level_files():
+        engine = make_engine(level_data, ball_count=3)
+        tick(engine, 120)
+        engine.create_particles(400, 300, count=50)
+        stats = measure(lambda: json.dumps(engine.get_game_state()),
+                        repeat=options.repeat, number=50)
+        results.append(result('engine.get_game_state', stats, level=name))
+    return results
+
+def bench_generate_level(options):
+    """level_loader.generate_level for levels 1-50"""
+    from utils.level_loader import generate_level
+    
+    last = 10 if options.quick else 50
+    stats = measure(lambda: [generate_level(n) for n in range(1, last + 1)],
+                    repeat=options.repeat)
+    return [result('level_loader.generate_level', stats, unit='s/batch', levels=last)]
+
+def bench_renderer(options):
+    """generate_level_preview per level file and generate_game_screenshot mid-game"""
+    from utils.game_renderer import generate_level_preview, generate_game_screenshot
+    
+    results = []
+    for name, level_data in level_files():
+        stats = measure(lambda: generate_level_preview(level_data), repeat=options.repeat)
+        results.append(result('renderer.generate_level_preview', stats, level=name))
+    
+    engine = make_engine(level_files()[0][1], ball_count=3)
+    tick(engine, 120)
+    state = engine.get_game_state()
+    stats = measure(lambda: generate_game_screenshot(state), repeat=options.repeat)
+    results.append(result('renderer.generate_game_screenshot', stats))
+    return results
+
+def bench_api_levels(options):
+    """GET /api/levels through the Flask test client with 10, 100 and 1,000 level files"""
+    with quiet():
+        import app as app_module
+    
+    flask_app = app_module.app
+    client = flask_app.test_client()
+    original_dir = flask_app.config['LEVELS_DIR']
+    
+    counts = (10, 100) if options.quick else (10, 100, 1000)
+    results = []
+    try:
+        for count in counts:
+            with scratch_levels_dir(count) as directory:
+                flask_app.config['LEVELS_DIR'] = directory
+                
+                def request_levels():
+                    response = client.get('/api/levels')
+                    assert response.status_code == 200
+                
+                # Very large directories are slow enough that a few samples suffice
+                repeat = max(1, options.repeat if count < 1000 else min(options.repeat, 2))
+                stats = measure(request_levels, repeat=repeat)
+                results.append(result('api.levels', stats, unit='s/request', files=count))
+    finally:
+        flask_app.config['LEVELS_DIR'] = original_dir
+    return results
+
+def _shuffled(entities):
+    """Return the entities in a fixed random order"""
+    order = list(entities)
+    random.Random(0).shuffle(order)
+    return order
+
+def _per_tick(stats, ticks):
+    """Rescale per-sample statistics to per-tick statistics"""
+    scaled = dict(stats)
+    for key in ('min', 'median', 'mean', 'p95', 'stdev'):
+        scaled[key] = stats[key] / ticks
+    scaled['ops_per_sec'] = stats['ops_per_sec'] * ticks
+    return scaled
+
+BENCHMARKS = {
+    'engine': bench_engine_update,
+    'entities': bench_entities,
+    'reset': bench_reset_level,
+    'state': bench_game_state,
+    'loader': bench_generate_level,
+    'renderer': bench_renderer,
+    'api': bench_api_levels
+}
@@ -0,0 +1,104 @@
+"""
+Garbage collection hitch benchmark
+
+Runs frames over 100 playing sessions (3 balls each, with
+get_game_state() per engine, as the update endpoint does) on top of the
+imported app and its warmed level caches. Every frame is timed on its
+own. Three modes are compared:
+
+- automatic: the collector runs whenever its thresholds trip, mid-frame
+- frozen: long-lived state is frozen after warmup (gc.freeze), so full
+  collections skip it, but they still run mid-frame
+- scheduled: frozen, and collections run between frames (GCController)
+
+Results are per-frame time distributions; the slowest frame and the
+collections that landed inside frames are printed. Hitches show up in the
+p95 and max, not the median.
+"""
+
+import gc
+import time
+
+from .common import level_files, make_engine, quiet
+from .harness import result, summarize
+
+SESSIONS = 100
+FRAMES = 600
+MODES = ['automatic', 'frozen', 'scheduled']
+
+def bench_gc(options):
+    with quiet():
+        import app as app_module
+    from utils.gc_control import GCController
+
+    levels = level_files()
+    sessions = SESSIONS // 2 if options.quick else SESSIONS
+    frames = FRAMES // 2 if options.quick else FRAMES
+
+    results = []
+    summary = {}
+    try:
+        for mode in MODES:
+            controller = GCController()
+            controller.install()
+            if mode != 'automatic':
+                with quiet():
+                    app_module.warm_long_lived_state(app_module.app.config['LEVELS_DIR'])
+            if mode == 'scheduled':
+                controller.schedule()
+
+            try:
+                times, in_frame = _run(levels, sessions, frames, controller, mode == 'scheduled')
+            finally:
+                controller.unschedule()
+                controller.uninstall()
+                gc.unfreeze()
+
+            stats = summarize(times)
+            results.append(result('gc.frame', stats, unit='s/frame', mode=mode, sessions=sessions))
+            summary[mode] = (max(times), in_frame, controller.snapshot())
+    finally:
+        gc.unfreeze()
+
+    for mode in MODES:
+        slowest, in_frame, snapshot = summary[mode]
+        print(f"  {mode}: slowest frame {slowest * 1e3:.1f} ms, {in_frame} collections inside frames "
+              f"({snapshot['collections']['scheduled']} between), longest pause {max(snapshot['pause_max_ms']):.2f} ms")
+    return results
+
+def _run(levels, sessions, frames, controller, scheduled):
+    """Time each frame; return (frame times, collections that ran inside a frame)"""
+    engines = []
+    for i in range(sessions):
+        _, level_data = levels[i % len(levels)]
+        engines.append(make_engine(level_data, ball_count=3, seed=i, settings={'VECTOR_BALLS': 0}))
+    # Only pauses during the frames count
+    controller.reset()
+
+    counts = {'inside': 0}
+    def count_inside(phase, info):
+        if phase == 'start' and counts.get('timing'):
+            counts['inside'] += 1
+    gc.callbacks.append(count_inside)
+
+    times = []
+    try:
+        with quiet():
+            for frame in range(frames):
+                counts['timing'] = True
+                start = time.perf_counter()
+                for engine in engines:
+                    target = engine.balls[0].x if engine.balls else engine.screen_width // 2
+                    engine.update(1 / 60, {'mouse_x': target})
+                    engine.get_game_state()
+                times.append(time.perf_counter() - start)
+                counts['timing'] = False
+                if scheduled:
+                    controller.between_ticks()
+    finally:
+        gc.callbacks.remove(count_inside)
+    return times, counts['inside']
+
+BENCHMARKS = {
+    'gc': bench_gc
+}
@@ -0,0 +1,80 @@
+"""
+Batched input submission benchmark
+
+Plays 600 frames of recorded input through POST /api/game/inputs with the
+Flask test client: one request per frame, then batches of 10 and 60
+frames, each request simulating up to the end of its batch. Results are
+reported per frame of input; the request count and speedup for each batch
+size are printed. The input pauses the game for a second partway through,
+and each run checks that the session resumed and reached the last frame.
+"""
+
+import random
+
+from .common import quiet
+from .harness import measure, result
+
+FRAMES = 600
+BATCH_SIZES = [1, 10, 60]
+# The recorded input pauses at the first tick and unpauses at the second
+PAUSE_TICKS = (100, 160)
+
+def bench_inputs(options):
+    with quiet():
+        import app as app_module
+
+    flask_app = app_module.app
+    frames = FRAMES // 2 if options.quick else FRAMES
+    inputs = _inputs(frames)
+
+    results = []
+    per_frame = {}
+    for batch_size in BATCH_SIZES:
+        def setup():
+            # A new client gets a new session, and with it a fresh engine
+            return flask_app.test_client()
+
+        def play(client):
+            with quiet():
+                for start in range(0, frames, batch_size):
+                    batch = [{'tick': tick, 'input': inputs[tick]}
+                             for tick in range(start, min(frames, start + batch_size))]
+                    response = client.post('/api/game/inputs',
+                                           json={'inputs': batch, 'advance_to': batch[-1]['tick'] + 1})
+                    assert response.status_code == 200
+            state = response.get_json()['state']
+            if state['paused'] or state['tick'] != frames:
+                raise RuntimeError(f"Session stuck after pausing (tick {state['tick']}, paused {state['paused']})")
+
+        stats = _per_frame(measure(play, repeat=options.repeat, setup=setup), frames)
+        results.append(result('api.game_inputs', stats, unit='s/frame', batch=batch_size, frames=frames))
+        per_frame[batch_size] = stats['median']
+
+    for batch_size in BATCH_SIZES:
+        requests = -(-frames // batch_size)
+        print(f"  batch of {batch_size}: {requests} requests, {per_frame[batch_size] * 1e6:.0f} us per frame "
+              f"(x{per_frame[1] / per_frame[batch_size]:.1f})")
+    return results
+
+def _per_frame(stats, frames):
+    scaled = {key: value / frames for key, value in stats.items() if key not in ('samples', 'ops_per_sec')}
+    scaled['samples'] = stats['samples']
+    scaled['ops_per_sec'] = stats['ops_per_sec'] * frames
+    return scaled
+
+def _inputs(frames):
+    """Recorded-looking input: mouse moves every frame, an occasional launch, one pause"""
+    rng = random.Random(0)
+    inputs = []
+    for _ in range(frames):
+        input_data = {'mouse_x': rng.randint(0, 800)}
+        if rng.random() < 0.01:
+            input_data['launch_pressed'] = True
+        inputs.append(input_data)
+    for tick in PAUSE_TICKS:
+        inputs[tick]['pause_pressed'] = True
+    return inputs
+
+BENCHMARKS = {
+    'inputs': bench_inputs
+}
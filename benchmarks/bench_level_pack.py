@@ -0,0 +1,70 @@
+"""
+Level pack benchmark
+
+For 10, 100 and 1,000 levels, compares serving levels from individual files
+in a levels directory against a single level pack: listing level IDs, and
+cold random-access reads of 50 levels (caches cleared before every sample,
+as after a restart or for levels nobody has played yet). Also reports the
+time to open the pack.
+"""
+
+import os
+import random
+import tempfile
+
+from .common import scratch_levels_dir
+from .harness import measure, result
+
+READS_PER_SAMPLE = 50
+
+def bench_level_pack(options):
+    from utils import level_loader
+    from utils.level_pack import LevelPack, export_pack
+
+    counts = (10, 100) if options.quick else (10, 100, 1000)
+    results = []
+    for count in counts:
+        with scratch_levels_dir(count) as directory:
+            pack_path = os.path.join(tempfile.mkdtemp(prefix='bb-pack-'), 'levels.pack')
+            export_pack(directory, pack_path)
+            empty_dir = os.path.dirname(pack_path)
+
+            rng = random.Random(count)
+            level_ids = [f"level-{rng.randint(1, count)}" for _ in range(READS_PER_SAMPLE)]
+
+            stats = measure(lambda: LevelPack(pack_path).close(), repeat=options.repeat, number=20)
+            results.append(result('level_pack.open', stats, levels=count))
+
+            # Listing: directory scan versus the pack's sorted index
+            stats = measure(lambda: level_loader.list_levels(directory), repeat=options.repeat, number=5)
+            results.append(result('level_pack.list', stats, levels=count, mode='files'))
+            pack = LevelPack(pack_path)
+            stats = measure(pack.level_ids, repeat=options.repeat, number=5)
+            results.append(result('level_pack.list', stats, levels=count, mode='pack'))
+
+            # Cold random reads: one open() and parse per file versus slices of the mapping
+            def read_files():
+                level_loader._level_cache.clear()
+                for level_id in level_ids:
+                    level_loader.read_level(directory, level_id)
+
+            def read_pack():
+                pack.decoded.clear()
+                for level_id in level_ids:
+                    pack.read_level(level_id)
+
+            for mode, func in (('files', read_files), ('pack', read_pack)):
+                stats = measure(func, repeat=options.repeat)
+                results.append(result('level_pack.read_random', stats, unit='s/batch',
+                                      levels=count, reads=READS_PER_SAMPLE, mode=mode))
+
+            pack.close()
+            os.remove(pack_path)
+            os.rmdir(empty_dir)
+
+    level_loader._level_cache.clear()
+    return results
+
+BENCHMARKS = {
+    'level_pack': bench_level_pack
+}
@@ -0,0 +1,87 @@
+"""
+Logging overhead on level load
+
+Times GameEngine.load_level with its debug record written three ways:
+
+- sync: a plain logging handler writing (and flushing) on the calling
+  thread, as the old print() calls did
+- queue: utils/log.py's queue handler, with a background thread writing
+- off: the level above DEBUG, so the guarded debug block is skipped
+
+Records go to one of two sinks. 'file' is a local file: writes land in the
+page cache and never block. 'slow' is the same file behind a write that
+blocks for SLOW_SINK_DELAY, like a terminal or a pipe whose reader has
+fallen behind. Moving writes to a thread only pays off when the sink
+blocks. On a single core, the queue costs some CPU otherwise. Results are
+per level load.
+"""
+
+import logging
+import os
+import tempfile
+import time
+
+from .common import make_engine
+from .harness import measure, result
+
+LOADS_PER_SAMPLE = 200
+# (mode, sink) pairs timed
+CASES = [('sync', 'file'), ('queue', 'file'), ('sync', 'slow'), ('queue', 'slow'), ('off', 'file')]
+SLOW_SINK_DELAY = 0.0002
+
+class _SlowFileHandler(logging.FileHandler):
+    """A file handler whose writes block like a backed-up pipe"""
+
+    def emit(self, record):
+        time.sleep(SLOW_SINK_DELAY)
+        super().emit(record)
+
+def bench_logging(options):
+    from utils import log
+
+    engine = make_engine()
+    loads = LOADS_PER_SAMPLE // 4 if options.quick else LOADS_PER_SAMPLE
+    root = logging.getLogger(log.ROOT_LOGGER)
+    saved = (list(root.handlers), root.level, root.propagate, log.debug_enabled)
+
+    results = []
+    per_load = {}
+    with tempfile.TemporaryDirectory(prefix='bench_logging_') as scratch:
+        for mode, sink in CASES:
+            handler_class = _SlowFileHandler if sink == 'slow' else logging.FileHandler
+            handler = handler_class(os.path.join(scratch, f"{mode}_{sink}.log"))
+            if mode == 'sync':
+                log.shutdown()
+                handler.setFormatter(log.StructuredFormatter())
+                root.handlers[:] = [handler]
+                root.propagate = False
+                log.set_level('DEBUG')
+            else:
+                log.setup('DEBUG' if mode == 'queue' else 'INFO', handler=handler)
+
+            def run():
+                for _ in range(loads):
+                    engine.load_level(1)
+
+            try:
+                stats = _per_load(measure(run, repeat=options.repeat), loads)
+            finally:
+                log.shutdown()
+                handler.close()
+            results.append(result('logging.level_load', stats, unit='s/load', mode=mode, sink=sink))
+            per_load[mode, sink] = stats['median']
+
+    root.handlers[:], root.level, root.propagate, log.debug_enabled = saved
+    for mode, sink in CASES:
+        print(f"  {mode} ({sink} sink): {per_load[mode, sink] * 1e6:.1f} us per level load")
+    return results
+
+def _per_load(stats, loads):
+    scaled = {key: value / loads for key, value in stats.items() if key not in ('samples', 'ops_per_sec')}
+    scaled['samples'] = stats['samples']
+    scaled['ops_per_sec'] = stats['ops_per_sec'] * loads
+    return scaled
+
+BENCHMARKS = {
+    'logging': bench_logging
+}
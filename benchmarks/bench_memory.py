@@ -0,0 +1,55 @@
+"""
+Memory report benchmark
+
+Times estimating the memory of 100 and 1,000 playing sessions (3 balls
+each, mid-level with particles), as /admin/memory and the periodic
+sampler do:
+
+- sampled: per-object sizes measured on a sample of engines and objects,
+  then scaled by the counts (utils/memory.py's default)
+- exact: every object of every engine walked
+
+The estimated bytes of both are printed, to show what sampling gives up.
+Results are per report.
+"""
+
+from .common import level_files, make_engine, tick
+from .harness import measure, result
+
+SESSION_COUNTS = [100, 1000]
+MODES = ['sampled', 'exact']
+
+def bench_memory(options):
+    from utils import memory
+
+    levels = level_files()
+    counts = SESSION_COUNTS[:1] if options.quick else SESSION_COUNTS
+    engines = []
+    results = []
+    for sessions in counts:
+        while len(engines) < sessions:
+            _, level_data = levels[len(engines) % len(levels)]
+            engine = make_engine(level_data, ball_count=3, seed=len(engines), settings={'VECTOR_BALLS': 0})
+            tick(engine, 30)
+            engines.append(engine)
+
+        estimates = {}
+        for mode in MODES:
+            def run():
+                if mode == 'sampled':
+                    sizer = memory.Sizer()
+                    sample_engines = memory.SAMPLE_ENGINES
+                else:
+                    sizer = memory.Sizer(sample=None)
+                    sample_engines = len(engines)
+                estimates[mode] = memory.session_memory(engines, sizer, sample_engines)['bytes']
+
+            stats = measure(run, repeat=options.repeat)
+            results.append(result('memory.session_report', stats, unit='s/report', mode=mode, sessions=sessions))
+            print(f"  {sessions} sessions, {mode}: {stats['median'] * 1e3:.2f} ms, "
+                  f"{estimates[mode] / 1e6:.2f} MB estimated")
+    return results
+
+BENCHMARKS = {
+    'memory': bench_memory
+}
@@ -0,0 +1,80 @@
+"""
+Level advance benchmark
+
+Times advancing an engine through levels it hasn't played yet (cold level,
+prototype and response caches), the way the server handles the player
+pressing "Next Level":
+
+- fetch: POST /api/levels/advance loads the level synchronously, then GET
+  /api/levels/level-N+1 reads and encodes it for the client
+- prefetched: the level was prepared by LevelPrefetcher while the previous
+  one was being played, so the advance takes it and splices the encoded
+  level into its response
+
+Only the server-side work is timed (no HTTP, and the fetch mode's second
+round trip isn't counted). Results are per advance.
+"""
+
+from .common import GAME_SETTINGS, quiet, scratch_levels_dir
+from .harness import measure, result
+
+ADVANCES = 40
+MODES = ['fetch', 'prefetched']
+
+def bench_prefetch(options):
+    from utils import level_prototype, level_responses
+    from utils.game_engine import GameEngine
+    from utils.level_loader import _level_cache, read_level
+    from utils.level_prefetch import LevelPrefetcher
+
+    advances = ADVANCES // 4 if options.quick else ADVANCES
+    results = []
+    per_advance = {}
+    with scratch_levels_dir(advances + 1) as directory:
+        with quiet():
+            engine = GameEngine({**GAME_SETTINGS, 'LEVELS_DIR': directory, 'SEED': 0})
+
+        for mode in MODES:
+            def setup():
+                # Levels not played yet in this process
+                _level_cache.clear()
+                level_prototype.clear_cache()
+                level_responses.invalidate()
+                engine.level = 1
+                prefetcher = LevelPrefetcher(directory)
+                if mode == 'prefetched':
+                    # Done in the background while the previous level is played
+                    for level_num in range(2, advances + 2):
+                        prefetcher.prefetch(level_num)
+                    for future in list(prefetcher.prepared.values()):
+                        future.result()
+                return prefetcher
+
+            def advance(prefetcher):
+                for _ in range(advances):
+                    if mode == 'fetch':
+                        engine.advance_to_next_level()
+                        level_id = f"level-{engine.level}"
+                        level_responses.get_body(level_id, read_level(directory, level_id))
+                    else:
+                        prepared = prefetcher.take(engine.level + 1)
+                        engine.advance_to_next_level(prepared.prototype)
+                        b'{"level":%d,"level_data":%s}' % (engine.level, prepared.body.body)
+
+            stats = _per_advance(measure(advance, repeat=options.repeat, setup=setup), advances)
+            results.append(result('levels.advance', stats, unit='s/advance', mode=mode, levels=advances))
+            per_advance[mode] = stats['median']
+
+    for mode in MODES:
+        print(f"  {mode}: {per_advance[mode] * 1e3:.3f} ms per advance")
+    return results
+
+def _per_advance(stats, advances):
+    scaled = {key: value / advances for key, value in stats.items() if key not in ('samples', 'ops_per_sec')}
+    scaled['samples'] = stats['samples']
+    scaled['ops_per_sec'] = stats['ops_per_sec'] * advances
+    return scaled
+
+BENCHMARKS = {
+    'prefetch': bench_prefetch
+}
@@ -0,0 +1,72 @@
+"""
+Sampling profiler overhead benchmark
+
+Times frames over 100 playing sessions (3 balls each) with the built-in
+profiler off, and sampling at 100 Hz and 1,000 Hz. The profiler thread
+samples the benchmark's thread, which is tagged like a request thread.
+Each sample holds the GIL, and the profiler lowers the switch interval
+while it runs, so both show up as slower frames. Results are per frame.
+The share of samples per tick phase is printed with the overhead.
+"""
+
+from .common import level_files, make_engine, tick
+from .harness import measure, result
+
+SESSIONS = 100
+FRAMES_PER_SAMPLE = 30
+# Sampling rates timed (0 is the profiler off)
+RATES = [0, 100, 1000]
+
+def bench_profiler(options):
+    from utils import profiler
+
+    levels = level_files()
+    sessions = SESSIONS // 4 if options.quick else SESSIONS
+    engines = []
+    for i in range(sessions):
+        _, level_data = levels[i % len(levels)]
+        engines.append(make_engine(level_data, ball_count=3, seed=i, settings={'VECTOR_BALLS': 0}))
+
+    def run():
+        for engine in engines:
+            tick(engine, FRAMES_PER_SAMPLE)
+
+    results = []
+    per_frame = {}
+    profiler.tag_thread('benchmark')
+    try:
+        for rate in RATES:
+            sampler = profiler.SamplingProfiler()
+            if rate:
+                sampler.start(seconds=profiler.MAX_SECONDS, rate=rate)
+            try:
+                stats = _per_frame(measure(run, repeat=options.repeat), FRAMES_PER_SAMPLE)
+            finally:
+                sampler.stop()
+            results.append(result('profiler.frame', stats, unit='s/frame', rate=rate, sessions=sessions))
+            per_frame[rate] = (stats['median'], sampler.summary())
+    finally:
+        profiler.untag_thread()
+
+    baseline = per_frame[0][0]
+    for rate in RATES:
+        median, summary = per_frame[rate]
+        line = f"  {rate or 'off'}{' Hz' if rate else ''}: {median * 1e3:.2f} ms per frame"
+        if rate:
+            phases = summary['phases']
+            total = sum(phases.values()) or 1
+            shares = ', '.join(f"{phase} {count * 100 / total:.0f}%" for phase, count in list(phases.items())[:4])
+            line += (f" ({(median / baseline - 1) * 100:+.1f}%, {summary['overhead'] * 100:.2f}% spent sampling, "
+                     f"{summary['samples']} samples: {shares})")
+        print(line)
+    return results
+
+def _per_frame(stats, frames):
+    scaled = {key: value / frames for key, value in stats.items() if key not in ('samples', 'ops_per_sec')}
+    scaled['samples'] = stats['samples']
+    scaled['ops_per_sec'] = stats['ops_per_sec'] * frames
+    return scaled
+
+BENCHMARKS = {
+    'profiler': bench_profiler
+}
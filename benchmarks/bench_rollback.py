@@ -0,0 +1,56 @@
+"""
+Tick history and rollback benchmark
+
+Measures what keeping a tick history costs on every update (the same
+engine ticked with and without HISTORY_TICKS), and what a rollback costs
+per re-simulated frame when a late input rewinds 1, 5, 15 and 60 ticks.
+"""
+
+from .common import make_engine, quiet, tick
+from .harness import measure, result
+
+HISTORY_TICKS = 60
+ROLLBACK_DEPTHS = [1, 5, 15, 60]
+BALL_COUNT = 3
+DT = 1 / 60
+
+def bench_rollback(options):
+    results = []
+    depths = ROLLBACK_DEPTHS[:2] if options.quick else ROLLBACK_DEPTHS
+
+    # Per-tick overhead of recording history
+    for history in (0, HISTORY_TICKS):
+        engine = make_engine(ball_count=BALL_COUNT, settings={'HISTORY_TICKS': history})
+        with quiet():
+            tick(engine, HISTORY_TICKS)
+        stats = measure(lambda: _tick_quietly(engine), repeat=options.repeat, number=200)
+        results.append(result('rollback.update', stats, history=history, balls=BALL_COUNT))
+
+    # Cost per re-simulated frame, for rollbacks of increasing depth
+    for depth in depths:
+        engine = make_engine(ball_count=BALL_COUNT, settings={'HISTORY_TICKS': HISTORY_TICKS})
+        with quiet():
+            tick(engine, HISTORY_TICKS)
+
+        def late_input():
+            with quiet():
+                engine.rollback(engine.tick - depth, {'toggle_control_pressed': True})
+
+        stats = measure(late_input, repeat=options.repeat, number=20)
+        results.append(result('rollback.per_frame', _per_frame(stats, depth), depth=depth, balls=BALL_COUNT))
+    return results
+
+def _per_frame(stats, frames):
+    """Scale per-rollback timings to per-re-simulated-frame timings"""
+    scaled = {key: value / frames for key, value in stats.items() if key not in ('samples', 'ops_per_sec')}
+    scaled['samples'] = stats['samples']
+    scaled['ops_per_sec'] = stats['ops_per_sec'] * frames
+    return scaled
+
+def _tick_quietly(engine):
+    with quiet():
+        tick(engine, 1, DT)
+
+BENCHMARKS = {
+    'rollback': bench_rollback
+}
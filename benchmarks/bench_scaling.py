@@ -0,0 +1,129 @@
+"""
+Pre-fork scaling benchmark
+
+Starts `app.py --workers N` for increasing N and drives the CPU-bound
+/api/level_preview endpoint (a PIL render) from separate client processes,
+reporting requests/sec and the speedup relative to one worker. Scaling can
+only be near-linear up to the number of cores not used by the clients.
+"""
+
+import http.client
+import multiprocessing
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from .common import LEVELS_DIR, REPO_DIR
+from .harness import result, summarize
+from .load_test import free_port
+
+ENDPOINT = '/api/level_preview/level-1'
+
+def _client(port, duration, queue):
+    """Issue requests back to back until the duration expires"""
+    count = errors = 0
+    latencies = []
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+            conn.request('GET', ENDPOINT)
+            response = conn.getresponse()
+            response.read()
+            conn.close()
+            if response.status != 200:
+                errors += 1
+        except (OSError, http.client.HTTPException):
+            errors += 1
+        latencies.append(time.perf_counter() - start)
+        count += 1
+    queue.put((count, errors, latencies))
+
+def _start_server(workers, port, levels_dir):
+    env = dict(os.environ)
+    env['BRICK_BREAKER_LEVELS_DIR'] = levels_dir
+    process = subprocess.Popen(
+        [sys.executable, 'app.py', '--port', str(port), '--skip-port-check', '--no-browser',
+         '--workers', str(workers)],
+        cwd=REPO_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conn.request('GET', ENDPOINT)
+            conn.getresponse().read()
+            conn.close()
+            return process
+        except OSError:
+            time.sleep(0.05)
+    process.kill()
+    raise RuntimeError(f"Server with {workers} workers did not start")
+
+def bench_scaling(options):
+    """Requests/sec on a CPU-bound endpoint for 1, 2, 4, ... workers"""
+    cores = os.cpu_count() or 1
+    counts = [1]
+    while counts[-1] * 2 <= max(2, cores):
+        counts.append(counts[-1] * 2)
+    if cores not in counts and cores > 1:
+        counts.append(cores)
+    
+    duration = 2.0 if options.quick else 5.0
+    # Enough clients to keep every worker busy at the largest size
+    clients = 2 * counts[-1]
+    
+    scratch = tempfile.mkdtemp(prefix='bb-scaling-')
+    levels_dir = os.path.join(scratch, 'levels')
+    shutil.copytree(LEVELS_DIR, levels_dir)
+    
+    results = []
+    base_rps = None
+    context = multiprocessing.get_context('spawn')
+    try:
+        for workers in counts:
+            port = free_port()
+            process = _start_server(workers, port, levels_dir)
+            try:
+                queue = context.Queue()
+                procs = [context.Process(target=_client, args=(port, duration, queue))
+                         for _ in range(clients)]
+                for p in procs:
+                    p.start()
+                outcomes = [queue.get() for _ in procs]
+                for p in procs:
+                    p.join()
+            finally:
+                process.terminate()
+                process.wait(timeout=30)
+            
+            total = sum(o[0] for o in outcomes)
+            errors = sum(o[1] for o in outcomes)
+            latencies = [lat for o in outcomes for lat in o[2]]
+            rps = total / duration
+            base_rps = base_rps or rps
+            
+            record = result('prefork.scaling', summarize(latencies), unit='s/request',
+                            workers=workers)
+            record.update({
+                'requests_per_sec': rps,
+                'speedup': rps / base_rps if base_rps else 0.0,
+                'efficiency': (rps / base_rps) / workers if base_rps else 0.0,
+                'errors': errors,
+                'clients': clients,
+                'cpu_count': cores
+            })
+            print(f"  {workers} worker(s): {rps:8.1f} req/s  speedup x{record['speedup']:.2f}  "
+                  f"efficiency {record['efficiency']:.0%}  errors {errors}")
+            results.append(record)
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+    return results
+
+BENCHMARKS = {
+    'scaling': bench_scaling
+}
@@ -0,0 +1,97 @@
+"""
+Adaptive tick scheduling benchmark
+
+Builds 200 sessions in a typical mix of states (30% playing, 30% with the
+ball still on the paddle, 20% paused, 20% on the level-complete or
+game-over screen) and runs frames over them with TickScheduler and by
+calling engine.update on every engine. Playing sessions send input every
+frame, idle ones 5% of the time and paused or finished ones 1%. Results
+are reported per frame, and the CPU time saved is printed.
+"""
+
+import random
+
+from .common import level_files, make_engine, quiet
+from .harness import measure, result
+
+SESSIONS = 200
+FRAMES_PER_SAMPLE = 120
+# (state, share of sessions, chance of input in a frame)
+MIX = [('active', 0.3, 1.0), ('idle', 0.3, 0.05), ('paused', 0.2, 0.01), ('finished', 0.2, 0.01)]
+
+def bench_scheduler(options):
+    from utils.tick_scheduler import TickScheduler
+
+    levels = level_files()
+    sessions = SESSIONS // 2 if options.quick else SESSIONS
+    states = _states(sessions)
+    frames = _inputs(states)
+
+    results = []
+    per_frame = {}
+    scheduled = {}
+    for mode in ('full_rate', 'scheduled'):
+        def setup():
+            return _population(levels, states), TickScheduler()
+
+        def run(population):
+            engines, scheduler = population
+            with quiet():
+                for inputs in frames:
+                    if mode == 'scheduled':
+                        scheduler.step(engines, 1 / 60, inputs)
+                    else:
+                        for engine, input_data in zip(engines, inputs):
+                            engine.update(1 / 60, input_data)
+            if mode == 'scheduled':
+                scheduled['saved'] = scheduler.saved()
+
+        stats = _per_frame(measure(run, repeat=options.repeat, setup=setup))
+        results.append(result('tick_scheduler.frame', stats, unit='s/frame', mode=mode, sessions=sessions))
+        per_frame[mode] = stats['median']
+
+    saved = 1 - per_frame['scheduled'] / per_frame['full_rate']
+    print(f"  {sessions} sessions: {per_frame['full_rate'] * 1e3:.2f} ms/frame at full rate, "
+          f"{per_frame['scheduled'] * 1e3:.2f} ms scheduled ({saved:.0%} CPU saved, "
+          f"{scheduled['saved']:.0%} of engine ticks skipped)")
+    return results
+
+def _states(sessions):
+    """Assign each session a state from MIX"""
+    states = []
+    for state, share, chance in MIX:
+        states.extend([(state, chance)] * round(sessions * share))
+    return states[:sessions]
+
+def _inputs(states):
+    """Per-frame input lists: mouse moves at each state's input rate"""
+    rng = random.Random(0)
+    return [[{'mouse_x': rng.randint(0, 800)} if rng.random() < chance else None
+             for _, chance in states]
+            for _ in range(FRAMES_PER_SAMPLE)]
+
+def _population(levels, states):
+    """Build one engine per session, put into its state"""
+    engines = []
+    for i, (state, _) in enumerate(states):
+        _, level_data = levels[i % len(levels)]
+        engine = make_engine(level_data, ball_count=1, seed=i, settings={'VECTOR_BALLS': 0})
+        if state == 'idle':
+            for ball in engine.balls:
+                ball.active = False
+        elif state == 'paused':
+            engine.paused = True
+        elif state == 'finished':
+            engine.level_complete = True
+        engines.append(engine)
+    return engines
+
+def _per_frame(stats):
+    scaled = {key: value / FRAMES_PER_SAMPLE for key, value in stats.items() if key not in ('samples', 'ops_per_sec')}
+    scaled['samples'] = stats['samples']
+    scaled['ops_per_sec'] = stats['ops_per_sec'] * FRAMES_PER_SAMPLE
+    return scaled
+
+BENCHMARKS = {
+    'scheduler': bench_scheduler
+}
@@ -0,0 +1,108 @@
+"""
+Shared brick table benchmark
+
+For 10, 100 and 1,000 level files, forks a worker that loads every level
+into a GameEngine, once reading level JSON files (with the level cache) and
+once attaching to the shared-memory brick table. Reports per-level load
+time and the worker's private memory growth, which should stay flat with
+the shared table as the level count grows. Memory figures need Linux
+(/proc/self/smaps_rollup).
+"""
+
+import os
+import struct
+import time
+
+from .common import GAME_SETTINGS, quiet, scratch_levels_dir
+from .harness import result, summarize
+
+def _private_bytes():
+    """Private (unshared) resident memory of this process, or None if unavailable"""
+    try:
+        with open('/proc/self/smaps_rollup', 'r') as f:
+            total = 0
+            for line in f:
+                if line.startswith(('Private_Clean:', 'Private_Dirty:')):
+                    total += int(line.split()[1]) * 1024
+            return total
+    except OSError:
+        return None
+
+def _load_all_levels(levels_dir, count, table):
+    """Child process body: load every level and report (memory growth, per-level times)"""
+    from utils import level_loader, shared_levels
+    from utils.game_engine import GameEngine
+    
+    shared_levels.set_table(table)
+    level_loader._level_cache.clear()
+    
+    with quiet():
+        engine = GameEngine({**GAME_SETTINGS, 'LEVELS_DIR': levels_dir})
+    before = _private_bytes()
+    times = []
+    with quiet():
+        for level in range(1, count + 1):
+            engine.level = level
+            start = time.perf_counter()
+            engine.reset_level()
+            times.append(time.perf_counter() - start)
+    after = _private_bytes()
+    growth = (after - before) if before is not None and after is not None else -1
+    return growth, times
+
+def _run_in_child(func, *args):
+    """Run func in a forked child and return its (growth, times) result"""
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        try:
+            growth, times = func(*args)
+            payload = struct.pack(f'<qI{len(times)}d', growth, len(times), *times)
+            os.write(write_fd, payload)
+        finally:
+            os._exit(0)
+    
+    os.close(write_fd)
+    chunks = []
+    while True:
+        chunk = os.read(read_fd, 65536)
+        if not chunk:
+            break
+        chunks.append(chunk)
+    os.close(read_fd)
+    os.waitpid(pid, 0)
+    
+    data = b''.join(chunks)
+    growth, n = struct.unpack_from('<qI', data)
+    times = struct.unpack_from(f'<{n}d', data, struct.calcsize('<qI'))
+    return growth, list(times)
+
+def bench_shared_levels(options):
+    if not hasattr(os, 'fork'):
+        return []
+    from utils.shared_levels import SharedLevelTable
+    
+    counts = (10, 100) if options.quick else (10, 100, 1000)
+    results = []
+    for count in counts:
+        with scratch_levels_dir(count) as directory:
+            table = SharedLevelTable.publish(directory)
+            try:
+                for mode, active in (('json', None), ('shared', table)):
+                    growth, times = _run_in_child(_load_all_levels, directory, count, active)
+                    results.append(result('shared_levels.load', summarize(times), unit='s/level',
+                                          levels=count, mode=mode))
+                    if growth >= 0:
+                        record = result('shared_levels.worker_private_memory',
+                                        summarize([float(growth)]), unit='bytes',
+                                        levels=count, mode=mode)
+                        results.append(record)
+                        print(f"  {count:5d} levels, {mode:6s}: worker private memory +{growth / 1024:.0f} KiB")
+            finally:
+                table.close()
+    return results
+
+BENCHMARKS = {
+    'shared_levels': bench_shared_levels
+}
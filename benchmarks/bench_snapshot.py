@@ -0,0 +1,69 @@
+"""
+Engine snapshot benchmark
+
+For every level file, builds a mid-game engine (3 balls, particles on
+screen) and times snapshot_engine, restore_engine and a full hibernate /
+restore round trip through SessionManager and the disk. Snapshot and
+restore are expected to stay well under a millisecond; snapshot sizes are
+reported in bytes. Each level first checks that a restored engine
+snapshots to the same bytes, tick and seed included.
+"""
+
+import shutil
+import tempfile
+
+from .common import GAME_SETTINGS, level_files, make_engine, quiet, tick
+from .harness import measure, result, summarize
+
+TARGET_SECONDS = 0.001
+
+def bench_snapshot(options):
+    from utils.snapshot import snapshot_engine, restore_engine
+    from utils.session_manager import SessionManager
+
+    results = []
+    hibernate_dir = tempfile.mkdtemp(prefix='bb-sessions-')
+    try:
+        for name, level_data in level_files():
+            engine = make_engine(level_data, ball_count=3)
+            with quiet():
+                tick(engine, 120)
+            engine.create_particles(400, 300, count=50)
+
+            stats = measure(lambda: snapshot_engine(engine), repeat=options.repeat, number=50)
+            results.append(result('snapshot.snapshot', stats, level=name))
+            _report_target('snapshot', name, stats)
+
+            data = snapshot_engine(engine)
+            restored = restore_engine(data, GAME_SETTINGS)
+            if restored.tick != engine.tick or snapshot_engine(restored) != data:
+                raise RuntimeError(f"Snapshot round trip on {name} changed the engine (tick {restored.tick})")
+            results.append(result('snapshot.size', summarize([float(len(data))]), unit='bytes', level=name))
+
+            stats = measure(lambda: restore_engine(data, GAME_SETTINGS), repeat=options.repeat, number=50)
+            results.append(result('snapshot.restore', stats, level=name))
+            _report_target('restore', name, stats)
+
+            # Hibernate to disk and restore through the session manager
+            manager = SessionManager(lambda: engine, hibernate_dir=hibernate_dir,
+                                     engine_restorer=lambda snapshot: restore_engine(snapshot, GAME_SETTINGS))
+            manager.get('bench')
+
+            def round_trip():
+                with manager.lock:
+                    manager.hibernate('bench')
+                manager.get('bench')
+
+            stats = measure(round_trip, repeat=options.repeat, number=20)
+            results.append(result('snapshot.hibernate_round_trip', stats, level=name))
+    finally:
+        shutil.rmtree(hibernate_dir, ignore_errors=True)
+    return results
+
+def _report_target(kind, name, stats):
+    if stats['median'] > TARGET_SECONDS:
+        print(f"  {kind} on {name} took {stats['median'] * 1e3:.2f} ms (target {TARGET_SECONDS * 1e3:.0f} ms)")
+
+BENCHMARKS = {
+    'snapshot': bench_snapshot
+}
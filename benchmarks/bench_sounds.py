@@ -0,0 +1,73 @@
+"""
+Sound loading benchmark: one file per sound vs the audio sprite
+
+Builds the assets (sounds included) into a scratch build directory and
+fetches every game sound through the /assets/ route with the Flask test
+client: first as the nine separate MP3s the game used to request, then
+as the single sprite. The test client has no network round trips, so
+this measures server work per load. The request, byte and decode counts
+are printed; on a real connection each request saved also saves a round
+trip. Time to first sound in the browser is logged by sound_manager.js
+(soundManager.readyAt, compare /game with /game?sprite=0).
+"""
+
+import os
+import shutil
+import tempfile
+
+from .common import REPO_DIR, quiet
+from .harness import measure, result
+
+def bench_sounds(options):
+    with quiet():
+        import app as app_module
+    from utils import assets, audio_sprite
+
+    flask_app = app_module.app
+    scratch = tempfile.mkdtemp(prefix='bench_sounds_')
+    try:
+        static_dir = os.path.join(scratch, 'static')
+        sound_dir = os.path.join(static_dir, 'sounds')
+        shutil.copytree(os.path.join(REPO_DIR, 'static', 'sounds'), sound_dir,
+                        ignore=shutil.ignore_patterns('sprite.*'))
+        sprite = audio_sprite.build_sprite(sound_dir)
+        manifest = assets.build_assets(static_dir, os.path.join(scratch, 'dist'))
+
+        urls = {
+            'files': ['/assets/' + hashed for path, hashed in sorted(manifest.items())
+                      if path.endswith('.mp3') and path != 'sounds/' + audio_sprite.SPRITE_NAME],
+            'sprite': ['/assets/' + manifest['sounds/' + audio_sprite.SPRITE_NAME]]
+        }
+        decodes = {'files': len(urls['files']), 'sprite': len(sprite['segments'])}
+
+        original_dir = flask_app.config['ASSET_BUILD_DIR']
+        flask_app.config['ASSET_BUILD_DIR'] = os.path.join(scratch, 'dist')
+        client = flask_app.test_client()
+        results = []
+        sizes = {}
+        try:
+            for mode, paths in urls.items():
+                def fetch():
+                    total = 0
+                    for path in paths:
+                        response = client.get(path)
+                        assert response.status_code == 200
+                        total += len(response.data)
+                        response.close()
+                    return total
+
+                sizes[mode] = fetch()
+                stats = measure(fetch, repeat=options.repeat, number=5 if options.quick else 20)
+                results.append(result('sounds.fetch_all', stats, unit='s/load', mode=mode))
+        finally:
+            flask_app.config['ASSET_BUILD_DIR'] = original_dir
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    for mode in urls:
+        print(f"  {mode}: {len(urls[mode])} requests, {sizes[mode]} bytes, {decodes[mode]} decodes")
+    return results
+
+BENCHMARKS = {
+    'sounds': bench_sounds
+}
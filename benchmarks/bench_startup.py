@@ -0,0 +1,136 @@
+"""
+Startup benchmarks: how long until a process can answer its first request.
+
+Three measurements are taken, each in a fresh process:
+
+- startup.import_app: cold interpreter importing Flask, then the app, then
+  serving one request through the test client. Flask's own import time is
+  reported separately because it dominates and is outside our control.
+- startup.worker_ready: a parent that has already imported the app forks,
+  and the child serves its first request. This is what a pre-forked worker
+  pays and is held to the 100 ms target.
+- startup.listening: `python app.py --skip-port-check --no-browser` until the
+  port accepts connections and answers a request.
+"""
+
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+from .common import REPO_DIR
+from .harness import result, summarize
+
+TARGET_SECONDS = 0.100
+FIRST_REQUEST = '/api/levels/level-1'
+
+IMPORT_SCRIPT = f"""
+import contextlib, io, json, time
+start = time.perf_counter()
+import flask
+flask_done = time.perf_counter()
+import app
+app_done = time.perf_counter()
+with contextlib.redirect_stdout(io.StringIO()):
+    response = app.app.test_client().get({FIRST_REQUEST!r})
+assert response.status_code == 200
+ready = time.perf_counter()
+print(json.dumps({{'flask': flask_done - start, 'app': app_done - flask_done,
+                   'first_request': ready - app_done, 'total': ready - start}}))
+"""
+
+WORKER_SCRIPT = f"""
+import contextlib, io, os, time
+import app
+client = app.app.test_client()
+read_fd, write_fd = os.pipe()
+start = time.perf_counter()
+pid = os.fork()
+if pid == 0:
+    os.close(read_fd)
+    with contextlib.redirect_stdout(io.StringIO()):
+        response = client.get({FIRST_REQUEST!r})
+    os.write(write_fd, repr(time.perf_counter() if response.status_code == 200 else -1).encode())
+    os._exit(0)
+os.close(write_fd)
+ready = float(os.read(read_fd, 64).decode())
+os.waitpid(pid, 0)
+print(ready - start if ready > 0 else -1)
+"""
+
+def _run_python(script):
+    output = subprocess.check_output([sys.executable, '-c', script], cwd=REPO_DIR)
+    return output.decode().strip().splitlines()[-1]
+
+def bench_import(options):
+    samples = {'flask': [], 'app': [], 'first_request': [], 'total': []}
+    for _ in range(options.repeat):
+        timings = json.loads(_run_python(IMPORT_SCRIPT))
+        for key, value in timings.items():
+            samples[key].append(value)
+    
+    results = []
+    for phase, values in samples.items():
+        record = result('startup.import_app', summarize(values), unit='s', phase=phase)
+        if phase in ('app', 'first_request'):
+            record['target'] = TARGET_SECONDS
+        results.append(record)
+    return results
+
+def bench_worker_ready(options):
+    if not hasattr(os, 'fork'):
+        return []
+    samples = []
+    for _ in range(options.repeat):
+        value = float(_run_python(WORKER_SCRIPT))
+        if value < 0:
+            raise RuntimeError('Forked worker failed its first request')
+        samples.append(value)
+    record = result('startup.worker_ready', summarize(samples), unit='s')
+    record['target'] = TARGET_SECONDS
+    return [record]
+
+def bench_listening(options):
+    samples = []
+    for _ in range(options.repeat):
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+            s.bind(('127.0.0.1', 0))
+            port = s.getsockname()[1]
+        
+        start = time.perf_counter()
+        process = subprocess.Popen(
+            [sys.executable, 'app.py', '--port', str(port), '--skip-port-check', '--no-browser'],
+            cwd=REPO_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        try:
+            while True:
+                if process.poll() is not None:
+                    raise RuntimeError('Server exited during startup')
+                try:
+                    with urllib.request.urlopen(f"http://127.0.0.1:{port}{FIRST_REQUEST}", timeout=1) as response:
+                        response.read()
+                    break
+                except OSError:
+                    time.sleep(0.005)
+            samples.append(time.perf_counter() - start)
+        finally:
+            process.terminate()
+            process.wait(timeout=10)
+    return [result('startup.listening', summarize(samples), unit='s')]
+
+def bench_startup(options):
+    """All startup measurements, with a pass/fail line against the target"""
+    results = bench_import(options) + bench_worker_ready(options) + bench_listening(options)
+    for record in results:
+        if 'target' in record:
+            status = 'OK ' if record['median'] <= record['target'] else 'SLOW'
+            print(f"  [{status}] {record['name']} {record['params'] or ''} "
+                  f"median {record['median'] * 1e3:.1f} ms (target {record['target'] * 1e3:.0f} ms)")
+    return results
+
+BENCHMARKS = {
+    'startup': bench_startup
+}
@@ -0,0 +1,50 @@
+"""
+Vectorized ball physics benchmark
+
+Times GameEngine.update with 1, 10, 100 and 1,000 balls in play on the
+level with the most bricks, once on the scalar path and once on the NumPy
+path (utils/vector_physics.py). The NumPy rows are skipped when NumPy
+isn't installed.
+"""
+
+from .common import level_files, make_engine, quiet, tick
+from .harness import measure, result
+
+BALL_COUNTS = [1, 10, 100, 1000]
+TICKS_PER_SAMPLE = 20
+
+def bench_vector_physics(options):
+    from utils import vector_physics
+
+    name, level_data = max(level_files(), key=lambda item: len(item[1].get('bricks', [])))
+    counts = BALL_COUNTS[:3] if options.quick else BALL_COUNTS
+    paths = [('scalar', 0)]
+    if vector_physics.available():
+        paths.append(('numpy', 1))
+    else:
+        print("  NumPy is not installed; timing the scalar path only")
+
+    results = []
+    for ball_count in counts:
+        for path, vector_balls in paths:
+            def setup():
+                return make_engine(level_data, ball_count, settings={'VECTOR_BALLS': vector_balls})
+
+            def run(engine):
+                with quiet():
+                    tick(engine, TICKS_PER_SAMPLE)
+
+            stats = measure(run, repeat=options.repeat, setup=setup)
+            results.append(result('vector_physics.update', _per_tick(stats), unit='s/tick',
+                                  path=path, balls=ball_count, level=name))
+    return results
+
+def _per_tick(stats):
+    scaled = {key: value / TICKS_PER_SAMPLE for key, value in stats.items() if key not in ('samples', 'ops_per_sec')}
+    scaled['samples'] = stats['samples']
+    scaled['ops_per_sec'] = stats['ops_per_sec'] * TICKS_PER_SAMPLE
+    return scaled
+
+BENCHMARKS = {
+    'vector_physics': bench_vector_physics
+}
@@ -0,0 +1,104 @@
+"""
+Shared fixtures for the benchmark suites
+
+Helpers here build engines and level directories without the debug
+output the game prints while loading levels.
+"""
+
+import contextlib
+import io
+import json
+import os
+import random
+import shutil
+import tempfile
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LEVELS_DIR = os.path.join(REPO_DIR, 'levels')
+
+GAME_SETTINGS = {
+    'SCREEN_WIDTH': 800,
+    'SCREEN_HEIGHT': 600,
+    'FPS': 60,
+    'LEVELS_DIR': LEVELS_DIR
+}
+
+@contextlib.contextmanager
+def quiet():
+    """Silence stdout (level loading prints per-brick debug lines)"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+def level_files(levels_dir=LEVELS_DIR):
+    """Return sorted (file name, parsed level data) pairs for a levels directory"""
+    files = []
+    for name in sorted(os.listdir(levels_dir)):
+        if name.endswith('.json'):
+            with open(os.path.join(levels_dir, name), 'r') as f:
+                files.append((name, json.load(f)))
+    return files
+
+def make_engine(level_data=None, ball_count=1, seed=0, settings=None):
+    """
+    Build a GameEngine on the given level with a number of launched balls
+    
+    Args:
+        level_data: Parsed level dictionary (defaults to level 1 from disk)
+        ball_count: Number of active balls to put in play
+        seed: Seed for ball placement and the engine's own randomness
+        settings: Extra engine configuration (e.g. HISTORY_TICKS)
+        
+    Returns:
+        A ready-to-tick GameEngine
+    """
+    from utils.game_engine import GameEngine
+    
+    random.seed(seed)
+    with quiet():
+        engine = GameEngine({**GAME_SETTINGS, 'SEED': seed, **(settings or {})})
+        if level_data is not None:
+            engine.bricks.clear()
+            engine.load_level_data(level_data)
+    
+    engine.balls.clear()
+    for i in range(ball_count):
+        ball = engine.balls.spawn(engine.screen_width, engine.screen_height)
+        ball.x = (i * 97) % (engine.screen_width - ball.size)
+        ball.y = engine.screen_height - 120 - (i * 13) % 200
+        ball.active = True
+    return engine
+
+def tick(engine, ticks, dt=1 / 60):
+    """Advance an engine by a number of ticks with the paddle tracking the first ball"""
+    for _ in range(ticks):
+        target = engine.balls[0].x if engine.balls else engine.screen_width // 2
+        engine.update(dt, {'mouse_x': target})
+
+@contextlib.contextmanager
+def scratch_levels_dir(count, seed=0):
+    """
+    Create a temporary levels directory holding a number of generated levels
+    
+    Args:
+        count: Number of level files to write
+        seed: Seed for level generation
+        
+    Yields:
+        Path to the temporary directory
+    """
+    from utils.level_loader import generate_level
+    
+    random.seed(seed)
+    directory = tempfile.mkdtemp(prefix='bb-levels-')
+    try:
+        # Reuse a small pool of generated layouts so large directories are cheap to build
+        pool = [generate_level(n) for n in range(1, 11)]
+        for i in range(count):
+            level_data = dict(pool[i % len(pool)])
+            level_data['id'] = f"level-{i + 1}"
+            level_data['name'] = f"Level {i + 1}"
+            with open(os.path.join(directory, f"level-{i + 1}.json"), 'w') as f:
+                json.dump(level_data, f)
+        yield directory
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
@@ -0,0 +1,180 @@
+"""
+Benchmark harness for Brick Breaker
+
+This module provides the timing helpers, result format and baseline
+comparison used by the benchmark suites in this package.
+"""
+
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+RESULTS_VERSION = 1
+
+def measure(func, repeat=5, number=1, setup=None, seed=0):
+    """
+    Time a callable and summarize the samples
+    
+    Args:
+        func: Callable to time. Receives the value returned by setup (if any)
+        repeat: Number of timed samples to take
+        number: Number of calls per sample
+        setup: Optional callable run (untimed) before every sample
+        seed: Seed applied to the random module before every sample
+        
+    Returns:
+        Dictionary with per-call timings in seconds and ops/sec
+    """
+    samples = []
+    for _ in range(repeat):
+        random.seed(seed)
+        arg = setup() if setup else None
+        start = time.perf_counter()
+        for _ in range(number):
+            if setup:
+                func(arg)
+            else:
+                func()
+        samples.append((time.perf_counter() - start) / number)
+    
+    return summarize(samples)
+
+def summarize(samples):
+    """Build the standard statistics dictionary from per-call samples (seconds)"""
+    ordered = sorted(samples)
+    median = statistics.median(ordered)
+    p95_index = min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))
+    return {
+        'samples': len(ordered),
+        'min': ordered[0],
+        'median': median,
+        'mean': statistics.fmean(ordered),
+        'p95': ordered[p95_index],
+        'stdev': statistics.stdev(ordered) if len(ordered) > 1 else 0.0,
+        'ops_per_sec': (1.0 / median) if median > 0 else float('inf')
+    }
+
+def percentile(ordered, q):
+    """Return the q-th percentile (0-100) of an already sorted list using linear interpolation"""
+    if not ordered:
+        return 0.0
+    position = (len(ordered) - 1) * q / 100.0
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+def result(name, stats, unit='s/op', **params):
+    """Create a single benchmark result record"""
+    record = {'name': name, 'unit': unit, 'params': params}
+    record.update(stats)
+    return record
+
+def environment_info():
+    """Describe the machine and revision the benchmarks ran on"""
+    try:
+        revision = subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            stderr=subprocess.DEVNULL,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        ).decode().strip()
+    except Exception:
+        revision = None
+    
+    return {
+        'python': sys.version.split()[0],
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'git_revision': revision,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S')
+    }
+
+def write_results(results, path):
+    """Write benchmark results to a JSON file"""
+    directory = os.path.dirname(path)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory)
+    
+    payload = {
+        'version': RESULTS_VERSION,
+        'environment': environment_info(),
+        'results': results
+    }
+    with open(path, 'w') as f:
+        json.dump(payload, f, indent=2)
+    return payload
+
+def load_results(path):
+    """Load a results file written by write_results"""
+    with open(path, 'r') as f:
+        payload = json.load(f)
+    if payload.get('version') != RESULTS_VERSION:
+        raise ValueError(f"Unsupported results version in {path}: {payload.get('version')}")
+    return payload
+
+def result_key(record):
+    """Stable identifier for a result (name plus sorted parameters)"""
+    params = ','.join(f"{k}={record['params'][k]}" for k in sorted(record.get('params', {})))
+    return f"{record['name']}[{params}]" if params else record['name']
+
+def compare_results(current, baseline, threshold=0.10):
+    """
+    Compare two sets of results by median time per operation
+    
+    Args:
+        current: List of result records from this run
+        baseline: List of result records from a saved baseline
+        threshold: Relative slowdown that counts as a regression (0.10 = 10%)
+        
+    Returns:
+        List of comparison dictionaries, one per benchmark present in both runs
+    """
+    baseline_by_key = {result_key(r): r for r in baseline}
+    comparisons = []
+    
+    for record in current:
+        key = result_key(record)
+        base = baseline_by_key.get(key)
+        if base is None or not base.get('median'):
+            continue
+        
+        ratio = record['median'] / base['median']
+        if ratio > 1 + threshold:
+            status = 'regression'
+        elif ratio < 1 - threshold:
+            status = 'improvement'
+        else:
+            status = 'unchanged'
+        
+        comparisons.append({
+            'key': key,
+            'unit': record['unit'],
+            'baseline': base['median'],
+            'current': record['median'],
+            'ratio': ratio,
+            'status': status
+        })
+    
+    return comparisons
+
+def format_value(value, unit):
+    """Format a result's median for display according to its unit"""
+    if unit.startswith('s'):
+        return format_seconds(value)
+    if unit == 'bytes':
+        return f"{value / 1024:.1f} KiB"
+    return f"{value:.3g}"
+
+def format_seconds(value):
+    """Format a duration with a readable unit"""
+    if value >= 1:
+        return f"{value:.3f} s"
+    if value >= 1e-3:
+        return f"{value * 1e3:.3f} ms"
+    return f"{value * 1e6:.1f} us"
@@ -0,0 +1,383 @@
+"""
+Local multi-client load test for Brick Breaker
+
+Simulates N players following the same request flow as static/js/game.js:
+
+    1. load the game page and its scripts/stylesheets (unless --no-assets)
+    2. GET  /api/levels                      (level list)
+    3. GET  /api/levels/level-N              (level data)
+    4. play for a while (client-side, modelled as think time)
+    5. POST /api/levels/advance              then GET /api/levels/level-N+1
+    6. POST /api/highscores                  when the run ends, then start over
+
+By default a server is started locally on a scratch copy of levels/ so the
+test never writes into the repository. Point --url at an already running
+server to skip that. All local clients share one address, so the local
+server runs with rate limiting off unless --rate-limit is given.
+
+--abusers N adds clients that hammer the expensive endpoints (level list,
+previews and unknown levels, which are generated) without pausing, each
+from an address of its own when the server is local. Their
+requests are reported under 'abuse ...', apart from the players', so the
+players' latencies show whether admission control keeps the game
+responsive. It implies --rate-limit.
+
+Usage:
+    python -m benchmarks.load_test --clients 50 --duration 60 --ramp 10
+    python -m benchmarks.load_test --url http://127.0.0.1:5000 --clients 20
+    python -m benchmarks.load_test --clients 20 --abusers 5
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+
+from .common import LEVELS_DIR, REPO_DIR
+from .harness import percentile
+
+# Assets requested by templates/game.html
+GAME_ASSETS = [
+    '/static/css/main.css',
+    '/static/css/game.css',
+    '/static/js/game_objects.js',
+    '/static/js/game_renderer.js',
+    '/static/js/game_controls.js',
+    '/static/js/game_state.js',
+    '/static/js/sound_manager.js',
+    '/static/js/game.js'
+]
+
+class Stats:
+    """Thread-safe per-endpoint latency and error accounting"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = {}
+        self.errors = {}
+        self.bytes = {}
+
+    def record(self, endpoint, latency, ok, size=0):
+        with self.lock:
+            self.latencies.setdefault(endpoint, []).append(latency)
+            self.bytes[endpoint] = self.bytes.get(endpoint, 0) + size
+            if not ok:
+                self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+    def report(self, elapsed):
+        """Summarize everything recorded so far"""
+        with self.lock:
+            endpoints = {}
+            all_latencies = []
+            total_errors = 0
+            for endpoint, latencies in sorted(self.latencies.items()):
+                ordered = sorted(latencies)
+                all_latencies.extend(ordered)
+                errors = self.errors.get(endpoint, 0)
+                total_errors += errors
+                endpoints[endpoint] = _summarize(ordered, errors, elapsed)
+                endpoints[endpoint]['bytes'] = self.bytes.get(endpoint, 0)
+
+            overall = _summarize(sorted(all_latencies), total_errors, elapsed)
+        return {'elapsed': elapsed, 'overall': overall, 'endpoints': endpoints}
+
+def _summarize(ordered, errors, elapsed):
+    count = len(ordered)
+    return {
+        'requests': count,
+        'errors': errors,
+        'error_rate': (errors / count) if count else 0.0,
+        'throughput': (count / elapsed) if elapsed else 0.0,
+        'p50': percentile(ordered, 50),
+        'p90': percentile(ordered, 90),
+        'p99': percentile(ordered, 99),
+        'max': ordered[-1] if ordered else 0.0
+    }
+
+class SimulatedClient(threading.Thread):
+    """One simulated player running the game.js request flow until told to stop"""
+
+    def __init__(self, client_id, options, stats, stop_event):
+        super().__init__(daemon=True)
+        self.client_id = client_id
+        self.options = options
+        self.stats = stats
+        self.stop_event = stop_event
+        self.random = random.Random(options.seed + client_id)
+
+        parsed = urllib.parse.urlparse(options.url)
+        self.host = parsed.hostname
+        self.port = parsed.port or 80
+        self.cookies = {}
+        self.source_address = None
+
+    def request(self, method, path, endpoint, body=None):
+        """Issue a request and record its latency under an endpoint label"""
+        headers = {'Connection': 'close'}
+        payload = None
+        if body is not None:
+            payload = json.dumps(body).encode()
+            headers['Content-Type'] = 'application/json'
+        if self.cookies:
+            headers['Cookie'] = '; '.join(f"{k}={v}" for k, v in self.cookies.items())
+
+        start = time.perf_counter()
+        ok = False
+        size = 0
+        data = None
+        try:
+            conn = http.client.HTTPConnection(self.host, self.port, timeout=self.options.timeout,
+                                              source_address=self.source_address)
+            try:
+                conn.request(method, path, body=payload, headers=headers)
+                response = conn.getresponse()
+                data = response.read()
+                size = len(data)
+                ok = response.status < 400
+                self._store_cookies(response)
+            finally:
+                conn.close()
+        except (OSError, http.client.HTTPException):
+            ok = False
+
+        self.stats.record(f"{method} {endpoint}", time.perf_counter() - start, ok, size)
+        return data if ok else None
+
+    def _store_cookies(self, response):
+        for header in response.headers.get_all('Set-Cookie') or []:
+            name, _, rest = header.partition('=')
+            self.cookies[name.strip()] = rest.split(';', 1)[0]
+
+    def think(self, seconds):
+        """Sleep for a jittered think time; returns False if the test is stopping"""
+        if seconds <= 0:
+            return not self.stop_event.is_set()
+        jittered = seconds * self.random.uniform(0.5, 1.5)
+        return not self.stop_event.wait(jittered)
+
+    def run(self):
+        while not self.stop_event.is_set():
+            self.play_session()
+
+    def play_session(self):
+        """Play from level 1 until the simulated run ends"""
+        options = self.options
+
+        if not options.no_assets:
+            self.request('GET', '/game', '/game')
+            for asset in GAME_ASSETS:
+                self.request('GET', asset, '/static/<path>')
+
+        self.request('GET', '/api/levels', '/api/levels')
+
+        level = 1
+        self.request('GET', f'/api/levels/level-{level}', '/api/levels/<level_id>')
+
+        while not self.stop_event.is_set():
+            if not self.think(options.play_time):
+                return
+
+            # Some plays end in a restart of the same level (restart button)
+            if self.random.random() < options.restart_chance:
+                self.request('GET', f'/api/levels/level-{level}', '/api/levels/<level_id>')
+                continue
+
+            # The run ends after max-level or a game over
+            if level >= options.max_level or self.random.random() < options.game_over_chance:
+                break
+
+            self.request('POST', '/api/levels/advance', '/api/levels/advance')
+            level += 1
+            self.request('GET', f'/api/levels/level-{level}', '/api/levels/<level_id>')
+
+        self.request('POST', '/api/highscores', '/api/highscores', body={
+            'name': f"P{self.client_id:03d}",
+            'score': self.random.randint(100, 10000),
+            'level': level
+        })
+        self.think(options.think_time)
+
+class AbusiveClient(SimulatedClient):
+    """A client requesting expensive endpoints back to back, as fast as it is answered"""
+
+    def __init__(self, client_id, options, stats, stop_event, abuser_id):
+        super().__init__(client_id, options, stats, stop_event)
+        # Against a local server, connect from an address of its own, as a
+        # remote abuser would, so it isn't rate limited together with the players
+        if self.host == '127.0.0.1':
+            self.source_address = (f"127.0.1.{abuser_id % 254 + 1}", 0)
+
+    def run(self):
+        while not self.stop_event.is_set():
+            choice = self.random.random()
+            if choice < 0.4:
+                self.request('GET', '/api/levels', 'abuse /api/levels')
+            elif choice < 0.8:
+                level = self.random.randint(1, self.options.max_level)
+                self.request('GET', f'/api/level_preview/level-{level}', 'abuse /api/level_preview/<level_id>')
+            else:
+                # Unknown levels are generated and written
+                level_id = f"level-{self.random.randint(1000, 9999)}"
+                self.request('GET', f'/api/levels/{level_id}', 'abuse /api/levels/<unknown>')
+
+def start_local_server(port, rate_limit=False):
+    """
+    Start the app in a child process on a scratch copy of the level data
+
+    Returns:
+        (process, scratch directory)
+    """
+    scratch = tempfile.mkdtemp(prefix='bb-load-')
+    shutil.copytree(LEVELS_DIR, os.path.join(scratch, 'levels'))
+
+    env = dict(os.environ)
+    env['BRICK_BREAKER_LEVELS_DIR'] = os.path.join(scratch, 'levels')
+    env['BRICK_BREAKER_HIGH_SCORES'] = os.path.join(scratch, 'high_scores.json')
+    if not rate_limit:
+        env['BRICK_BREAKER_RATE_LIMIT'] = '0'
+
+    process = subprocess.Popen(
+        [sys.executable, 'app.py', '--port', str(port), '--skip-port-check', '--no-browser'],
+        cwd=REPO_DIR, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+    # Wait for the server to accept connections
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError('Local server exited during startup')
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                return process, scratch
+        except OSError:
+            time.sleep(0.05)
+
+    process.kill()
+    raise RuntimeError(f"Local server did not start on port {port}")
+
+def free_port():
+    """Pick an unused local TCP port"""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def run_load_test(options):
+    """Run the configured load test and return the report dictionary"""
+    stats = Stats()
+    stop_event = threading.Event()
+    clients = []
+
+    start = time.perf_counter()
+    deadline = start + options.duration
+
+    # Ramp clients in evenly over the ramp period
+    for client_id in range(options.clients):
+        if options.ramp > 0 and options.clients > 1:
+            target = start + options.ramp * client_id / (options.clients - 1)
+            delay = target - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        client = SimulatedClient(client_id, options, stats, stop_event)
+        client.start()
+        clients.append(client)
+
+    for abuser_id in range(options.abusers):
+        abuser = AbusiveClient(options.clients + abuser_id, options, stats, stop_event, abuser_id)
+        abuser.start()
+        clients.append(abuser)
+
+    remaining = deadline - time.perf_counter()
+    if remaining > 0:
+        time.sleep(remaining)
+
+    stop_event.set()
+    for client in clients:
+        client.join(timeout=options.timeout + 1)
+
+    report = stats.report(time.perf_counter() - start)
+    report['config'] = {
+        'clients': options.clients,
+        'abusers': options.abusers,
+        'duration': options.duration,
+        'ramp': options.ramp,
+        'play_time': options.play_time,
+        'think_time': options.think_time,
+        'max_level': options.max_level,
+        'assets': not options.no_assets,
+        'url': options.url
+    }
+    return report
+
+def print_report(report):
+    overall = report['overall']
+    print(f"\n{report['config']['clients']} clients over {report['elapsed']:.1f} s: "
+          f"{overall['requests']} requests, {overall['throughput']:.1f} req/s, "
+          f"{overall['error_rate']:.2%} errors")
+    print(f"\n{'endpoint':34s} {'reqs':>7s} {'req/s':>8s} {'err%':>7s} "
+          f"{'p50 ms':>8s} {'p90 ms':>8s} {'p99 ms':>8s} {'max ms':>8s}")
+    rows = list(report['endpoints'].items()) + [('TOTAL', overall)]
+    for endpoint, row in rows:
+        print(f"{endpoint:34s} {row['requests']:7d} {row['throughput']:8.1f} {row['error_rate'] * 100:6.2f}% "
+              f"{row['p50'] * 1e3:8.1f} {row['p90'] * 1e3:8.1f} {row['p99'] * 1e3:8.1f} {row['max'] * 1e3:8.1f}")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Simulate concurrent Brick Breaker players')
+    parser.add_argument('--clients', type=int, default=10, help='Number of simulated players')
+    parser.add_argument('--duration', type=float, default=30, help='Test length in seconds (including ramp)')
+    parser.add_argument('--ramp', type=float, default=5, help='Seconds over which clients are started')
+    parser.add_argument('--play-time', type=float, default=2.0, help='Mean seconds spent playing each level')
+    parser.add_argument('--think-time', type=float, default=1.0, help='Mean pause between runs')
+    parser.add_argument('--max-level', type=int, default=5, help='Level at which a run ends')
+    parser.add_argument('--restart-chance', type=float, default=0.2, help='Chance a play ends in a restart')
+    parser.add_argument('--game-over-chance', type=float, default=0.2, help='Chance a play ends the run')
+    parser.add_argument('--no-assets', action='store_true', help='Skip page and static asset requests')
+    parser.add_argument('--timeout', type=float, default=10, help='Per-request timeout in seconds')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for client behaviour')
+    parser.add_argument('--url', help='Use an already running server instead of starting one')
+    parser.add_argument('--port', type=int, default=0, help='Port for the local server (default: any free port)')
+    parser.add_argument('--abusers', type=int, default=0, help='Clients hammering expensive endpoints')
+    parser.add_argument('--rate-limit', action='store_true', help='Keep rate limiting on in the local server')
+    parser.add_argument('--output', help='Write the JSON report to this file')
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    options = parse_args(argv)
+
+    process = scratch = None
+    if not options.url:
+        port = options.port or free_port()
+        print(f"Starting local server on port {port}...")
+        process, scratch = start_local_server(port, rate_limit=options.rate_limit or options.abusers > 0)
+        options.url = f"http://127.0.0.1:{port}"
+
+    try:
+        print(f"Running {options.clients} clients against {options.url} for {options.duration:.0f} s")
+        report = run_load_test(options)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=10)
+        if scratch is not None:
+            shutil.rmtree(scratch, ignore_errors=True)
+
+    print_report(report)
+
+    if options.output:
+        with open(options.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {options.output}")
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,96 @@
+"""
+Run the Brick Breaker benchmark suite
+
+Usage:
+    python -m benchmarks.run                          # run everything
+    python -m benchmarks.run --only engine api        # run selected groups
+    python -m benchmarks.run --output base.json       # save a baseline
+    python -m benchmarks.run --compare base.json      # flag regressions
+
+Exits with status 1 when --compare finds a regression.
+"""
+
+import argparse
+import os
+import sys
+
+# The suite drives the app far faster than any one client would, so the app
+# (and the servers it starts, which inherit the environment) runs without
+# admission control (utils/rate_limit.py)
+os.environ.setdefault('BRICK_BREAKER_RATE_LIMIT', '0')
+os.environ.setdefault('BRICK_BREAKER_EXPENSIVE_CONCURRENCY', '0')
+
+from . import bench_batch, bench_core, bench_gc, bench_inputs, bench_level_pack, bench_logging, bench_memory, bench_prefetch, bench_profiler, bench_rollback, bench_scaling, bench_scheduler, bench_shared_levels, bench_snapshot, bench_sounds, bench_startup, bench_vector
+from .harness import compare_results, format_value, load_results, result_key, write_results
+
+DEFAULT_OUTPUT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results', 'latest.json')
+
+def all_benchmarks():
+    """Return every registered benchmark group, keyed by name"""
+    groups = {}
+    groups.update(bench_batch.BENCHMARKS)
+    groups.update(bench_core.BENCHMARKS)
+    groups.update(bench_gc.BENCHMARKS)
+    groups.update(bench_inputs.BENCHMARKS)
+    groups.update(bench_level_pack.BENCHMARKS)
+    groups.update(bench_logging.BENCHMARKS)
+    groups.update(bench_memory.BENCHMARKS)
+    groups.update(bench_prefetch.BENCHMARKS)
+    groups.update(bench_profiler.BENCHMARKS)
+    groups.update(bench_rollback.BENCHMARKS)
+    groups.update(bench_scaling.BENCHMARKS)
+    groups.update(bench_scheduler.BENCHMARKS)
+    groups.update(bench_shared_levels.BENCHMARKS)
+    groups.update(bench_snapshot.BENCHMARKS)
+    groups.update(bench_sounds.BENCHMARKS)
+    groups.update(bench_startup.BENCHMARKS)
+    groups.update(bench_vector.BENCHMARKS)
+    return groups
+
+def parse_args(argv=None):
+    groups = all_benchmarks()
+    parser = argparse.ArgumentParser(description='Run the Brick Breaker benchmark suite')
+    parser.add_argument('--only', nargs='+', choices=sorted(groups), help='Benchmark groups to run')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed samples per benchmark')
+    parser.add_argument('--quick', action='store_true', help='Smaller inputs for a fast smoke run')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help='Where to write the JSON results')
+    parser.add_argument('--compare', metavar='BASELINE', help='Compare against a saved results file')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='Relative slowdown counted as a regression (default 0.10)')
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    options = parse_args(argv)
+    groups = all_benchmarks()
+    selected = options.only or sorted(groups)
+    
+    results = []
+    for name in selected:
+        print(f"Running {name} benchmarks...")
+        for record in groups[name](options):
+            results.append(record)
+            print(f"  {result_key(record):70s} {format_value(record['median'], record['unit']):>12s}  ({record['unit']})")
+    
+    write_results(results, options.output)
+    print(f"\nResults written to {options.output}")
+    
+    if options.compare:
+        baseline = load_results(options.compare)['results']
+        comparisons = compare_results(results, baseline, options.threshold)
+        regressions = [c for c in comparisons if c['status'] == 'regression']
+        
+        print(f"\nComparison against {options.compare} (threshold {options.threshold:.0%}):")
+        for c in comparisons:
+            marker = {'regression': '!!', 'improvement': '++'}.get(c['status'], '  ')
+            print(f"  {marker} {c['key']:70s} {format_value(c['baseline'], c['unit']):>12s} -> "
+                  f"{format_value(c['current'], c['unit']):>12s}  x{c['ratio']:.2f}")
+        
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) found")
+            return 1
+        print("\nNo regressions found")
+    
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,59 @@
+"""
+Build fingerprinted, precompressed static assets
+
+Usage:
+    python build_assets.py
+    python build_assets.py --static-dir static --output-dir static/dist
+    python build_assets.py --no-sprite
+
+First packs static/sounds/*.mp3 into one audio sprite (sounds/sprite.mp3
+and sprite.json; see utils/audio_sprite.py). Then copies every file under the static directory to the output directory
+under a content-hashed name, writes .gz (and, with the brotli package
+installed, .br) copies of text assets and a manifest.json. The app then
+serves the hashed files from /assets/ with immutable caching; see
+utils/assets.py. Run it again after changing any asset.
+"""
+
+import argparse
+import os
+import sys
+
+from utils import assets, audio_sprite
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Build fingerprinted, precompressed static assets')
+    parser.add_argument('--static-dir', default=os.path.join(BASE_DIR, 'static'), help='Source asset directory')
+    parser.add_argument('--output-dir',
+                        default=os.environ.get('BRICK_BREAKER_ASSET_DIR', os.path.join(BASE_DIR, 'static', 'dist')),
+                        help='Build directory the app serves from (ASSET_BUILD_DIR)')
+    parser.add_argument('--no-sprite', action='store_true', help="Don't pack the sounds into an audio sprite")
+    args = parser.parse_args(argv)
+
+    sound_dir = os.path.join(args.static_dir, 'sounds')
+    if not args.no_sprite and os.path.isdir(sound_dir):
+        sprite = audio_sprite.build_sprite(sound_dir)
+        sounds = sum(len(segment['sounds']) for segment in sprite['segments'])
+        print(f"Packed {sounds} sounds into sounds/{sprite['file']} ({len(sprite['segments'])} segments to decode)")
+
+    manifest = assets.build_assets(args.static_dir, args.output_dir)
+    raw_total = compressed_total = 0
+    for path, hashed in sorted(manifest.items()):
+        target = os.path.join(args.output_dir, hashed)
+        size = os.path.getsize(target)
+        smallest = size
+        for _, suffix in assets.ENCODINGS:
+            if os.path.exists(target + suffix):
+                smallest = min(smallest, os.path.getsize(target + suffix))
+        raw_total += size
+        compressed_total += smallest
+        print(f"{path} -> {hashed} ({size} bytes" + (f", {smallest} compressed)" if smallest < size else ")"))
+
+    if assets.brotli is None:
+        print("brotli is not installed; wrote gzip copies only")
+    print(f"{len(manifest)} assets, {raw_total} bytes -> {compressed_total} bytes over the wire")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,3 +1,7 @@
+import os
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
 class Config:
     """Base configuration"""
     DEBUG = False
@@ -7,6 +11,42 @@ class Config:
         'SCREEN_HEIGHT': 600,
         'FPS': 60
     }
+    # Data locations (overridable so benchmarks and load tests can use scratch copies)
+    LEVELS_DIR = os.environ.get('BRICK_BREAKER_LEVELS_DIR', os.path.join(BASE_DIR, 'levels'))
+    HIGH_SCORES_FILE = os.environ.get('BRICK_BREAKER_HIGH_SCORES', os.path.join(BASE_DIR, 'high_scores.json'))
+    # Optional level pack (see utils/level_pack.py) served alongside LEVELS_DIR
+    LEVEL_PACK = os.environ.get('BRICK_BREAKER_LEVEL_PACK')
+    # Idle sessions are snapshotted here after HIBERNATE_AFTER seconds without a
+    # request (and beyond MAX_LIVE_SESSIONS live engines), then restored on demand
+    HIBERNATE_DIR = os.environ.get('BRICK_BREAKER_HIBERNATE_DIR', os.path.join(BASE_DIR, 'sessions'))
+    HIBERNATE_AFTER = float(os.environ.get('BRICK_BREAKER_HIBERNATE_AFTER', 300))
+    MAX_LIVE_SESSIONS = int(os.environ['BRICK_BREAKER_MAX_LIVE_SESSIONS']) if os.environ.get('BRICK_BREAKER_MAX_LIVE_SESSIONS') else None
+    # Ticks of state kept per engine so late inputs can be rolled back (0 disables)
+    HISTORY_TICKS = int(os.environ.get('BRICK_BREAKER_HISTORY_TICKS', 0))
+    # Fingerprinted, precompressed static assets written by build_assets.py (see utils/assets.py)
+    ASSET_BUILD_DIR = os.environ.get('BRICK_BREAKER_ASSET_DIR', os.path.join(BASE_DIR, 'static', 'dist'))
+    # Log level and format ('text' key=value lines or 'json' lines); see utils/log.py
+    LOG_LEVEL = os.environ.get('BRICK_BREAKER_LOG_LEVEL', 'INFO').upper()
+    LOG_FORMAT = os.environ.get('BRICK_BREAKER_LOG_FORMAT', 'text')
+    # Start preparing a session's next level once this many bricks or fewer are left (see utils/level_prefetch.py)
+    PREFETCH_BRICKS = int(os.environ.get('BRICK_BREAKER_PREFETCH_BRICKS', 5))
+    # Seconds between memory reports sampled into /admin/metrics (0 disables); see utils/memory.py
+    MEMORY_SAMPLE_INTERVAL = float(os.environ.get('BRICK_BREAKER_MEMORY_SAMPLE_INTERVAL', 60))
+    # Requests per second and burst allowed per client, by route class (see utils/rate_limit.py);
+    # 'game' covers one input request per frame at 60 fps plus level loads.
+    # BRICK_BREAKER_RATE_LIMIT=0 turns rate limiting off
+    RATE_LIMITS = {
+        'game': (120, 240),
+        'editor': (10, 40),
+        'default': (20, 40),
+        'expensive': (1, 5)
+    } if os.environ.get('BRICK_BREAKER_RATE_LIMIT', '1') != '0' else {}
+    # Expensive operations (level list, previews, generating levels) allowed to run at once (0 = no cap)
+    EXPENSIVE_CONCURRENCY = int(os.environ.get('BRICK_BREAKER_EXPENSIVE_CONCURRENCY', 2))
+    # Expensive operations allowed to wait (up to half a second) for a slot before 429s
+    EXPENSIVE_QUEUE = int(os.environ.get('BRICK_BREAKER_EXPENSIVE_QUEUE', 8))
+    # Step balls with NumPy (if installed) once this many are in play (0 disables)
+    VECTOR_BALLS = int(os.environ.get('BRICK_BREAKER_VECTOR_BALLS', 10))
 
 class DevelopmentConfig(Config):
     """Development configuration"""
@@ -14,4 +54,4 @@ class DevelopmentConfig(Config):
 
 class ProductionConfig(Config):
     """Production configuration"""
-    DEBUG = False
\ No newline at end of file
+    DEBUG = False
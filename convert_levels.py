@@ -0,0 +1,96 @@
+"""
+Convert levels between JSON, the compact grid format and level packs
+
+Usage:
+    python convert_levels.py to-grid levels/level-3.json [...]
+    python convert_levels.py to-json levels/level-3.grid [...]
+    python convert_levels.py check levels/*.json
+    python convert_levels.py pack levels levels.pack
+    python convert_levels.py unpack levels.pack --output-dir levels [--grid]
+
+'check' encodes each JSON level, decodes it again and verifies the result
+plays identically, printing the size reduction. 'pack' writes every level
+in a directory into one level pack; 'unpack' writes a pack's levels back
+out as individual files.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+from utils import level_codec, level_pack
+
+def _convert(path, target, output_dir=None):
+    with open(path, 'rb') as f:
+        data = f.read()
+    base = os.path.splitext(os.path.basename(path))[0]
+    directory = output_dir or os.path.dirname(path)
+
+    if target == 'grid':
+        encoded = level_codec.encode_level(json.loads(data.decode('utf-8')))
+        out_path = os.path.join(directory, base + level_codec.EXTENSION)
+        with open(out_path, 'wb') as f:
+            f.write(encoded)
+        print(f"{path}: {len(data)} -> {len(encoded)} bytes ({len(data) / len(encoded):.1f}x) -> {out_path}")
+    else:
+        decoded = level_codec.decode_level(data)
+        out_path = os.path.join(directory, base + '.json')
+        with open(out_path, 'w') as f:
+            json.dump(decoded, f, indent=2)
+        print(f"{path} -> {out_path}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Convert levels between JSON, the compact grid format and level packs')
+    parser.add_argument('command', choices=['to-grid', 'to-json', 'check', 'pack', 'unpack'],
+                        help='to-grid/to-json convert files; check verifies JSON files round-trip; '
+                             'pack/unpack build or extract a level pack')
+    parser.add_argument('files', nargs='+',
+                        help='Level files (pack: levels directory and pack path; unpack: pack path)')
+    parser.add_argument('--output-dir', help='Write converted files here instead of next to the source')
+    parser.add_argument('--grid', action='store_true', help='unpack: write .grid files instead of JSON')
+    args = parser.parse_args(argv)
+
+    if args.command == 'pack':
+        if len(args.files) != 2:
+            parser.error('pack takes a levels directory and a pack path')
+        levels_dir, pack_path = args.files
+        count = level_pack.export_pack(levels_dir, pack_path)
+        print(f"Packed {count} levels from {levels_dir} into {pack_path} ({os.path.getsize(pack_path)} bytes)")
+        return 0
+
+    if args.command == 'unpack':
+        failures = 0
+        for pack_path in args.files:
+            output_dir = args.output_dir or os.path.dirname(pack_path) or '.'
+            extension = level_codec.EXTENSION if args.grid else '.json'
+            try:
+                count = level_pack.import_pack(pack_path, output_dir, extension)
+                print(f"Unpacked {count} levels from {pack_path} into {output_dir}")
+            except (OSError, ValueError) as e:
+                print(f"FAIL {pack_path}: {e}")
+                failures += 1
+        return 1 if failures else 0
+
+    failures = 0
+    for path in args.files:
+        try:
+            if args.command == 'check':
+                with open(path, 'r') as f:
+                    level_data = json.load(f)
+                encoded = level_codec.encode_level(level_data)
+                ok = level_codec.normalized_level(level_codec.decode_level(encoded)) == level_codec.normalized_level(level_data)
+                size = os.path.getsize(path)
+                print(f"{'OK  ' if ok else 'FAIL'} {path}: {size} -> {len(encoded)} bytes "
+                      f"({size / len(encoded):.1f}x)")
+                failures += 0 if ok else 1
+            else:
+                _convert(path, args.command[3:], args.output_dir)
+        except (OSError, ValueError) as e:
+            print(f"FAIL {path}: {e}")
+            failures += 1
+
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -114,13 +114,11 @@ document.addEventListener('DOMContentLoaded', () => {
         fetch(`/api/levels/advance`, {
             method: 'POST'
         })
-        .then(() => {
-            // Load the new level data
-            return fetch(`/api/levels/level-${gameState.level + 1}`);
-        })
         .then(response => response.json())
-        .then(levelData => {
-            gameState.nextLevel();
+        .then(data => {
+            // The server sends the level it prepared ahead; use it if it's the one we're moving to
+            const levelData = data.level === gameState.level + 1 ? data.level_data : null;
+            gameState.nextLevel(levelData);
         })
         .catch(error => {
             console.error('Error advancing to next level:', error);
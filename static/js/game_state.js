@@ -30,6 +30,10 @@ class GameState {
         // Special flags
         this.isEditorLevel = false;
         this.isTestMode = false;
+        
+        // Bricks left when the server is asked to prepare the next level (see window.PREFETCH_BRICKS)
+        this.prefetchBricks = window.PREFETCH_BRICKS || 0;
+        this.prefetchedLevel = 0;
     }
     
     // Initialize game with level data
@@ -97,6 +101,11 @@ class GameState {
         // Update particles
         this.updateParticles(deltaTime);
         
+        // Ask the server to prepare the next level once few bricks are left
+        if (this.bricks.length <= this.prefetchBricks && !this.isTestMode && this.prefetchedLevel !== this.level + 1) {
+            this.prefetchNextLevel();
+        }
+        
         // Check if level is complete
         if (this.bricks.length === 0 && !this.levelComplete) {
             this.levelComplete = true;
@@ -492,8 +501,16 @@ class GameState {
             });
     }
     
-    // Move to the next level
-    nextLevel() {
+    // Have the server prepare the next level in the background
+    prefetchNextLevel() {
+        this.prefetchedLevel = this.level + 1;
+        fetch('/api/levels/prefetch', { method: 'POST' }).catch(() => {
+            // Only a hint: advancing works without it
+        });
+    }
+    
+    // Move to the next level (levelData, if given, is the level sent with the advance response)
+    nextLevel(levelData) {
         // If in test mode, don't advance to the next level
         if (this.isTestMode) {
             this.levelComplete = false;
@@ -506,6 +523,11 @@ class GameState {
         // Bonus points for completing a level
         this.score += 100 * this.level;
         
+        if (levelData) {
+            this.init(levelData);
+            return;
+        }
+        
         fetch(`/api/levels/level-${this.level}`)
             .then(response => response.json())
             .then(levelData => {
@@ -23,7 +23,10 @@ document.addEventListener('DOMContentLoaded', () => {
         levelId: '',  // Will be generated based on name
         levelName: 'New Level',
         nextLevelNumber: 1,
-        currentSessionId: null // To track the current editing session
+        currentSessionId: null, // To track the current editing session
+        revision: null,  // Saved revision of the level (null until it exists on the server)
+        pendingOps: [],  // Brick edits since the last save, sent as a PATCH
+        savedName: null  // Level name as last saved
     };
     
     // Brick colors (copied from game_objects.js)
@@ -95,6 +98,7 @@ document.addEventListener('DOMContentLoaded', () => {
                         state.levelId = levelData.id;
                         state.levelName = levelData.name;
                         state.bricks = levelData.bricks || [];
+                        markSaved(levelData.revision || 0);
                         
                         // Mark all loaded bricks as editor-placed
                         state.bricks.forEach(brick => {
@@ -283,6 +287,13 @@ document.addEventListener('DOMContentLoaded', () => {
         // Add to bricks array
         state.bricks.push(brick);
         
+        // Record the edit for the next incremental save
+        const op = { op: 'add', row: gridY, col: gridX, strength: brick.strength };
+        if (brick.has_powerup) {
+            op.powerup_type = brick.powerup_type;
+        }
+        state.pendingOps.push(op);
+        
         // Update display
         render();
     }
@@ -296,6 +307,7 @@ document.addEventListener('DOMContentLoaded', () => {
         // If found, remove it
         if (brickIndex !== -1) {
             state.bricks.splice(brickIndex, 1);
+            state.pendingOps.push({ op: 'remove', row: gridY, col: gridX });
             
             // Update display
             render();
@@ -305,6 +317,9 @@ document.addEventListener('DOMContentLoaded', () => {
     // Clear all bricks from the level
     function clearAllBricks() {
         if (confirm('Are you sure you want to clear all bricks?')) {
+            for (const brick of state.bricks) {
+                state.pendingOps.push({ op: 'remove', row: brick.row, col: brick.col });
+            }
             state.bricks = [];
             render();
         }
@@ -351,6 +366,7 @@ document.addEventListener('DOMContentLoaded', () => {
                 state.levelId = levelData.id;
                 state.levelName = levelData.name;
                 state.bricks = levelData.bricks || [];
+                markSaved(levelData.revision || 0);
                 
                 // Mark all loaded bricks as editor-placed
                 state.bricks.forEach(brick => {
@@ -379,6 +395,10 @@ document.addEventListener('DOMContentLoaded', () => {
         state.levelId = generateUniqueId(state.levelName);
         state.bricks = [];
         
+        // Not on the server yet: the first save sends the whole level
+        state.revision = null;
+        state.pendingOps = [];
+        
         // Update inputs
         levelNameInput.value = state.levelName;
         levelIdInput.value = state.levelId;
@@ -389,6 +409,50 @@ document.addEventListener('DOMContentLoaded', () => {
         console.log(`Created new level: ${state.levelName} with ID: ${state.levelId}`);
     }
     
+    // Remember the revision the server holds, with no edits pending
+    function markSaved(revision) {
+        state.revision = revision;
+        state.pendingOps = [];
+        state.savedName = state.levelName;
+    }
+    
+    // Whether the level can be saved as a PATCH of brick edits
+    function canPatch() {
+        // Bricks without grid cells (e.g. generated levels) can only be saved whole
+        return state.revision !== null && state.bricks.every(brick => brick.row !== undefined && brick.col !== undefined);
+    }
+    
+    // Send the edits since the last save; resolves to the server's result
+    function patchLevel(flush) {
+        const sent = state.pendingOps.length;
+        const name = state.levelName;
+        const ops = state.pendingOps.slice();
+        if (name !== state.savedName) {
+            ops.push({ op: 'name', name: name });
+        }
+        
+        return fetch(`/api/editor/levels/${encodeURIComponent(state.levelId)}`, {
+            method: 'PATCH',
+            headers: {
+                'Content-Type': 'application/json'
+            },
+            body: JSON.stringify({ revision: state.revision, ops: ops, flush: flush })
+        })
+        .then(response => response.json().then(result => {
+            if (response.ok) {
+                // Edits made while the request was in flight stay pending
+                state.pendingOps = state.pendingOps.slice(sent);
+                state.revision = result.revision;
+                state.savedName = name;
+                return result;
+            }
+            if (response.status === 409) {
+                result.conflict = true;
+            }
+            return result;
+        }));
+    }
+    
     // Save the current level
     function saveLevel() {
         // Check if we have any bricks
@@ -397,6 +461,51 @@ document.addEventListener('DOMContentLoaded', () => {
             return;
         }
         
+        if (!canPatch()) {
+            saveWholeLevel();
+            return;
+        }
+        
+        // Send only the edits made since the last save
+        const originalText = saveBtn.textContent;
+        saveBtn.textContent = 'Saving...';
+        saveBtn.disabled = true;
+        
+        patchLevel(false)
+            .then(result => {
+                if (result.status === 'success') {
+                    saveBtn.textContent = 'Saved!';
+                    setTimeout(() => {
+                        saveBtn.textContent = originalText;
+                        saveBtn.disabled = false;
+                    }, 1500);
+                    localStorage.setItem('lastEditedLevel', state.levelId);
+                    console.log(`Saved level: ${state.levelName} at revision ${state.revision}`);
+                    return;
+                }
+                
+                saveBtn.textContent = originalText;
+                saveBtn.disabled = false;
+                if (result.conflict) {
+                    // The level was saved elsewhere since it was loaded
+                    if (confirm('This level was changed elsewhere since you loaded it. Overwrite it with your version?')) {
+                        saveWholeLevel();
+                    }
+                } else {
+                    // Fall back to saving the whole level
+                    saveWholeLevel();
+                }
+            })
+            .catch(error => {
+                console.error('Error saving level edits:', error);
+                saveBtn.textContent = originalText;
+                saveBtn.disabled = false;
+                saveWholeLevel();
+            });
+    }
+    
+    // Save the current level by sending all of it
+    function saveWholeLevel() {
         // If not already assigned, generate a unique ID based on the name
         if (!state.levelId) {
             state.levelId = generateUniqueId(state.levelName);
@@ -430,6 +539,8 @@ document.addEventListener('DOMContentLoaded', () => {
         .then(response => response.json())
         .then(result => {
             if (result.status === 'success') {
+                markSaved(result.revision);
+                
                 // Show success message
                 saveBtn.textContent = 'Saved!';
                 setTimeout(() => {
@@ -463,6 +574,8 @@ document.addEventListener('DOMContentLoaded', () => {
             }
             
             if (result && result.status === 'success') {
+                markSaved(result.revision !== undefined ? result.revision : null);
+                
                 // Show success message if using fallback
                 saveBtn.textContent = 'Saved!';
                 setTimeout(() => {
@@ -535,16 +648,24 @@ document.addEventListener('DOMContentLoaded', () => {
         // Save the current level ID to localStorage for returning from test
         localStorage.setItem('lastEditedLevel', state.levelId);
         
+        // Send just the edits (written to disk right away for the test run) when possible
+        const saved = canPatch()
+            ? patchLevel(true).then(result => result.status === 'success' ? result : saveWhole())
+            : saveWhole();
+        
         // Use editor-specific endpoint
-        fetch('/api/editor/levels/create', {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json'
-            },
-            body: JSON.stringify(levelData)
-        })
-        .then(response => response.json())
-        .then(result => {
+        function saveWhole() {
+            return fetch('/api/editor/levels/create', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json'
+                },
+                body: JSON.stringify(levelData)
+            })
+            .then(response => response.json());
+        }
+        
+        saved.then(result => {
             if (result.status === 'success' || (result && result.status === 'success')) {
                 // Show launching message
                 testBtn.textContent = 'Launching...';
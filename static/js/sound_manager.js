@@ -13,8 +13,59 @@ class SoundManager {
         // Whether sound is enabled
         this.enabled = true;
         
-        // Preload common sounds
-        this.preloadSounds();
+        // Web Audio state for the audio sprite (see utils/audio_sprite.py)
+        this.context = null;
+        this.gain = null;
+        this.slices = null;
+        
+        // Milliseconds from page load until every sound could play
+        this.readyAt = null;
+        
+        // One sprite request and decode when build_assets.py packed one (?sprite=0 opts out)
+        const AudioContextClass = window.AudioContext || window.webkitAudioContext;
+        const useSprite = new URLSearchParams(window.location.search).get('sprite') !== '0';
+        if (window.AUDIO_SPRITE && AudioContextClass && useSprite) {
+            this.loadSprite(window.AUDIO_SPRITE, AudioContextClass);
+        } else {
+            // Preload common sounds
+            this.preloadSounds();
+        }
+    }
+    
+    async loadSprite(sprite, AudioContextClass) {
+        this.context = new AudioContextClass();
+        this.gain = this.context.createGain();
+        this.gain.gain.value = this.volume;
+        this.gain.connect(this.context.destination);
+        
+        try {
+            const response = await fetch(sprite.url);
+            const data = await response.arrayBuffer();
+            
+            // Each segment is one MP3 stream (one per sample rate and channel layout)
+            const buffers = await Promise.all(sprite.segments.map(
+                segment => this.context.decodeAudioData(data.slice(segment.start, segment.end))));
+            
+            // Map each sound to its slice of a decoded buffer
+            const slices = {};
+            sprite.segments.forEach((segment, index) => {
+                for (const [name, [offset, duration]] of Object.entries(segment.sounds)) {
+                    slices[name] = { buffer: buffers[index], offset, duration };
+                }
+            });
+            this.slices = slices;
+            this.markReady('sprite');
+        } catch (e) {
+            // Fall back to one audio element per sound
+            this.context = null;
+            this.preloadSounds();
+        }
+    }
+    
+    markReady(mode) {
+        // Record time to first playable sound for comparing loaders
+        this.readyAt = performance.now();
+        console.log(`Sounds ready (${mode}) after ${Math.round(this.readyAt)} ms`);
     }
     
     preloadSounds() {
@@ -28,25 +79,47 @@ class SoundManager {
             'levelup': 'levelup.mp3'
         };
         
-        // Load each sound
+        // Load each sound, noting when the last one can play through
+        let pending = Object.keys(soundFiles).length;
         for (const [name, file] of Object.entries(soundFiles)) {
-            this.loadSound(name, file);
+            const audio = this.loadSound(name, file);
+            audio.addEventListener('canplaythrough', () => {
+                if (--pending === 0) this.markReady('files');
+            }, { once: true });
         }
     }
     
     loadSound(name, file) {
-        // Create audio element
-        const audio = new Audio(`/static/sounds/${file}`);
+        // Create audio element (fingerprinted URL when assets are built)
+        const assetUrls = window.ASSET_URLS || {};
+        const audio = new Audio(assetUrls[`sounds/${file}`] || `/static/sounds/${file}`);
         audio.volume = this.volume;
         
         // Store in cache
         this.sounds[name] = audio;
+        return audio;
     }
     
     play(name) {
         // Skip if sound is disabled
         if (!this.enabled) return;
         
+        // Play a slice of the decoded sprite
+        if (this.context) {
+            const slice = this.slices && this.slices[name];
+            if (!slice) return;
+            
+            // Browsers start audio contexts suspended until the player interacts
+            if (this.context.state === 'suspended') {
+                this.context.resume().catch(e => {});
+            }
+            const source = this.context.createBufferSource();
+            source.buffer = slice.buffer;
+            source.connect(this.gain);
+            source.start(0, slice.offset, slice.duration);
+            return;
+        }
+        
         // Get sound from cache
         const sound = this.sounds[name];
         if (!sound) return;
@@ -63,7 +136,10 @@ class SoundManager {
         // Set volume (0-1)
         this.volume = Math.max(0, Math.min(1, volume));
         
-        // Update all cached sounds
+        // Update the sprite's gain and all cached sounds
+        if (this.gain) {
+            this.gain.gain.value = this.volume;
+        }
         for (const sound of Object.values(this.sounds)) {
             sound.volume = this.volume;
         }
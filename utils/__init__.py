@@ -3,6 +3,7 @@
 from .game_engine import GameEngine
 from .game_objects import Ball, Paddle, Brick, Powerup, Laser
 from .level_loader import load_level, save_level, generate_level, create_sample_levels
+from .session_manager import SessionManager
 
 __all__ = [
     'GameEngine',
@@ -14,5 +15,6 @@ __all__ = [
     'load_level',
     'save_level',
     'generate_level',
-    'create_sample_levels'
+    'create_sample_levels',
+    'SessionManager'
 ]
\ No newline at end of file
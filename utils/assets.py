@@ -0,0 +1,155 @@
+"""
+Static asset pipeline for Brick Breaker
+
+build_assets() copies every file under static/ into a build directory
+under a content-hashed name (js/game.js -> js/game.3f2a9c1d04be.js),
+writes precompressed .gz copies of text assets (and .br copies when the
+optional brotli package is installed), and records the mapping in
+manifest.json. Since a hashed name changes whenever the content does,
+the app serves these files with a one-year immutable Cache-Control, and
+browsers never revalidate them.
+
+Templates reference assets through asset_url(), which looks the file up
+in the manifest. Without a build (e.g. in development) it falls back to
+Flask's plain /static URL, so running the pipeline is optional.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import shutil
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MANIFEST_NAME = 'manifest.json'
+
+# Assets that compress well enough to be worth precompressing
+TEXT_EXTENSIONS = ('.css', '.js', '.html', '.json', '.svg', '.txt')
+
+# Hex digits of the content hash kept in file names
+HASH_LENGTH = 12
+
+# Cache-Control for fingerprinted assets: a new version gets a new URL
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+# Precompressed variants, in order of preference, with their file suffix
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+# Manifest per build directory, with the manifest's mtime
+_manifests = {}
+
+def hashed_name(path, data):
+    """
+    Return a file name with a hash of its content inserted before the extension
+
+    Args:
+        path: Relative asset path (e.g. 'js/game.js')
+        data: File contents
+
+    Returns:
+        Hashed relative path (e.g. 'js/game.3f2a9c1d04be.js')
+    """
+    base, extension = os.path.splitext(path)
+    digest = hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+    return f"{base}.{digest}{extension}"
+
+def build_assets(static_dir, build_dir):
+    """
+    Fingerprint and precompress every asset under a static directory
+
+    Args:
+        static_dir: Directory holding the source assets
+        build_dir: Output directory (inside static_dir, it is skipped as a source)
+
+    Returns:
+        Manifest dictionary mapping each asset path to its hashed path
+    """
+    static_dir = os.path.abspath(static_dir)
+    build_dir = os.path.abspath(build_dir)
+    manifest = {}
+    for root, dirs, files in os.walk(static_dir):
+        # Never fingerprint a previous build
+        dirs[:] = sorted(d for d in dirs if os.path.join(root, d) != build_dir)
+        for name in sorted(files):
+            source = os.path.join(root, name)
+            path = os.path.relpath(source, static_dir).replace(os.sep, '/')
+            with open(source, 'rb') as f:
+                data = f.read()
+
+            target_path = hashed_name(path, data)
+            target = os.path.join(build_dir, target_path)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.copyfile(source, target)
+            if path.endswith(TEXT_EXTENSIONS):
+                _precompress(target, data)
+            manifest[path] = target_path
+
+    os.makedirs(build_dir, exist_ok=True)
+    temp_path = os.path.join(build_dir, MANIFEST_NAME + '.tmp')
+    with open(temp_path, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(temp_path, os.path.join(build_dir, MANIFEST_NAME))
+    return manifest
+
+def _precompress(target, data):
+    """Write .gz (and .br, with brotli installed) copies next to an asset, if smaller"""
+    compressed = gzip.compress(data, compresslevel=9, mtime=0)
+    if len(compressed) < len(data):
+        with open(target + '.gz', 'wb') as f:
+            f.write(compressed)
+    if brotli is not None:
+        compressed = brotli.compress(data, quality=11)
+        if len(compressed) < len(data):
+            with open(target + '.br', 'wb') as f:
+                f.write(compressed)
+
+def load_manifest(build_dir):
+    """
+    Return the manifest of a build directory, rereading it if it changed
+
+    Args:
+        build_dir: Directory written by build_assets
+
+    Returns:
+        Manifest dictionary (empty if there's no build)
+    """
+    path = os.path.join(build_dir, MANIFEST_NAME)
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return {}
+
+    cached = _manifests.get(build_dir)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    with open(path, 'r') as f:
+        manifest = json.load(f)
+    _manifests[build_dir] = (mtime, manifest)
+    return manifest
+
+def pick_encoding(path, accept_encoding):
+    """
+    Choose the precompressed variant of a built asset to send
+
+    Args:
+        path: Absolute path of the hashed asset
+        accept_encoding: The request's Accept-Encoding header (or None)
+
+    Returns:
+        (path to send, Content-Encoding or None)
+    """
+    accepted = set()
+    for token in (accept_encoding or '').split(','):
+        name, _, params = token.strip().partition(';')
+        if params.replace(' ', '') in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            continue
+        accepted.add(name.strip().lower())
+
+    for encoding, suffix in ENCODINGS:
+        if encoding in accepted and os.path.exists(path + suffix):
+            return path + suffix, encoding
+    return path, None
@@ -0,0 +1,216 @@
+"""
+Audio sprite packing for Brick Breaker
+
+build_sprite() joins the MP3 files in static/sounds/ into one sprite
+file, so the game downloads its sounds in a single request and decodes
+them once instead of nine times. MP3 is a stream of self-contained
+frames, so the files are joined frame by frame. ID3 tags and each
+file's Xing/Info header frame are dropped, and the frames themselves are
+not re-encoded. The sprite manifest records each sound's offset and
+duration in seconds, computed from the frame headers.
+
+A browser decodes one MP3 stream at a single sample rate and channel
+layout. Sounds are therefore grouped into segments of matching format:
+contiguous byte ranges of the sprite that are each decoded once (one
+segment when every file was encoded alike). Each sound keeps its
+encoder's leading silence, so neighbouring sounds never bleed into each
+other.
+"""
+
+import json
+import os
+
+SPRITE_NAME = 'sprite.mp3'
+SPRITE_MANIFEST_NAME = 'sprite.json'
+
+# Layer III bitrates (kbps) by bitrate index: MPEG-1, then MPEG-2/2.5
+BITRATES = {
+    1: (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    2: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160)
+}
+
+# Sample rates by version bits, then sample rate index
+SAMPLE_RATES = {
+    0b11: (44100, 48000, 32000),  # MPEG-1
+    0b10: (22050, 24000, 16000),  # MPEG-2
+    0b00: (11025, 12000, 8000)    # MPEG-2.5
+}
+
+# Tags in the first frame marking it as a header frame rather than audio
+HEADER_FRAME_TAGS = (b'Xing', b'Info')
+
+# Sprite manifest per path, with the file's mtime
+_sprites = {}
+
+def parse_frame_header(data, pos):
+    """
+    Parse the MPEG Layer III frame header at a position
+
+    Args:
+        data: MP3 bytes
+        pos: Offset of the candidate header
+
+    Returns:
+        (frame length, samples, sample rate, channels, side info size)
+        or None if no valid Layer III header starts there
+    """
+    if pos + 4 > len(data) or data[pos] != 0xFF or data[pos + 1] & 0xE0 != 0xE0:
+        return None
+
+    version = (data[pos + 1] >> 3) & 0b11
+    layer = (data[pos + 1] >> 1) & 0b11
+    protected = not data[pos + 1] & 1
+    bitrate_index = data[pos + 2] >> 4
+    rate_index = (data[pos + 2] >> 2) & 0b11
+    padding = (data[pos + 2] >> 1) & 1
+    mono = (data[pos + 3] >> 6) == 0b11
+    if version == 0b01 or layer != 0b01 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+
+    mpeg1 = version == 0b11
+    bitrate = BITRATES[1 if mpeg1 else 2][bitrate_index] * 1000
+    sample_rate = SAMPLE_RATES[version][rate_index]
+    samples = 1152 if mpeg1 else 576
+    length = (samples // 8) * bitrate // sample_rate + padding
+    if mpeg1:
+        side_info = 17 if mono else 32
+    else:
+        side_info = 9 if mono else 17
+    if protected:
+        side_info += 2
+    return length, samples, sample_rate, 1 if mono else 2, side_info
+
+def _skip_id3v2(data):
+    """Return the offset just past a leading ID3v2 tag (0 without one)"""
+    if len(data) < 10 or data[:3] != b'ID3':
+        return 0
+    # Synchsafe size: 7 bits per byte, not counting the 10-byte header (or footer)
+    size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+    footer = 10 if data[5] & 0x10 else 0
+    return 10 + size + footer
+
+def read_frames(data):
+    """
+    Return the audio frames of an MP3 file, without tags or header frames
+
+    Args:
+        data: MP3 file contents
+
+    Returns:
+        (frame bytes, total samples, sample rate, channels)
+
+    Raises:
+        ValueError: If the data holds no MPEG Layer III frames, or the
+            frames change sample rate or channel layout
+    """
+    end = len(data)
+    if end >= 128 and data[end - 128:end - 125] == b'TAG':
+        end -= 128
+
+    pos = _skip_id3v2(data)
+    frames = []
+    samples = 0
+    stream_format = None
+    while pos < end:
+        header = parse_frame_header(data, pos)
+        if header is None or pos + header[0] > end:
+            # Junk between frames: resynchronize on the next header
+            pos += 1
+            continue
+
+        length, frame_samples, sample_rate, channels, side_info = header
+        if stream_format is None:
+            stream_format = (sample_rate, channels)
+            tag = data[pos + 4 + side_info:pos + 8 + side_info]
+            if tag in HEADER_FRAME_TAGS:
+                # Metadata only: its frame count would be wrong for the sprite
+                pos += length
+                continue
+        elif (sample_rate, channels) != stream_format:
+            raise ValueError(f"Stream changes format at byte {pos}")
+
+        frames.append(data[pos:pos + length])
+        samples += frame_samples
+        pos += length
+
+    if stream_format is None:
+        raise ValueError("No MPEG Layer III frames found")
+    return b''.join(frames), samples, stream_format[0], stream_format[1]
+
+def build_sprite(sound_dir, output_dir=None):
+    """
+    Pack every MP3 in a directory into one sprite file and its manifest
+
+    Args:
+        sound_dir: Directory holding the sounds (e.g. static/sounds)
+        output_dir: Where to write sprite.mp3 and sprite.json (default sound_dir)
+
+    Returns:
+        Sprite manifest dictionary: the sprite file name and its segments,
+        each with a byte range, sample rate and the sounds it holds as
+        {name: [offset seconds, duration seconds]}
+    """
+    output_dir = output_dir or sound_dir
+    names = sorted(name for name in os.listdir(sound_dir)
+                   if name.lower().endswith('.mp3') and name != SPRITE_NAME)
+
+    # Group sounds by stream format; each group becomes one decodable segment
+    groups = {}
+    for name in names:
+        with open(os.path.join(sound_dir, name), 'rb') as f:
+            frames, samples, sample_rate, channels = read_frames(f.read())
+        groups.setdefault((sample_rate, channels), []).append((os.path.splitext(name)[0], frames, samples))
+
+    chunks = []
+    segments = []
+    position = 0
+    for (sample_rate, channels), sounds in sorted(groups.items(), reverse=True):
+        start = position
+        elapsed = 0
+        offsets = {}
+        for sound, frames, samples in sounds:
+            offsets[sound] = [round(elapsed / sample_rate, 6), round(samples / sample_rate, 6)]
+            elapsed += samples
+            chunks.append(frames)
+            position += len(frames)
+        segments.append({
+            'start': start,
+            'end': position,
+            'sample_rate': sample_rate,
+            'channels': channels,
+            'sounds': offsets
+        })
+
+    manifest = {'file': SPRITE_NAME, 'segments': segments}
+    os.makedirs(output_dir, exist_ok=True)
+    with open(os.path.join(output_dir, SPRITE_NAME), 'wb') as f:
+        f.write(b''.join(chunks))
+    temp_path = os.path.join(output_dir, SPRITE_MANIFEST_NAME + '.tmp')
+    with open(temp_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(temp_path, os.path.join(output_dir, SPRITE_MANIFEST_NAME))
+    return manifest
+
+def load_sprite(sound_dir):
+    """
+    Return the sprite manifest in a sound directory, rereading it if it changed
+
+    Args:
+        sound_dir: Directory build_sprite wrote to
+
+    Returns:
+        Sprite manifest dictionary, or None if no sprite was built
+    """
+    path = os.path.join(sound_dir, SPRITE_MANIFEST_NAME)
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+
+    cached = _sprites.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    with open(path, 'r') as f:
+        manifest = json.load(f)
+    _sprites[path] = (mtime, manifest)
+    return manifest
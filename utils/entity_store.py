@@ -0,0 +1,112 @@
+"""
+Entity store for Brick Breaker
+
+This module keeps the engine's balls, bricks, powerups and lasers in
+per-kind stores instead of plain lists. Each store:
+
+- gives every entity a stable integer ID (entity.id) when it is added,
+  which clients can use to track the same object across frames
+- removes entities in O(1) by swapping the last entity into the removed
+  one's slot (entity.slot), so the order of the remaining entities changes
+- keeps removed entities in a pool and reuses them for the next spawn
+  (via their reset method), so steady-state ticks don't allocate objects
+
+Because removal moves the last entity into the freed slot, code that
+removes while looping must walk the store backwards by index (see
+GameEngine.update_balls); iterating directly is fine otherwise.
+"""
+
+class EntityStore:
+    """Dense, pooled collection of one kind of game object"""
+
+    def __init__(self, factory):
+        """
+        Create an empty store
+
+        Args:
+            factory: Class (or callable) building a new entity; pooled entities
+                     are re-initialized with its reset method using the same arguments
+        """
+        self.factory = factory
+        self.items = []
+        self.pool = []
+        self.next_id = 1
+        # Entities built by the factory vs taken from the pool
+        self.created = 0
+        self.reused = 0
+
+    def obtain(self, *args, **kwargs):
+        """Return an initialized entity that isn't in the store yet, reusing a pooled one if possible"""
+        if self.pool:
+            entity = self.pool.pop()
+            entity.reset(*args, **kwargs)
+            self.reused += 1
+        else:
+            entity = self.factory(*args, **kwargs)
+            self.created += 1
+        return entity
+
+    def spawn(self, *args, **kwargs):
+        """Obtain an entity and add it to the store; returns the entity"""
+        return self.add(self.obtain(*args, **kwargs))
+
+    def add(self, entity, entity_id=None):
+        """
+        Add an entity, giving it a new ID
+
+        Args:
+            entity: Entity to add
+            entity_id: ID to keep instead (used when restoring snapshots)
+
+        Returns:
+            The entity
+        """
+        if entity_id is None:
+            entity_id = self.next_id
+            self.next_id += 1
+        elif entity_id >= self.next_id:
+            self.next_id = entity_id + 1
+        entity.id = entity_id
+        entity.slot = len(self.items)
+        self.items.append(entity)
+        return entity
+
+    # Lets code written against plain lists keep appending
+    append = add
+
+    def remove(self, entity):
+        """Remove an entity in O(1) and return it to the pool"""
+        items = self.items
+        slot = entity.slot
+        last = items.pop()
+        if last is not entity:
+            items[slot] = last
+            last.slot = slot
+        entity.slot = -1
+        self.pool.append(entity)
+
+    def clear(self):
+        """Remove every entity, returning them all to the pool"""
+        for entity in self.items:
+            entity.slot = -1
+        self.pool.extend(self.items)
+        self.items.clear()
+
+    def __contains__(self, entity):
+        slot = getattr(entity, 'slot', -1)
+        return 0 <= slot < len(self.items) and self.items[slot] is entity
+
+    def __getitem__(self, index):
+        return self.items[index]
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __bool__(self):
+        return bool(self.items)
+
+    def __repr__(self):
+        return f"EntityStore({self.factory.__name__}, {len(self.items)} live, {len(self.pool)} pooled)"
@@ -10,18 +10,58 @@ import math
 import random
 import json
 import os
+import time
 from .game_objects import Ball, Paddle, Brick, Powerup, Laser
+from .entity_store import EntityStore
+from .level_loader import read_level_file, find_level_file
+from .level_pack import open_pack
+from . import shared_levels
+from . import level_prototype
+from .tick_history import TickHistory
+from .input_queue import InputQueue, merge_inputs, parse_entries
+from . import vector_physics
+from . import log
+
+logger = log.get_logger('game_engine')
 
 class GameEngine:
     """Main game engine that manages the game state and logic"""
     
-    def __init__(self, config=None):
-        """Initialize the game engine with optional configuration"""
+    def __init__(self, config=None, start=True):
+        """Initialize the game engine with optional configuration (start=False skips loading the first level)"""
         # Default configuration
         self.config = config or {}
         self.screen_width = self.config.get('SCREEN_WIDTH', 800)
         self.screen_height = self.config.get('SCREEN_HEIGHT', 600)
         self.fps = self.config.get('FPS', 60)
+        self.levels_dir = self.config.get(
+            'LEVELS_DIR',
+            os.path.join(os.path.dirname(os.path.dirname(__file__)), 'levels')
+        )
+        # Optional level pack consulted for levels without a file in levels_dir
+        self.level_pack = self.config.get('LEVEL_PACK')
+        
+        # The engine owns its randomness so ticks can be replayed exactly (see rollback)
+        self.seed = self.config.get('SEED')
+        if self.seed is None:
+            self.seed = random.SystemRandom().getrandbits(64)
+        self.random = random.Random(self.seed)
+        
+        # Tick counter and, optionally, the last HISTORY_TICKS ticks for rollback
+        self.tick = 0
+        history_ticks = self.config.get('HISTORY_TICKS', 0)
+        self.history = TickHistory(history_ticks) if history_ticks else None
+        # Bumped whenever bricks change so the history can reuse packed bricks
+        self.brick_revision = 0
+        
+        # Tick-stamped inputs sent ahead in batches, applied on their tick
+        self.inputs = InputQueue()
+        
+        # With NumPy installed, step balls as arrays once there are VECTOR_BALLS of them (0 disables)
+        vector_balls = self.config.get('VECTOR_BALLS', vector_physics.DEFAULT_MIN_BALLS)
+        self.vector_balls = None
+        if vector_balls and vector_physics.available():
+            self.vector_balls = vector_physics.VectorBalls(vector_balls)
         
         # Game state
         self.lives = 3
@@ -32,34 +72,47 @@ class GameEngine:
         self.level_complete = False
         self.paused = False
         
-        # Game objects
+        # Game objects (pooled stores with stable IDs, see entity_store)
         self.paddle = None
-        self.balls = []
-        self.bricks = []
-        self.powerups = []
-        self.lasers = []
+        self.balls = EntityStore(Ball)
+        self.bricks = EntityStore(Brick)
+        self.powerups = EntityStore(Powerup)
+        self.lasers = EntityStore(Laser)
+        # Particles are plain dicts; expired ones are kept for reuse
         self.particles = []
+        self.particle_pool = []
         
         # Flag to track if current level was created in the editor
         self.is_editor_level = False
         
-        # Initialize game objects
-        self.reset_level()
+        # Compiled level the bricks came from, and its Brick objects by
+        # prototype index (None when the bricks weren't built from one)
+        self.prototype = None
+        self.level_bricks = None
+        
+        # Initialize game objects (engines restored from a snapshot fill them in instead)
+        if start:
+            self.reset_level()
     
-    def reset_level(self):
-        """Reset the level, keeping score and lives"""
+    def reset_level(self, prototype=None):
+        """Reset the level, keeping score and lives (building bricks from prototype if one is given)"""
         self.paddle = Paddle(self.screen_width, self.screen_height)
-        self.balls = [Ball(self.screen_width, self.screen_height)]
-        self.bricks = []
-        self.powerups = []
-        self.lasers = []
-        self.particles = []
+        self.balls.clear()
+        self.balls.spawn(self.screen_width, self.screen_height, rng=self.random)
+        self.bricks.clear()
+        self.powerups.clear()
+        self.lasers.clear()
+        self.particle_pool.extend(self.particles)
+        self.particles.clear()
         self.paused = False
         self.level_complete = False
         self.is_editor_level = False
         
-        # Load level data
-        self.load_level(self.level)
+        # Load level data, unless it was prepared ahead (see level_prefetch)
+        if prototype is not None:
+            self.load_prototype(prototype)
+        else:
+            self.load_level(self.level)
     
     def reset_game(self):
         """Reset the entire game"""
@@ -71,63 +124,109 @@ class GameEngine:
         self.reset_level()
     
     def load_level(self, level_num):
-        """Load a level from a JSON file"""
+        """Load a level from a JSON or grid file, or from the level pack"""
+        start = time.perf_counter()
+        level_id = f"level-{level_num}"
         try:
-            level_file = f"level-{level_num}.json"
-            level_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'levels', level_file)
+            level_path = find_level_file(self.levels_dir, level_id)
             
-            if os.path.exists(level_path):
-                with open(level_path, 'r') as f:
-                    level_data = json.load(f)
-                    print(f"Loading level {level_num} from {level_path}")
-                
-                # Check if this is an editor-created level
-                self.is_editor_level = level_data.get('editor_version', False)
-                
-                if self.is_editor_level:
-                    print(f"Loading editor-created level {level_num}")
-                else:
-                    print(f"Loading standard level {level_num}")
+            # Loose files win over the level pack, if one is configured
+            pack = open_pack(self.level_pack) if level_path is None else None
+            
+            # Prefer the shared-memory brick table when one is published
+            table = shared_levels.get_table()
+            if table is not None and level_path and table.is_current(level_id, level_path):
+                self.load_shared_level(table, level_id)
+                source = 'shared'
+            elif level_path is not None:
+                level_data = read_level_file(level_path)
                 
-                # Process bricks data
-                if 'bricks' in level_data:
-                    print(f"Found {len(level_data['bricks'])} bricks in level data")
-                    for brick_data in level_data['bricks']:
-                        # Create the brick
-                        brick = Brick(
-                            brick_data['x'], 
-                            brick_data['y'],
-                            brick_data.get('strength', 1),
-                            0.0 if self.is_editor_level else 0.3  # No random powerups in editor levels
-                        )
-                        
-                        # Handle powerup settings
-                        if self.is_editor_level or brick_data.get('editor_placed', False):
-                            # For editor levels, explicitly set powerup properties from data
-                            brick.has_powerup = brick_data.get('has_powerup', False)
-                            if brick.has_powerup:
-                                brick.powerup_type = brick_data.get('powerup_type', 0)
-                                print(f"Editor brick at ({brick.x}, {brick.y}) has powerup type {brick.powerup_type}")
-                        else:
-                            # For non-editor bricks, use properties from the JSON
-                            brick.has_powerup = brick_data.get('has_powerup', False)
-                            if brick.has_powerup:
-                                brick.powerup_type = brick_data.get('powerup_type', 0)
-                                print(f"Brick at ({brick.x}, {brick.y}) has powerup type {brick.powerup_type}")
-                        
-                        self.bricks.append(brick)
+                # The parsed data is cached per file, so its prototype is compiled once
+                self.load_prototype(level_prototype.get_prototype(level_data))
+                source = level_path
+            elif pack is not None and level_id in pack:
+                self.load_prototype(level_prototype.get_prototype(pack.read_level(level_id)))
+                source = self.level_pack
             else:
                 # If level file doesn't exist, generate level programmatically
-                print(f"Level file {level_path} not found, generating level")
                 self.generate_level(level_num)
+                source = 'generated'
         
         except Exception as e:
-            print(f"Error loading level {level_num}: {e}")
+            logger.error("Error loading level, generating one", extra={'level_id': level_id, 'error': str(e)})
             # Fall back to generated level
             self.generate_level(level_num)
+            source = 'generated'
+        
+        if __debug__ and log.debug_enabled:
+            logger.debug("Loaded level", extra={
+                'level_id': level_id,
+                'source': source,
+                'editor_level': self.prototype is not None and self.prototype.is_editor_level,
+                'bricks': len(self.bricks),
+                'duration_ms': round((time.perf_counter() - start) * 1000, 3)
+            })
+    
+    def load_level_data(self, level_data):
+        """Build the level's bricks from already-parsed level data"""
+        self.load_prototype(level_prototype.compile_level(level_data))
+    
+    def load_shared_level(self, table, level_id):
+        """Build the level's bricks from a shared-memory brick table"""
+        self.load_prototype(level_prototype.get_shared_prototype(table, level_id))
+    
+    def load_prototype(self, prototype):
+        """Build the level's bricks from a compiled LevelPrototype"""
+        self.brick_revision += 1
+        self.prototype = prototype
+        self.is_editor_level = prototype.is_editor_level
+        
+        # Only the mutable part is built here; layout and powerups come from the prototype
+        bricks = self.bricks
+        level_bricks = []
+        for x, y, strength, has_powerup, powerup_type in prototype.bricks:
+            brick = bricks.obtain(x, y, strength, 0.0)
+            brick.has_powerup = has_powerup
+            brick.powerup_type = powerup_type
+            bricks.add(brick)
+            level_bricks.append(brick)
+        
+        # The grid only covers the prototype's bricks, so any others disable it
+        self.level_bricks = level_bricks if len(bricks) == len(level_bricks) else None
+    
+    def relink_bricks(self):
+        """Point the prototype's grid at the current bricks (after they were restored)"""
+        prototype = self.prototype
+        self.level_bricks = None
+        if prototype is None:
+            return
+        
+        level_bricks = [None] * len(prototype)
+        for brick in self.bricks:
+            index = prototype.positions.get((brick.x, brick.y))
+            if index is None or level_bricks[index] is not None:
+                # Not a brick of this level (or an ambiguous one): check every brick
+                return
+            level_bricks[index] = brick
+        self.level_bricks = level_bricks
+    
+    def _nearby_bricks(self, rect):
+        """Bricks in the grid cells a rect covers, in store order (None without a grid)"""
+        level_bricks = self.level_bricks
+        if level_bricks is None:
+            return None
+        bricks = self.bricks
+        nearby = [level_bricks[index] for index in self.prototype.grid.query(rect.x, rect.y, rect.width, rect.height)]
+        return sorted((brick for brick in nearby if brick is not None and brick in bricks),
+                      key=lambda brick: brick.slot)
     
     def generate_level(self, level):
         """Generate a level programmatically"""
+        self.brick_revision += 1
+        # Generated levels are random each time, so they aren't compiled
+        self.prototype = None
+        self.level_bricks = None
+        
         # Default brick properties
         brick_width = 75
         brick_height = 20
@@ -162,7 +261,7 @@ class GameEngine:
                 y = row * (brick_height + brick_gap) + 50
                 # First row has strength 1, then 2, then 3...
                 strength = min(row + 1, 4) 
-                self.bricks.append(Brick(x, y, strength))
+                self.bricks.spawn(x, y, strength, rng=self.random)
     
     def _generate_diamond_pattern_level(self, brick_width, brick_height, brick_gap, brick_rows, brick_cols):
         """Generate a diamond pattern layout (Level 2)"""
@@ -177,7 +276,7 @@ class GameEngine:
                     y = row * (brick_height + brick_gap) + 40
                     # Outer bricks have higher strength
                     strength = max(1, 4 - dist // 2)
-                    self.bricks.append(Brick(x, y, strength))
+                    self.bricks.spawn(x, y, strength, rng=self.random)
     
     def _generate_checkerboard_level(self, brick_width, brick_height, brick_gap, brick_rows, brick_cols):
         """Generate a checkerboard pattern layout (Level 3)"""
@@ -186,24 +285,24 @@ class GameEngine:
                 if (row + col) % 2 == 0:
                     x = col * (brick_width + brick_gap) + 25
                     y = row * (brick_height + brick_gap) + 40
-                    strength = random.randint(1, 3)
-                    self.bricks.append(Brick(x, y, strength))
+                    strength = self.random.randint(1, 3)
+                    self.bricks.spawn(x, y, strength, rng=self.random)
     
     def _generate_random_level(self, brick_width, brick_height, brick_gap, brick_rows, brick_cols, level):
         """Generate a random layout (higher levels)"""
         for row in range(brick_rows + level//2):
             for col in range(brick_cols):
-                if random.random() < 0.8:  # 80% chance of a brick
+                if self.random.random() < 0.8:  # 80% chance of a brick
                     x = col * (brick_width + brick_gap) + 50
                     y = row * (brick_height + brick_gap) + 40
                     # Higher chance of strong bricks in later levels
-                    strength = random.choices(
+                    strength = self.random.choices(
                         [1, 2, 3, 4], 
                         weights=[5-level//2, level, level//2, level//3],
                         k=1
                     )[0]
                     strength = max(1, min(strength, 4))  # Clamp between 1-4
-                    self.bricks.append(Brick(x, y, strength))
+                    self.bricks.spawn(x, y, strength, rng=self.random)
     
     def save_level_to_json(self, level_num):
         """Save the current level layout to a JSON file"""
@@ -225,7 +324,7 @@ class GameEngine:
             level_data["bricks"].append(brick_data)
         
         # Ensure the levels directory exists
-        levels_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'levels')
+        levels_dir = self.levels_dir
         if not os.path.exists(levels_dir):
             os.makedirs(levels_dir)
         
@@ -237,9 +336,34 @@ class GameEngine:
             json.dump(level_data, f, indent=2)
     
     def update(self, dt, input_data=None):
-        """Update game state for a single frame"""
-        if self.paused:
-            return
+        """Update game state for a single frame (returns False if the game was paused and nothing moved)"""
+        if not self.begin_tick(dt, input_data):
+            return False
+        
+        # Update all game objects
+        self.update_lasers(dt)
+        self.update_balls(dt)
+        self.update_powerups(dt)
+        
+        self.end_tick(dt)
+        return True
+    
+    def begin_tick(self, dt, input_data=None):
+        """Start a frame: apply input, move the paddle and fire lasers (returns False for a paused frame)"""
+        # Without explicit input, use whatever was queued for this tick
+        if input_data is None and self.inputs:
+            input_data = self.inputs.take(self.tick)
+        
+        if self.history is not None:
+            # Record where this tick starts, and make its randomness depend only on the tick
+            self.history.record(self, dt, input_data)
+            self.random.seed(self.seed + self.tick)
+        
+        # A paused frame only counts the tick (so inputs stamped after it, such as
+        # the unpause, are reached) unless its input unpauses the game
+        if self.paused and not (input_data and input_data.get('pause_pressed')):
+            self.tick += 1
+            return False
         
         # Process input if provided
         if input_data:
@@ -250,14 +374,11 @@ class GameEngine:
         
         # Check if we should shoot lasers
         if self.paddle.laser_active:
-            new_lasers = self.paddle.shoot_laser(dt)
-            if new_lasers:
-                self.lasers.extend(new_lasers)
-        
-        # Update all game objects
-        self.update_lasers(dt)
-        self.update_balls(dt)
-        self.update_powerups(dt)
+            self.paddle.shoot_laser(dt, self.lasers)
+        return True
+    
+    def end_tick(self, dt):
+        """Finish a frame after lasers, balls and powerups have moved"""
         self.update_particles(dt)
         
         # Check if level is complete (all bricks destroyed)
@@ -267,11 +388,44 @@ class GameEngine:
             self.score += 100 * self.level
             # Note: We don't automatically increment level or reset here anymore
             # That will be handled by the frontend when the player clicks "Next Level"
+        
+        self.tick += 1
+    
+    def rollback(self, tick, input_data):
+        """Re-simulate from a past tick with a late-arriving input; returns the number of ticks replayed"""
+        if self.history is None:
+            raise ValueError("Tick history is disabled (set HISTORY_TICKS)")
+        return self.history.rollback(self, tick, input_data)
     
-    def advance_to_next_level(self):
-        """Advance to the next level (called from frontend)"""
+    def submit_inputs(self, entries):
+        """
+        Queue a batch of tick-stamped inputs ([{'tick': n, 'input': {...}}, ...])
+        
+        Inputs for ticks already simulated are rolled back into when the tick
+        history still holds them, and carried into the next tick otherwise.
+        Returns the number of ticks re-simulated; raises ValueError on a
+        malformed batch.
+        """
+        late = self.inputs.submit(parse_entries(entries), self.tick)
+        if not late:
+            return 0
+        
+        history = self.history
+        if history is not None and history.get(late[0][0]) is not None:
+            # Patch every late tick's recorded input, then re-simulate once from the earliest
+            for tick, input_data in late[1:]:
+                history.replace_input(tick, merge_inputs(history.input_for(tick), input_data))
+            tick, input_data = late[0]
+            return self.rollback(tick, merge_inputs(history.input_for(tick), input_data))
+        
+        for _, input_data in late:
+            self.inputs.carry(self.tick, input_data)
+        return 0
+    
+    def advance_to_next_level(self, prototype=None):
+        """Advance to the next level (called from frontend), optionally from its prepared prototype"""
         self.level += 1
-        self.reset_level()
+        self.reset_level(prototype)
     
     def process_input(self, input_data):
         """Process user input"""
@@ -299,7 +453,10 @@ class GameEngine:
     
     def update_lasers(self, dt):
         """Update all lasers"""
-        for laser in self.lasers[:]:
+        # Walk backwards: removal swaps the last (already updated) laser into the freed slot
+        lasers = self.lasers
+        for i in range(len(lasers) - 1, -1, -1):
+            laser = lasers[i]
             laser.update(dt)
             
             # Check if laser is off screen
@@ -310,12 +467,18 @@ class GameEngine:
             # Check laser-brick collisions
             self._check_laser_brick_collisions(laser)
     
-    def _check_laser_brick_collisions(self, laser):
-        """Handle collisions between lasers and bricks"""
-        for brick in self.bricks[:]:
+    def _check_laser_brick_collisions(self, laser, bricks=None):
+        """Handle collisions between lasers and bricks (all of them, or just the given ones in store order)"""
+        if bricks is None:
+            bricks = self._nearby_bricks(laser.rect)
+        if bricks is None:
+            bricks = self.bricks
+        for i in range(len(bricks) - 1, -1, -1):
+            brick = bricks[i]
             if laser.rect.colliderect(brick.rect):
                 # Brick hit by laser
                 brick_broken = brick.hit()
+                self.brick_revision += 1
                 
                 if brick_broken:
                     self._handle_brick_destruction(brick)
@@ -327,7 +490,13 @@ class GameEngine:
     
     def update_balls(self, dt):
         """Update all balls"""
-        for ball in self.balls[:]:
+        if self.vector_balls is not None and self.vector_balls.applies(self):
+            self.vector_balls.update(self, dt)
+            return
+        
+        balls = self.balls
+        for i in range(len(balls) - 1, -1, -1):
+            ball = balls[i]
             # Skip if the ball is not active
             if not ball.active:
                 ball.stick_to_paddle(self.paddle)
@@ -363,14 +532,20 @@ class GameEngine:
                 self.game_over = True
             else:
                 # Just reset ball
-                self.balls = [Ball(self.screen_width, self.screen_height)]
+                self.balls.clear()
+                self.balls.spawn(self.screen_width, self.screen_height, rng=self.random)
         else:
             # Remove just this ball
             self.balls.remove(ball)
     
-    def _check_ball_brick_collisions(self, ball):
-        """Handle collisions between balls and bricks"""
-        for brick in self.bricks[:]:
+    def _check_ball_brick_collisions(self, ball, bricks=None):
+        """Handle collisions between balls and bricks (all of them, or just the given ones in store order)"""
+        if bricks is None:
+            bricks = self._nearby_bricks(ball.rect)
+        if bricks is None:
+            bricks = self.bricks
+        for i in range(len(bricks) - 1, -1, -1):
+            brick = bricks[i]
             if ball.rect.colliderect(brick.rect) and not brick.broken:
                 # Skip collision check if ball has thru ability
                 if not ball.thru:
@@ -378,6 +553,7 @@ class GameEngine:
                 
                 # Damage/Break the brick
                 brick_broken = brick.hit(ball)
+                self.brick_revision += 1
                 
                 if brick_broken:
                     self._handle_brick_destruction(brick)
@@ -398,11 +574,11 @@ class GameEngine:
         # Create powerup - RESPECT EDITOR SETTINGS
         if brick.has_powerup:
             # Editor bricks should always drop their powerup as specified
-            self.powerups.append(Powerup(
+            self.powerups.spawn(
                 brick.x + brick.width // 2 - 15,
                 brick.y + brick.height,
                 brick.powerup_type
-            ))
+            )
             
         # Add score
         self.score += 10 * brick.max_strength
@@ -412,7 +588,9 @@ class GameEngine:
     
     def update_powerups(self, dt):
         """Update all powerups"""
-        for powerup in self.powerups[:]:
+        powerups = self.powerups
+        for i in range(len(powerups) - 1, -1, -1):
+            powerup = powerups[i]
             # Update and check if off screen
             powerup.update(dt)
             if powerup.y > self.screen_height:
@@ -421,9 +599,13 @@ class GameEngine:
                 
             # Check for paddle collision
             if powerup.rect.colliderect(self.paddle.rect) and not powerup.collected:
-                powerup.collected = True
-                self.apply_powerup(powerup)
-                self.powerups.remove(powerup)
+                self._collect_powerup(powerup)
+    
+    def _collect_powerup(self, powerup):
+        """Apply a powerup the paddle caught and remove it"""
+        powerup.collected = True
+        self.apply_powerup(powerup)
+        self.powerups.remove(powerup)
     
     def apply_powerup(self, powerup):
         """Apply a powerup effect"""
@@ -445,13 +627,12 @@ class GameEngine:
             for _ in range(2):
                 # Create a new ball with random direction
                 first_ball = self.balls[0]
-                new_ball = Ball(self.screen_width, self.screen_height)
+                new_ball = self.balls.spawn(self.screen_width, self.screen_height, rng=self.random)
                 new_ball.x = first_ball.x
                 new_ball.y = first_ball.y
-                new_ball.speed_x = first_ball.speed_x * random.uniform(0.8, 1.2)
-                new_ball.speed_y = first_ball.speed_y * random.uniform(0.8, 1.2)
+                new_ball.speed_x = first_ball.speed_x * self.random.uniform(0.8, 1.2)
+                new_ball.speed_y = first_ball.speed_y * self.random.uniform(0.8, 1.2)
                 new_ball.active = True
-                self.balls.append(new_ball)
                 
         elif powerup.type == 3:  # POWERUP_SLOW
             # Slow all balls down
@@ -490,36 +671,42 @@ class GameEngine:
     def create_particles(self, x, y, count=10):
         """Create particles for visual effects"""
         for _ in range(count):
-            angle = random.uniform(0, 2 * math.pi)
-            speed = random.uniform(1, 5)
-            size = random.randint(2, 6)
-            lifetime = random.uniform(0.5, 2.0) * self.fps
+            angle = self.random.uniform(0, 2 * math.pi)
+            speed = self.random.uniform(1, 5)
+            size = self.random.randint(2, 6)
+            lifetime = self.random.uniform(0.5, 2.0) * self.fps
             color = (
-                random.randint(150, 255),
-                random.randint(150, 255),
-                random.randint(150, 255)
+                self.random.randint(150, 255),
+                self.random.randint(150, 255),
+                self.random.randint(150, 255)
             )
             
-            self.particles.append({
-                'x': x,
-                'y': y,
-                'vx': math.cos(angle) * speed,
-                'vy': math.sin(angle) * speed,
-                'size': size,
-                'color': color,
-                'lifetime': lifetime
-            })
+            # Refill an expired particle's dict if there is one
+            particle = self.particle_pool.pop() if self.particle_pool else {}
+            particle['x'] = x
+            particle['y'] = y
+            particle['vx'] = math.cos(angle) * speed
+            particle['vy'] = math.sin(angle) * speed
+            particle['size'] = size
+            particle['color'] = color
+            particle['lifetime'] = lifetime
+            self.particles.append(particle)
     
     def update_particles(self, dt):
         """Update and remove expired particles"""
-        for particle in self.particles[:]:
+        particles = self.particles
+        for i in range(len(particles) - 1, -1, -1):
+            particle = particles[i]
             particle['x'] += particle['vx']
             particle['y'] += particle['vy']
             particle['lifetime'] -= 1
             
-            # Remove expired particles
+            # Remove expired particles (swap the last one into this slot)
             if particle['lifetime'] <= 0:
-                self.particles.remove(particle)
+                last = particles.pop()
+                if last is not particle:
+                    particles[i] = last
+                self.particle_pool.append(particle)
     
     def get_game_state(self):
         """Return the current game state as a dictionary"""
@@ -531,6 +718,7 @@ class GameEngine:
             'game_over': self.game_over,
             'level_complete': self.level_complete,
             'paused': self.paused,
+            'tick': self.tick,
             'is_editor_level': self.is_editor_level,
             'paddle': {
                 'x': self.paddle.x,
@@ -540,6 +728,7 @@ class GameEngine:
                 'laser_active': self.paddle.laser_active
             },
             'balls': [{
+                'id': ball.id,
                 'x': ball.x,
                 'y': ball.y,
                 'size': ball.size,
@@ -547,6 +736,7 @@ class GameEngine:
                 'thru': ball.thru
             } for ball in self.balls],
             'bricks': [{
+                'id': brick.id,
                 'x': brick.x,
                 'y': brick.y,
                 'width': brick.width,
@@ -558,6 +748,7 @@ class GameEngine:
                 'powerup_type': brick.powerup_type if brick.has_powerup else 0
             } for brick in self.bricks],
             'powerups': [{
+                'id': powerup.id,
                 'x': powerup.x,
                 'y': powerup.y,
                 'type': powerup.type,
@@ -565,6 +756,7 @@ class GameEngine:
                 'collected': powerup.collected
             } for powerup in self.powerups],
             'lasers': [{
+                'id': laser.id,
                 'x': laser.x,
                 'y': laser.y,
                 'width': laser.width,
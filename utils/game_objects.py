@@ -6,7 +6,6 @@ This module defines the game objects used in the Brick Breaker game.
 
 import random
 import math
-import time
 
 class Rect:
     """Simple rectangle for collision detection"""
@@ -40,7 +39,9 @@ class Paddle:
         self.laser_active = False
         self.laser_time = 0
         self.laser_cooldown = 0.5  # Seconds between laser shots
-        self.last_laser_time = 0
+        # Simulated seconds (sum of dt), so replaying ticks fires lasers identically
+        self.clock = 0.0
+        self.last_laser_time = -self.laser_cooldown
         self.screen_width = screen_width
         self.move_left = False
         self.move_right = False
@@ -81,33 +82,39 @@ class Paddle:
         # Update rectangle position
         self.rect.x = self.x
         
+        self.clock += dt
+        
         # Countdown laser time
         if self.laser_active:
             self.laser_time -= dt
             if self.laser_time <= 0:
                 self.laser_active = False
     
-    def shoot_laser(self, dt):
-        """Create laser objects if cooldown allows"""
-        current_time = time.time()
-        if self.laser_active and current_time - self.last_laser_time >= self.laser_cooldown:
-            self.last_laser_time = current_time
-            return [
-                Laser(self.x + 12, self.y - 10),
-                Laser(self.x + self.width - 12, self.y - 10)
-            ]
-        return []
+    def shoot_laser(self, dt, lasers):
+        """Spawn a pair of lasers into the laser store if cooldown allows; returns whether it fired"""
+        if self.laser_active and self.clock - self.last_laser_time >= self.laser_cooldown:
+            self.last_laser_time = self.clock
+            lasers.spawn(self.x + 12, self.y - 10)
+            lasers.spawn(self.x + self.width - 12, self.y - 10)
+            return True
+        return False
 
 class Laser:
     """Laser projectile fired from the paddle"""
     
     def __init__(self, x, y):
-        self.x = x
-        self.y = y
         self.speed = 10
         self.width = 3
         self.height = 15
-        self.rect = Rect(self.x, self.y, self.width, self.height)
+        self.rect = Rect(x, y, self.width, self.height)
+        self.reset(x, y)
+    
+    def reset(self, x, y):
+        """Place the laser at its starting point (pooled lasers are reused this way)"""
+        self.x = x
+        self.y = y
+        self.rect.x = x
+        self.rect.y = y
     
     def update(self, dt):
         """Update laser position"""
@@ -117,8 +124,15 @@ class Laser:
 class Ball:
     """Ball that bounces around and breaks bricks"""
     
-    def __init__(self, screen_width, screen_height, x=None, y=None, speed_x=None, speed_y=None):
+    def __init__(self, screen_width, screen_height, x=None, y=None, speed_x=None, speed_y=None, rng=None):
         self.size = 15  # Ball diameter
+        self.rect = Rect(0, 0, self.size, self.size)
+        self.reset(screen_width, screen_height, x, y, speed_x, speed_y, rng)
+    
+    def reset(self, screen_width, screen_height, x=None, y=None, speed_x=None, speed_y=None, rng=None):
+        """Put the ball in its starting state (pooled balls are reused this way)"""
+        rng = rng or random
+        self.size = 15
         self.x = x if x is not None else screen_width // 2
         self.y = y if y is not None else screen_height // 2
         self.screen_width = screen_width
@@ -126,15 +140,18 @@ class Ball:
         
         # If speed is not provided, give a random direction
         if speed_x is None or speed_y is None:
-            angle = random.uniform(math.pi/4, 3*math.pi/4)  # Angle between 45 and 135 degrees
-            speed = random.uniform(4, 5)
+            angle = rng.uniform(math.pi/4, 3*math.pi/4)  # Angle between 45 and 135 degrees
+            speed = rng.uniform(4, 5)
             self.speed_x = speed * math.cos(angle)
             self.speed_y = -speed * math.sin(angle)  # Negative for upward movement
         else:
             self.speed_x = speed_x
             self.speed_y = speed_y
             
-        self.rect = Rect(self.x, self.y, self.size, self.size)
+        self.rect.x = self.x
+        self.rect.y = self.y
+        self.rect.width = self.size
+        self.rect.height = self.size
         self.active = False
         self.thru = False
     
@@ -196,14 +213,21 @@ class Ball:
 class Brick:
     """Breakable brick that can contain a powerup"""
     
-    def __init__(self, x, y, strength=1, powerup_chance=0.3):
+    def __init__(self, x, y, strength=1, powerup_chance=0.3, rng=None):
         self.width = 75
         self.height = 20
+        self.rect = Rect(x, y, self.width, self.height)
+        self.reset(x, y, strength, powerup_chance, rng)
+    
+    def reset(self, x, y, strength=1, powerup_chance=0.3, rng=None):
+        """Put the brick in its starting state (pooled bricks are reused this way)"""
+        rng = rng or random
         self.x = x
         self.y = y
         self.strength = strength  # Number of hits to break
         self.max_strength = strength  # Remember initial strength
-        self.rect = Rect(self.x, self.y, self.width, self.height)
+        self.rect.x = x
+        self.rect.y = y
         self.broken = False
         
         # Initialize powerup properties but don't randomize
@@ -213,9 +237,9 @@ class Brick:
         self.editor_placed = False  # Flag for editor-placed bricks
         
         # Only randomly assign powerups for non-editor bricks if not explicitly set
-        if not self.editor_placed and random.random() < powerup_chance:
+        if powerup_chance and not self.editor_placed and rng.random() < powerup_chance:
             self.has_powerup = True
-            self.powerup_type = random.randint(0, 7)
+            self.powerup_type = rng.randint(0, 7)
     
     def hit(self, ball=None):
         """Reduce brick strength when hit"""
@@ -234,12 +258,18 @@ class Powerup:
     """Collectable powerup that provides special abilities"""
     
     def __init__(self, x, y, powerup_type):
+        self.size = 30
+        self.speed = 3
+        self.rect = Rect(x, y, self.size, self.size)
+        self.reset(x, y, powerup_type)
+    
+    def reset(self, x, y, powerup_type):
+        """Start the powerup falling from a point (pooled powerups are reused this way)"""
         self.x = x
         self.y = y
         self.type = powerup_type
-        self.size = 30
-        self.speed = 3
-        self.rect = Rect(self.x, self.y, self.size, self.size)
+        self.rect.x = x
+        self.rect.y = y
         self.collected = False
         self.angle = 0  # For rotation effect in visual rendering
     
@@ -4,11 +4,39 @@ Game Renderer for Brick Breaker
 This module provides utility functions for rendering game objects.
 It's primarily used for generating preview images of levels or creating
 server-side screenshots of the game state.
+
+PIL is imported on first use so that importing this module (and the Flask
+app) stays cheap for processes that never render.
 """
 
 import io
 import base64
-from PIL import Image, ImageDraw, ImageFont
+
+# Loaded fonts keyed by size
+_font_cache = {}
+
+def _load_pil():
+    """Import and return the PIL modules used for rendering"""
+    from PIL import Image, ImageDraw, ImageFont
+    return Image, ImageDraw, ImageFont
+
+def _load_font(size):
+    """Load (once) the UI font at a given size, falling back to PIL's default font"""
+    font = _font_cache.get(size)
+    if font is None:
+        _, _, ImageFont = _load_pil()
+        try:
+            font = ImageFont.truetype("arial.ttf", size)
+        except IOError:
+            # Fall back to default font
+            font = ImageFont.load_default()
+        _font_cache[size] = font
+    return font
+
+def warm_fonts():
+    """Import PIL and load every font the renderer uses"""
+    for size in (16, 24):
+        _load_font(size)
 
 def generate_level_preview(level_data, width=800, height=400):
     """
@@ -22,18 +50,14 @@ def generate_level_preview(level_data, width=800, height=400):
     Returns:
         Base64 encoded PNG image
     """
+    Image, ImageDraw, _ = _load_pil()
+    
     # Create a new image with black background
     image = Image.new('RGB', (width, height), (0, 0, 30))
     draw = ImageDraw.Draw(image)
     
-    # Try to load a font
-    try:
-        font = ImageFont.truetype("arial.ttf", 16)
-        title_font = ImageFont.truetype("arial.ttf", 24)
-    except IOError:
-        # Fall back to default font
-        font = ImageFont.load_default()
-        title_font = ImageFont.load_default()
+    font = _load_font(16)
+    title_font = _load_font(24)
     
     # Draw level title
     level_name = level_data.get('name', f"Level {level_data.get('id', '1')}")
@@ -80,16 +104,13 @@ def generate_game_screenshot(game_state, width=800, height=600):
     Returns:
         Base64 encoded PNG image
     """
+    Image, ImageDraw, _ = _load_pil()
+    
     # Create a new image with black background
     image = Image.new('RGB', (width, height), (0, 0, 30))
     draw = ImageDraw.Draw(image)
     
-    # Try to load a font
-    try:
-        font = ImageFont.truetype("arial.ttf", 16)
-    except IOError:
-        # Fall back to default font
-        font = ImageFont.load_default()
+    font = _load_font(16)
     
     # Draw UI elements
     # Lives
@@ -0,0 +1,159 @@
+"""
+Garbage collection control for Brick Breaker
+
+Engine ticks allocate lots of short-lived containers (particle dicts,
+game state dicts), so the cyclic collector runs often, and every so often
+it makes a full pass over every tracked object, long-lived ones included.
+Those full passes are the multi-millisecond hitches. GCController does
+three things about that:
+
+- freeze() moves everything alive after warmup (level caches and
+  prototypes, fonts, imported modules) into the permanent generation, so
+  collections stop scanning it. In a pre-fork server, freezing before the
+  fork also keeps the collector from dirtying shared pages.
+- schedule() raises the automatic gen-0 threshold to a backstop and
+  between_ticks() runs the collections that are due (by the normal
+  thresholds) once a response has been sent, not in the middle of a tick.
+- A gc.callbacks hook times every collection into a pause histogram per
+  generation, reported by /admin/metrics.
+"""
+
+import gc
+import time
+
+# Upper bounds (ms) of the pause histogram buckets; a last bucket takes the rest
+PAUSE_BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100)
+
+# While scheduling, automatic gen-0 collections only start this many times
+# later than usual, as a backstop for long stretches without a tick boundary
+BACKSTOP_FACTOR = 20
+
+# Minimum seconds between scheduled full collections. CPython also holds
+# full collections back (until enough objects are new), but that state
+# isn't visible from Python, so a time limit stands in for it.
+FULL_COLLECTION_INTERVAL = 1.0
+
+class GCController:
+    """Freezes warm data, schedules collections and records their pauses"""
+
+    def __init__(self):
+        self.installed = False
+        self.thresholds = None
+        self.frozen = 0
+        self.last_full = 0.0
+        self._started = None
+        self._scheduled = False
+        self.reset()
+
+    def reset(self):
+        """Clear the recorded pauses"""
+        self.histogram = [[0] * (len(PAUSE_BUCKETS_MS) + 1) for _ in range(3)]
+        self.pause_total = [0.0] * 3
+        self.pause_max = [0.0] * 3
+        self.collections = {'automatic': 0, 'scheduled': 0}
+
+    def install(self):
+        """Start timing collections (idempotent)"""
+        if not self.installed:
+            gc.callbacks.append(self._on_collect)
+            self.installed = True
+
+    def uninstall(self):
+        """Stop timing collections"""
+        if self.installed:
+            gc.callbacks.remove(self._on_collect)
+            self.installed = False
+
+    def _on_collect(self, phase, info):
+        """gc.callbacks hook: time each collection"""
+        if phase == 'start':
+            self._started = time.perf_counter()
+            return
+        if self._started is None:
+            return
+        pause = time.perf_counter() - self._started
+        self._started = None
+
+        generation = info['generation']
+        pause_ms = pause * 1000
+        bucket = 0
+        while bucket < len(PAUSE_BUCKETS_MS) and pause_ms > PAUSE_BUCKETS_MS[bucket]:
+            bucket += 1
+        # No lock: a collection can start while this thread holds any lock,
+        # and collections never overlap
+        self.histogram[generation][bucket] += 1
+        self.pause_total[generation] += pause
+        self.pause_max[generation] = max(self.pause_max[generation], pause)
+        self.collections['scheduled' if self._scheduled else 'automatic'] += 1
+
+    def freeze(self):
+        """
+        Collect once, then move every surviving object to the permanent generation
+
+        Call it after warmup, once long-lived data is loaded.
+
+        Returns:
+            Number of objects frozen
+        """
+        gc.collect()
+        gc.freeze()
+        self.frozen = gc.get_freeze_count()
+        return self.frozen
+
+    def schedule(self, backstop_factor=BACKSTOP_FACTOR):
+        """Move collections to between_ticks(), leaving automatic collection as a backstop"""
+        if self.thresholds is None:
+            self.thresholds = gc.get_threshold()
+            gen0, gen1, gen2 = self.thresholds
+            gc.set_threshold(gen0 * backstop_factor, gen1, gen2)
+
+    def unschedule(self):
+        """Restore automatic collection"""
+        if self.thresholds is not None:
+            gc.set_threshold(*self.thresholds)
+            self.thresholds = None
+
+    def between_ticks(self):
+        """
+        Run the collection the normal thresholds call for, if any
+
+        Call it where no tick is running (e.g. after a response is sent).
+        Like the automatic collector, it collects the oldest generation
+        whose count is over its threshold (at most one full collection
+        per FULL_COLLECTION_INTERVAL).
+
+        Returns:
+            Generation collected, or None
+        """
+        if self.thresholds is None:
+            return None
+        counts = gc.get_count()
+        now = time.monotonic()
+        for generation in (2, 1, 0):
+            if generation == 2 and now - self.last_full < FULL_COLLECTION_INTERVAL:
+                continue
+            if counts[generation] > self.thresholds[generation]:
+                if generation == 2:
+                    self.last_full = now
+                self._scheduled = True
+                try:
+                    gc.collect(generation)
+                finally:
+                    self._scheduled = False
+                return generation
+        return None
+
+    def snapshot(self):
+        """Return the pause histogram and collection counts"""
+        return {
+            'buckets_ms': list(PAUSE_BUCKETS_MS),
+            'histogram': {str(generation): list(counts) for generation, counts in enumerate(self.histogram)},
+            'pause_total_ms': [round(total * 1000, 3) for total in self.pause_total],
+            'pause_max_ms': [round(pause * 1000, 3) for pause in self.pause_max],
+            'collections': dict(self.collections),
+            'scheduled': self.thresholds is not None,
+            'frozen': self.frozen
+        }
+
+# The process's collector control
+controller = GCController()
@@ -0,0 +1,169 @@
+"""
+Tick-stamped input queue for Brick Breaker
+
+Clients collect one input dict per frame, stamp each with the tick it
+belongs to and send them in batches (one request per 10-60 frames instead
+of one per frame). The engine keeps them here and applies each one on the
+tick it is stamped with (see GameEngine.submit_inputs and begin_tick).
+
+Batches may arrive twice or out of order:
+
+- an input for a tick that's already queued or was already applied is a
+  duplicate and is ignored
+- an input for a tick the engine has already simulated is late; it is
+  handed back to the engine, which rolls back to that tick when its tick
+  history allows, or otherwise carries it into the next tick (see
+  merge_inputs) so presses aren't lost
+"""
+
+# One-shot flags: a press must be applied once, even when merged into another tick
+EDGE_FLAGS = ('pause_pressed', 'launch_pressed', 'toggle_control_pressed')
+
+# Inputs stamped further ahead of the engine than this are rejected
+MAX_AHEAD = 600
+
+# Ticks of applied inputs remembered to recognise duplicates
+DEFAULT_WINDOW = 600
+
+def merge_inputs(base, newer):
+    """
+    Combine two inputs into one: edge flags from either, anything else from the newer one
+
+    Args:
+        base: Input dict (or None)
+        newer: Input dict (or None) whose held state wins
+
+    Returns:
+        Merged input dict (a new dict)
+    """
+    merged = dict(base or {})
+    for key, value in (newer or {}).items():
+        if key in EDGE_FLAGS:
+            merged[key] = bool(merged.get(key)) or bool(value)
+        else:
+            merged[key] = value
+    return merged
+
+def parse_entries(entries):
+    """
+    Validate a batch of {'tick': int, 'input': dict} entries
+
+    Args:
+        entries: List of entries, as sent by the client
+
+    Returns:
+        List of (tick, input dict) pairs sorted by tick
+
+    Raises:
+        ValueError: if the batch or an entry is malformed
+    """
+    if not isinstance(entries, list):
+        raise ValueError("inputs must be a list")
+
+    parsed = []
+    for entry in entries:
+        if not isinstance(entry, dict):
+            raise ValueError("each input must be an object")
+        tick = entry.get('tick')
+        input_data = entry.get('input', {})
+        if not isinstance(tick, int) or isinstance(tick, bool) or tick < 0:
+            raise ValueError("each input needs a non-negative integer 'tick'")
+        if not isinstance(input_data, dict):
+            raise ValueError("'input' must be an object")
+        parsed.append((tick, input_data))
+    parsed.sort(key=lambda pair: pair[0])
+    return parsed
+
+class InputQueue:
+    """Inputs waiting for their tick, plus the recently applied ones"""
+
+    def __init__(self, max_ahead=MAX_AHEAD, window=DEFAULT_WINDOW):
+        """
+        Args:
+            max_ahead: How far past the current tick inputs may be stamped
+            window: Ticks of applied inputs remembered to recognise duplicates
+        """
+        self.max_ahead = max_ahead
+        self.window = window
+        self.pending = {}
+        self.applied = {}
+        # Ticks whose pending input only holds late inputs carried forward
+        self.carried = set()
+        self.queued = 0
+        self.duplicates = 0
+        self.late = 0
+        self.rejected = 0
+
+    def submit(self, entries, current_tick):
+        """
+        Queue a batch of stamped inputs
+
+        Args:
+            entries: (tick, input dict) pairs, in tick order
+            current_tick: The engine's next tick to simulate
+
+        Returns:
+            List of (tick, input dict) pairs that arrived after their tick
+        """
+        late = []
+        for tick, input_data in entries:
+            if tick in self.carried:
+                # The tick's own input arrived after a late one was carried into it
+                self.carried.discard(tick)
+                self.pending[tick] = merge_inputs(self.pending[tick], input_data)
+                self.queued += 1
+            elif tick in self.pending or tick in self.applied:
+                self.duplicates += 1
+            elif tick >= current_tick:
+                if tick > current_tick + self.max_ahead:
+                    self.rejected += 1
+                    continue
+                self.pending[tick] = input_data
+                self.queued += 1
+            elif tick < current_tick - self.window:
+                # Too old to roll back to or to tell apart from a duplicate
+                self.rejected += 1
+            else:
+                self.applied[tick] = input_data
+                self.late += 1
+                late.append((tick, input_data))
+        return late
+
+    def due(self, tick):
+        """Return whether an input is waiting for the given tick (or an earlier one)"""
+        return bool(self.pending) and min(self.pending) <= tick
+
+    def take(self, tick):
+        """
+        Remove and return the input stamped for a tick (None if there isn't one)
+
+        Inputs left over for earlier ticks (the engine was driven with explicit
+        input on those) are merged in, so their presses still happen.
+        """
+        pending = self.pending
+        if not pending:
+            return None
+        input_data = pending.pop(tick, None)
+        self.carried.discard(tick)
+        if pending and min(pending) < tick:
+            # Newest first, so each older input yields to the ones after it
+            for stale in sorted((t for t in pending if t < tick), reverse=True):
+                input_data = merge_inputs(pending.pop(stale), input_data)
+                self.carried.discard(stale)
+
+        if input_data is not None:
+            self.applied[tick] = input_data
+            if len(self.applied) > 2 * self.window:
+                oldest = tick - self.window
+                for old in [t for t in self.applied if t < oldest]:
+                    del self.applied[old]
+        return input_data
+
+    def carry(self, tick, input_data):
+        """Fold a late input into the one queued for a tick (its held state yields to the queued input)"""
+        if tick not in self.pending:
+            self.carried.add(tick)
+        self.pending[tick] = merge_inputs(input_data, self.pending.get(tick))
+
+    def __len__(self):
+        return len(self.pending)
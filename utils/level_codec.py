@@ -0,0 +1,211 @@
+"""
+Compact tile-grid level encoding for Brick Breaker
+
+Both generate_level and the editor place bricks on a regular grid, so a
+level can be stored as one byte per grid cell instead of a JSON object per
+brick. A .grid file is laid out as (little-endian):
+
+    header    magic 'BBG1', version, flags, cols, rows, grid origin x/y,
+              cell pitch x/y, escape count, metadata length
+    metadata  compact JSON of the level's non-brick fields (id, name, ...)
+    cells     cols * rows bytes, row-major. 0 is an empty cell, otherwise
+              bits 0-2  strength (1-7)
+              bits 3-6  powerup type + 1 (0 = no powerup)
+              bit  7    editor_placed
+    escapes   bricks that don't sit on the grid (or are stronger than 7):
+              x, y (int16), cell byte, strength
+
+Decoding is a slice of the cell bytes plus a scan for non-zero cells.
+Brick fields that don't affect play (e.g. powerup_type on bricks without a
+powerup) are normalized; width/height and row/col are restored when the
+source level had them.
+
+See convert_levels.py for the command-line converter.
+"""
+
+import json
+import struct
+
+MAGIC = b'BBG1'
+VERSION = 1
+EXTENSION = '.grid'
+
+HEADER = struct.Struct('<4sBBBBhhBBHI')  # magic, version, flags, cols, rows, origin x/y, pitch x/y, escapes, meta length
+ESCAPE = struct.Struct('<hhBB')          # x, y, cell byte, strength
+
+FLAG_ROW_COL = 0x1                       # Bricks carried row/col fields
+FLAG_SIZE = 0x2                          # Bricks carried width/height fields
+
+BRICK_WIDTH = 75
+BRICK_HEIGHT = 20
+# Cell pitches used by the editor (no gap) and by generated levels (2px gap)
+PITCHES = [(75, 20), (77, 22)]
+
+MAX_CELL_STRENGTH = 7
+MAX_GRID_CELLS = 255
+
+def _cell_byte(brick):
+    """Pack a brick's strength, powerup and editor flag into one byte (strength may be 0 for escapes)"""
+    strength = int(brick.get('strength', 1))
+    has_powerup = bool(brick.get('has_powerup', False))
+    powerup = (int(brick.get('powerup_type') or 0) + 1) if has_powerup else 0
+    editor = 0x80 if brick.get('editor_placed', False) else 0
+    return (strength if 1 <= strength <= MAX_CELL_STRENGTH else 0) | (powerup << 3) | editor
+
+def _choose_grid(bricks):
+    """
+    Pick the grid origin and pitch that puts the most bricks on cells
+
+    Returns:
+        (origin_x, origin_y, pitch_x, pitch_y)
+    """
+    if not bricks:
+        return 0, 0, PITCHES[0][0], PITCHES[0][1]
+
+    candidates = []
+    for pitch_x, pitch_y in PITCHES:
+        # Respect row/col from the source so they round-trip
+        if all('row' in b and 'col' in b for b in bricks):
+            first = bricks[0]
+            candidates.append((first['x'] - first['col'] * pitch_x, first['y'] - first['row'] * pitch_y,
+                               pitch_x, pitch_y))
+        candidates.append((min(b['x'] for b in bricks), min(b['y'] for b in bricks), pitch_x, pitch_y))
+
+    def on_grid(candidate):
+        origin_x, origin_y, pitch_x, pitch_y = candidate
+        return sum(1 for b in bricks
+                   if (b['x'] - origin_x) % pitch_x == 0 and (b['y'] - origin_y) % pitch_y == 0
+                   and b['x'] >= origin_x and b['y'] >= origin_y)
+
+    return max(candidates, key=on_grid)
+
+def encode_level(level_data):
+    """
+    Encode a level dictionary in the compact grid format
+
+    Args:
+        level_data: Dictionary containing level data
+
+    Returns:
+        Encoded level as bytes
+
+    Raises:
+        ValueError: if a brick position isn't an integer or is out of range
+    """
+    bricks = level_data.get('bricks', [])
+    for brick in bricks:
+        if int(brick['x']) != brick['x'] or int(brick['y']) != brick['y']:
+            raise ValueError(f"Brick position ({brick['x']}, {brick['y']}) is not an integer")
+
+    origin_x, origin_y, pitch_x, pitch_y = _choose_grid(bricks)
+
+    cells = {}
+    escapes = []
+    for brick in bricks:
+        x, y = int(brick['x']), int(brick['y'])
+        col, col_rem = divmod(x - origin_x, pitch_x)
+        row, row_rem = divmod(y - origin_y, pitch_y)
+        strength = int(brick.get('strength', 1))
+        on_grid = (col_rem == 0 and row_rem == 0 and 0 <= col < MAX_GRID_CELLS and 0 <= row < MAX_GRID_CELLS
+                   and 1 <= strength <= MAX_CELL_STRENGTH and (col, row) not in cells)
+        if on_grid:
+            cells[(col, row)] = _cell_byte(brick)
+        else:
+            if not (-32768 <= x <= 32767 and -32768 <= y <= 32767 and 0 <= strength <= 255):
+                raise ValueError(f"Brick at ({x}, {y}) with strength {strength} can't be encoded")
+            escapes.append(ESCAPE.pack(x, y, _cell_byte(brick), strength))
+
+    cols = max((c for c, _ in cells), default=-1) + 1
+    rows = max((r for _, r in cells), default=-1) + 1
+    grid = bytearray(cols * rows)
+    for (col, row), value in cells.items():
+        grid[row * cols + col] = value
+
+    flags = 0
+    if bricks and all('row' in b and 'col' in b for b in bricks):
+        flags |= FLAG_ROW_COL
+    if bricks and all('width' in b and 'height' in b for b in bricks):
+        flags |= FLAG_SIZE
+
+    meta = json.dumps({k: v for k, v in level_data.items() if k != 'bricks'},
+                      separators=(',', ':')).encode('utf-8')
+
+    header = HEADER.pack(MAGIC, VERSION, flags, cols, rows, origin_x, origin_y,
+                         pitch_x, pitch_y, len(escapes), len(meta))
+    return header + meta + bytes(grid) + b''.join(escapes)
+
+def iter_bricks(data):
+    """
+    Iterate the bricks of an encoded level without building dictionaries
+
+    Yields:
+        (x, y, strength, has_powerup, powerup_type, editor_placed, row, col)
+        tuples; row and col are None for off-grid bricks
+    """
+    magic, version, _, cols, rows, origin_x, origin_y, pitch_x, pitch_y, escape_count, meta_len = \
+        HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError('Not a version 1 grid level')
+
+    start = HEADER.size + meta_len
+    grid = data[start:start + cols * rows]
+    for index, value in enumerate(grid):
+        if value:
+            row, col = divmod(index, cols)
+            powerup = (value >> 3) & 0xF
+            yield (origin_x + col * pitch_x, origin_y + row * pitch_y, value & 0x7,
+                   powerup > 0, powerup - 1 if powerup else 0, bool(value & 0x80), row, col)
+
+    offset = start + cols * rows
+    for x, y, value, strength in ESCAPE.iter_unpack(data[offset:offset + escape_count * ESCAPE.size]):
+        powerup = (value >> 3) & 0xF
+        yield (x, y, strength, powerup > 0, powerup - 1 if powerup else 0, bool(value & 0x80), None, None)
+
+def decode_level(data):
+    """
+    Decode a grid-encoded level into the same dictionary shape as a JSON level
+
+    Args:
+        data: Encoded level bytes
+
+    Returns:
+        Dictionary containing level data
+    """
+    _, _, flags, _, _, _, _, _, _, _, meta_len = HEADER.unpack_from(data, 0)
+    level_data = json.loads(data[HEADER.size:HEADER.size + meta_len].decode('utf-8'))
+
+    bricks = []
+    for x, y, strength, has_powerup, powerup_type, editor_placed, row, col in iter_bricks(data):
+        brick = {}
+        if flags & FLAG_ROW_COL and row is not None:
+            brick['row'] = row
+            brick['col'] = col
+        brick['x'] = x
+        brick['y'] = y
+        if flags & FLAG_SIZE:
+            brick['width'] = BRICK_WIDTH
+            brick['height'] = BRICK_HEIGHT
+        brick['strength'] = strength
+        brick['has_powerup'] = has_powerup
+        if has_powerup:
+            brick['powerup_type'] = powerup_type
+        if editor_placed:
+            brick['editor_placed'] = True
+        bricks.append(brick)
+
+    level_data['bricks'] = bricks
+    return level_data
+
+def is_grid_data(data):
+    """Whether bytes start with the grid level magic"""
+    return data[:4] == MAGIC
+
+def normalized_level(level_data):
+    """Game-relevant view of a level (metadata, sorted brick tuples), for round-trip checks"""
+    bricks = sorted(
+        (b['x'], b['y'], int(b.get('strength', 1)), bool(b.get('has_powerup', False)),
+         int(b.get('powerup_type') or 0) if b.get('has_powerup') else 0, bool(b.get('editor_placed', False)))
+        for b in level_data.get('bricks', [])
+    )
+    meta = {k: v for k, v in level_data.items() if k != 'bricks'}
+    return meta, bricks
@@ -0,0 +1,352 @@
+"""
+Incremental level edits for Brick Breaker
+
+Instead of posting the whole level on every save, the editor can PATCH
+/api/editor/levels/<id> with brick operations against the revision it
+last saw:
+
+    {"revision": 7, "ops": [{"op": "add", "row": 3, "col": 4, "strength": 2},
+                            {"op": "remove", "row": 0, "col": 1},
+                            {"op": "strength", "row": 2, "col": 2, "strength": 3},
+                            {"op": "powerup", "row": 2, "col": 2, "powerup_type": 5},
+                            {"op": "name", "name": "Zig Zag"}]}
+
+Levels being edited are kept in memory as LevelDocuments, indexed by
+grid cell. A batch applies only if its revision is the document's current
+one (optimistic concurrency). A stale batch is rejected with the current
+revision, so the client can reload and retry. Batches apply all-or-nothing.
+
+Documents are written to disk by a debounced writer: FLUSH_DELAY seconds
+after the last edit, and at least every MAX_FLUSH_DELAY seconds while
+edits keep coming. The revision is stored in the level file, so it
+survives restarts.
+
+Documents live in the process that received the edits. If another
+process rewrites the level file before a flush (the file's revision has
+moved on), the flush drops the document instead of overwriting that
+change, and the next edit is rejected as stale.
+"""
+
+import copy
+import json
+import os
+import threading
+import time
+
+from . import level_codec, log
+from .level_loader import find_level_file, read_level
+
+# Seconds after the last edit before a document is written
+FLUSH_DELAY = 0.5
+# Longest a document stays unwritten while edits keep arriving
+MAX_FLUSH_DELAY = 5.0
+
+# The editor's grid (see level_editor.js)
+GRID_ORIGIN = (50, 40)
+GRID_COLS = 10
+GRID_ROWS = 20
+
+POWERUP_TYPES = 8
+
+logger = log.get_logger('level_edits')
+
+class EditConflict(Exception):
+    """Raised when edits target a revision other than the level's current one"""
+
+    def __init__(self, revision):
+        super().__init__(f"Level is at revision {revision}")
+        self.revision = revision
+
+def _int_field(op, name, low, high):
+    """Return an integer field of an operation, checking its range"""
+    value = op.get(name)
+    if not isinstance(value, int) or isinstance(value, bool) or not low <= value <= high:
+        raise ValueError(f"'{op.get('op')}' needs an integer '{name}' from {low} to {high}")
+    return value
+
+def _powerup_fields(op, default_type):
+    """Return (has_powerup, powerup_type) from an operation's powerup_type (None for no powerup)"""
+    powerup_type = op.get('powerup_type', default_type)
+    if powerup_type is None:
+        return False, 0
+    return True, _int_field({'op': op.get('op'), 'powerup_type': powerup_type}, 'powerup_type', 0, POWERUP_TYPES - 1)
+
+def grid_brick(row, col, strength, has_powerup=False, powerup_type=0):
+    """Return a brick placed on the editor's grid, as the editor creates it"""
+    return {
+        'row': row,
+        'col': col,
+        'x': GRID_ORIGIN[0] + col * level_codec.BRICK_WIDTH,
+        'y': GRID_ORIGIN[1] + row * level_codec.BRICK_HEIGHT,
+        'width': level_codec.BRICK_WIDTH,
+        'height': level_codec.BRICK_HEIGHT,
+        'strength': strength,
+        'has_powerup': has_powerup,
+        'powerup_type': powerup_type,
+        'editor_placed': True
+    }
+
+class LevelDocument:
+    """A level held in memory while it is edited"""
+
+    def __init__(self, level_id, level_data, path):
+        self.level_id = level_id
+        self.path = path
+        self.data = copy.deepcopy(level_data)
+        self.revision = int(self.data.get('revision', 0))
+        # Revision last read from or written to disk
+        self.saved_revision = self.revision
+        self.first_dirty = None
+        self.last_edit = None
+
+        # Bricks by (row, col); bricks off the editor's grid are kept as they are
+        self.cells = {}
+        self.loose = []
+        for brick in self.data.pop('bricks', []):
+            cell = self._cell(brick)
+            if cell is None or cell in self.cells:
+                self.loose.append(brick)
+            else:
+                self.cells[cell] = brick
+
+    @staticmethod
+    def _cell(brick):
+        """Return the editor grid cell a brick occupies, or None if it's off the grid"""
+        if 'row' in brick and 'col' in brick:
+            return brick['row'], brick['col']
+        col, col_rem = divmod(brick.get('x', 0) - GRID_ORIGIN[0], level_codec.BRICK_WIDTH)
+        row, row_rem = divmod(brick.get('y', 0) - GRID_ORIGIN[1], level_codec.BRICK_HEIGHT)
+        if col_rem or row_rem or not (0 <= col < GRID_COLS and 0 <= row < GRID_ROWS):
+            return None
+        return row, col
+
+    @property
+    def dirty(self):
+        return self.first_dirty is not None
+
+    def apply(self, ops, now=None):
+        """
+        Apply a batch of operations and bump the revision
+
+        Args:
+            ops: List of operation dictionaries
+            now: Current monotonic time (defaults to time.monotonic())
+
+        Raises:
+            ValueError: If any operation is invalid (nothing is applied)
+        """
+        if not isinstance(ops, list):
+            raise ValueError("'ops' must be a list")
+
+        # Work on a copy so a bad operation leaves the document untouched
+        cells = dict(self.cells)
+        name = self.data.get('name')
+        for op in ops:
+            if not isinstance(op, dict):
+                raise ValueError("Each operation must be an object")
+            kind = op.get('op')
+            if kind == 'name':
+                name = op.get('name')
+                if not isinstance(name, str) or not name.strip():
+                    raise ValueError("'name' needs a non-empty 'name'")
+                continue
+
+            cell = (_int_field(op, 'row', 0, GRID_ROWS - 1), _int_field(op, 'col', 0, GRID_COLS - 1))
+            brick = cells.get(cell)
+            if kind == 'add':
+                has_powerup, powerup_type = _powerup_fields(op, None)
+                # Placing on an occupied cell replaces the brick, as in the editor
+                cells.pop(cell, None)
+                cells[cell] = grid_brick(cell[0], cell[1], _int_field(op, 'strength', 1, level_codec.MAX_CELL_STRENGTH),
+                                         has_powerup, powerup_type)
+            elif kind == 'remove':
+                cells.pop(cell, None)
+            elif brick is None:
+                raise ValueError(f"'{kind}' needs a brick at row {cell[0]}, col {cell[1]}")
+            elif kind == 'strength':
+                cells[cell] = dict(brick, strength=_int_field(op, 'strength', 1, level_codec.MAX_CELL_STRENGTH))
+            elif kind == 'powerup':
+                has_powerup, powerup_type = _powerup_fields(op, brick.get('powerup_type', 0))
+                cells[cell] = dict(brick, has_powerup=has_powerup, powerup_type=powerup_type)
+            else:
+                raise ValueError(f"Unknown operation: {kind!r}")
+
+        self.cells = cells
+        self.data['name'] = name
+        self.data['editor_version'] = True
+        self.revision += 1
+
+        now = time.monotonic() if now is None else now
+        if self.first_dirty is None:
+            self.first_dirty = now
+        self.last_edit = now
+
+    def level_data(self):
+        """Return the level as it would be saved"""
+        data = dict(self.data, bricks=list(self.cells.values()) + self.loose)
+        data['revision'] = self.revision
+        return data
+
+    def due(self, now, delay, max_delay):
+        """Return whether the debounced writer should write this document now"""
+        return self.dirty and (now - self.last_edit >= delay or now - self.first_dirty >= max_delay)
+
+class LevelEditStore:
+    """Levels being edited, with a debounced writer that saves them"""
+
+    def __init__(self, levels_dir, pack_path=None, flush_delay=FLUSH_DELAY, max_flush_delay=MAX_FLUSH_DELAY,
+                 on_write=None):
+        """
+        Create an edit store
+
+        Args:
+            levels_dir: Directory level files are read from and written to
+            pack_path: Optional level pack to read levels without a file from
+            flush_delay: Seconds after the last edit before a level is written
+            max_flush_delay: Longest a level stays unwritten while edits keep coming
+            on_write: Optional callable receiving the level ID after each write
+        """
+        self.levels_dir = levels_dir
+        self.pack_path = pack_path
+        self.flush_delay = flush_delay
+        self.max_flush_delay = max_flush_delay
+        self.on_write = on_write
+        self.documents = {}
+        self.lock = threading.RLock()
+        self.timer = None
+        self.writes = 0
+        self.conflicts = 0
+
+    def _disk_revision(self, level_id):
+        """Return (level data, revision) as stored, or (None, 0) if the level doesn't exist"""
+        level_data = read_level(self.levels_dir, level_id, self.pack_path)
+        if level_data is None:
+            return None, 0
+        return level_data, int(level_data.get('revision', 0))
+
+    def _document(self, level_id):
+        """Return the document for a level, loading it on first use (KeyError if there's no such level)"""
+        document = self.documents.get(level_id)
+        if document is None:
+            level_data, _ = self._disk_revision(level_id)
+            if level_data is None:
+                raise KeyError(level_id)
+            path = find_level_file(self.levels_dir, level_id)
+            if path is None or not path.endswith('.json'):
+                # Saved as JSON, which takes precedence over .grid files and packs
+                path = os.path.join(self.levels_dir, f"{level_id}.json")
+            document = LevelDocument(level_id, level_data, path)
+            self.documents[level_id] = document
+        return document
+
+    def apply(self, level_id, revision, ops):
+        """
+        Apply a batch of edits to a level
+
+        Args:
+            level_id: Level ID
+            revision: Revision the edits were made against
+            ops: List of operation dictionaries
+
+        Returns:
+            The level's new revision
+
+        Raises:
+            KeyError: If the level doesn't exist
+            EditConflict: If revision isn't the level's current revision
+            ValueError: If an operation is invalid
+        """
+        with self.lock:
+            document = self._document(level_id)
+            if revision != document.revision:
+                raise EditConflict(document.revision)
+            document.apply(ops)
+            self._schedule(self.flush_delay)
+            return document.revision
+
+    def revision(self, level_id):
+        """Return a level's current revision (0 for levels never saved with one)"""
+        with self.lock:
+            document = self.documents.get(level_id)
+            if document is not None:
+                return document.revision
+            return self._disk_revision(level_id)[1]
+
+    def replace(self, level_id, level_data):
+        """
+        Prepare a whole-level save: drop the level's document and stamp the next revision
+
+        Pending edits are superseded by the saved level.
+
+        Returns:
+            The revision stored in level_data
+        """
+        with self.lock:
+            document = self.documents.pop(level_id, None)
+            current = document.revision if document is not None else self._disk_revision(level_id)[1]
+            level_data['revision'] = current + 1
+            return level_data['revision']
+
+    def flush(self, level_id=None):
+        """Write pending edits now, for one level or every level"""
+        with self.lock:
+            level_ids = [level_id] if level_id is not None else list(self.documents)
+            for key in level_ids:
+                document = self.documents.get(key)
+                if document is not None and document.dirty:
+                    self._write(document)
+
+    def flush_due(self, now=None):
+        """Write documents whose debounce period has passed; return how many were written"""
+        now = time.monotonic() if now is None else now
+        written = 0
+        with self.lock:
+            for document in list(self.documents.values()):
+                if document.due(now, self.flush_delay, self.max_flush_delay):
+                    self._write(document)
+                    written += 1
+        return written
+
+    def _write(self, document):
+        """Save a document's level file, unless another process changed it since it was read"""
+        _, on_disk = self._disk_revision(document.level_id)
+        if on_disk != document.saved_revision:
+            logger.warning("Level changed on disk; dropping unsaved edits", extra={
+                'level_id': document.level_id,
+                'disk_revision': on_disk,
+                'dropped_revision': document.revision
+            })
+            self.documents.pop(document.level_id, None)
+            self.conflicts += 1
+            return
+
+        os.makedirs(os.path.dirname(document.path), exist_ok=True)
+        temp_path = document.path + '.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump(document.level_data(), f, indent=2)
+        os.replace(temp_path, document.path)
+
+        document.saved_revision = document.revision
+        document.first_dirty = document.last_edit = None
+        self.writes += 1
+        if self.on_write is not None:
+            self.on_write(document.level_id)
+
+    def _schedule(self, delay):
+        """Start the writer timer unless one is already pending"""
+        if self.timer is not None:
+            return
+        self.timer = threading.Timer(delay, self._on_timer)
+        self.timer.daemon = True
+        self.timer.start()
+
+    def _on_timer(self):
+        with self.lock:
+            self.timer = None
+            self.flush_due()
+            # Documents still inside their debounce period get another pass
+            now = time.monotonic()
+            waits = [min(document.last_edit + self.flush_delay, document.first_dirty + self.max_flush_delay) - now
+                     for document in self.documents.values() if document.dirty]
+            if waits:
+                self._schedule(max(0.0, min(waits)))
@@ -6,33 +6,181 @@ This module provides functions to load and save level data.
 
 import os
 import json
+import copy
 import random
+from . import level_codec, level_pack, log
 
-def load_level(level_num, levels_dir='levels'):
+logger = log.get_logger('level_loader')
+
+# Level file formats, in order of preference when both exist for a level
+LEVEL_EXTENSIONS = ('.json', level_codec.EXTENSION)
+
+# Parsed level files keyed by path, stored with the file's mtime so edits are
+# picked up. Pre-fork servers warm this before forking so workers share it.
+_level_cache = {}
+
+def read_level_file(level_path):
     """
-    Load a level from a JSON file
+    Read and parse a level file, reusing the cached copy if the file is unchanged
+    
+    Both JSON and compact grid (.grid) level files are supported.
+    
+    Args:
+        level_path: Path to a level file
+        
+    Returns:
+        Dictionary containing level data. It is shared with the cache, so
+        callers that modify it must copy it first.
+    """
+    mtime = os.path.getmtime(level_path)
+    cached = _level_cache.get(level_path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    
+    if level_path.endswith(level_codec.EXTENSION):
+        with open(level_path, 'rb') as f:
+            level_data = level_codec.decode_level(f.read())
+    else:
+        with open(level_path, 'r') as f:
+            level_data = json.load(f)
+    _level_cache[level_path] = (mtime, level_data)
+    return level_data
+
+
+def find_level_file(levels_dir, level_id):
+    """
+    Find the file holding a level, in any supported format
     
     Args:
-        level_num: The level number to load
         levels_dir: Directory containing level files
+        level_id: Level ID (the file name without extension)
         
     Returns:
-        Dictionary containing level data
+        Path to the level file, or None if there isn't one
     """
-    level_file = f"level-{level_num}.json"
-    level_path = os.path.join(levels_dir, level_file)
+    for extension in LEVEL_EXTENSIONS:
+        level_path = os.path.join(levels_dir, level_id + extension)
+        if os.path.exists(level_path):
+            return level_path
+    return None
+
+
+def list_level_files(levels_dir):
+    """
+    List level files in a directory, one per level ID
     
-    if not os.path.exists(level_path):
-        # If level file doesn't exist, generate a level
-        return generate_level(level_num)
+    Args:
+        levels_dir: Directory containing level files
+        
+    Returns:
+        Sorted list of file names (JSON preferred when a level has both formats)
+    """
+    chosen = {}
+    for level_file in os.listdir(levels_dir):
+        level_id, extension = os.path.splitext(level_file)
+        if extension not in LEVEL_EXTENSIONS:
+            continue
+        current = chosen.get(level_id)
+        if current is None or LEVEL_EXTENSIONS.index(extension) < LEVEL_EXTENSIONS.index(os.path.splitext(current)[1]):
+            chosen[level_id] = level_file
+    return sorted(chosen.values())
+
+
+def read_level(levels_dir, level_id, pack_path=None):
+    """
+    Read a level from its file, or from a level pack if there's no file
+    
+    Loose files take precedence so editor saves and generated levels
+    override what the pack holds.
+    
+    Args:
+        levels_dir: Directory containing level files
+        level_id: Level ID
+        pack_path: Optional path to a level pack
+        
+    Returns:
+        Dictionary containing level data (shared with the cache, so copy it
+        before modifying), or None if the level doesn't exist
+    """
+    level_path = find_level_file(levels_dir, level_id)
+    if level_path is not None:
+        return read_level_file(level_path)
+    
+    pack = level_pack.open_pack(pack_path)
+    if pack is not None:
+        return pack.read_level(level_id)
+    return None
+
+
+def list_levels(levels_dir, pack_path=None):
+    """
+    List the IDs of every level in a directory and an optional level pack
     
+    Args:
+        levels_dir: Directory containing level files
+        pack_path: Optional path to a level pack
+        
+    Returns:
+        Sorted list of level IDs
+    """
+    level_ids = set()
+    if os.path.exists(levels_dir):
+        level_ids.update(os.path.splitext(level_file)[0] for level_file in list_level_files(levels_dir))
+    
+    pack = level_pack.open_pack(pack_path)
+    if pack is not None:
+        level_ids.update(pack.level_ids())
+    return sorted(level_ids)
+
+
+def preload_levels(levels_dir='levels'):
+    """
+    Parse every level file in a directory into the level cache
+    
+    Args:
+        levels_dir: Directory containing level files
+        
+    Returns:
+        Number of levels loaded
+    """
+    if not os.path.exists(levels_dir):
+        return 0
+    
+    count = 0
+    for level_file in list_level_files(levels_dir):
+        try:
+            read_level_file(os.path.join(levels_dir, level_file))
+            count += 1
+        except Exception as e:
+            logger.warning("Error preloading level file", extra={'file': level_file, 'error': str(e)})
+    return count
+
+
+def load_level(level_num, levels_dir='levels', pack_path=None):
+    """
+    Load a level from a JSON or grid file, or from a level pack
+    
+    Args:
+        level_num: The level number to load
+        levels_dir: Directory containing level files
+        pack_path: Optional path to a level pack
+        
+    Returns:
+        Dictionary containing level data
+    """
     try:
-        with open(level_path, 'r') as f:
-            level_data = json.load(f)
+        cached = read_level(levels_dir, f"level-{level_num}", pack_path)
+        if cached is None:
+            # If the level doesn't exist, generate a level
+            return generate_level(level_num)
+        
+        # Copy the cached data since editor levels are normalized in place below
+        level_data = copy.deepcopy(cached)
             
         # Check if this is an editor-created level
         if 'editor_version' in level_data and level_data['editor_version']:
-            print(f"Loading editor-created level {level_num}")
+            if __debug__ and log.debug_enabled:
+                logger.debug("Loading editor-created level", extra={'level_id': f"level-{level_num}"})
             # For editor levels, ensure all brick properties are explicit
             if 'bricks' in level_data:
                 for brick in level_data['bricks']:
@@ -47,12 +195,13 @@ def load_level(level_num, levels_dir='levels'):
                     # Mark this brick as editor-placed
                     brick['editor_placed'] = True
         else:
-            print(f"Loading standard level {level_num}")
             # For regular levels, do normal processing
+            if __debug__ and log.debug_enabled:
+                logger.debug("Loading standard level", extra={'level_id': f"level-{level_num}"})
             
         return level_data
     except Exception as e:
-        print(f"Error loading level {level_num}: {e}")
+        logger.error("Error loading level, generating one", extra={'level_id': f"level-{level_num}", 'error': str(e)})
         return generate_level(level_num)
 
 
@@ -0,0 +1,301 @@
+"""
+Level packs for Brick Breaker
+
+A level pack holds many levels in one file so a server with hundreds of
+levels doesn't need a directory scan plus an open() and json.load per
+level. The file is opened once with mmap and any level can be read without
+touching the others. Layout (little-endian):
+
+    header    magic 'BBPK', version, level count, index offset
+    payloads  one encoded level after another (grid encoding when the level
+              fits it, compact JSON otherwise)
+    index     one fixed-size entry per level, sorted by level ID:
+              level ID, payload offset, payload length, encoding, flags
+
+The index is written last so packs can be exported as a stream, one level
+at a time. Lookups binary-search the mapped index directly.
+
+Loose level files in the levels directory take precedence over the pack,
+so editor saves and newly generated levels still work when serving from a
+pack.
+"""
+
+import json
+import mmap
+import os
+import struct
+
+from . import level_codec
+
+MAGIC = b'BBPK'
+VERSION = 1
+EXTENSION = '.pack'
+
+HEADER = struct.Struct('<4sHHIQ')        # magic, version, reserved, level count, index offset
+ENTRY = struct.Struct('<64sQIBB2x')      # level id, payload offset, payload length, encoding, flags
+
+ENCODING_JSON = 0
+ENCODING_GRID = 1
+
+LEVEL_EDITOR = 0x1                       # Entry flag: editor-created level
+
+MAX_ID_BYTES = 64
+
+# Open packs keyed by path, stored with the file's mtime so a replaced pack
+# is picked up. Pre-fork servers open the pack before forking so workers
+# share the mapping.
+_open_packs = {}
+
+class LevelPack:
+    """Random access to the levels in a pack file"""
+
+    def __init__(self, path):
+        """
+        Open and map a pack file
+
+        Args:
+            path: Path to the pack file
+
+        Raises:
+            ValueError: if the file isn't a level pack
+        """
+        self.path = path
+        self.decoded = {}
+
+        with open(path, 'rb') as f:
+            self.mtime = os.fstat(f.fileno()).st_mtime
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, _, count, index_offset = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or version != VERSION:
+            self.map.close()
+            raise ValueError(f"{path} is not a version {VERSION} level pack")
+
+        self.count = count
+        self.index_offset = index_offset
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, level_id):
+        return self._find(level_id) is not None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _entry(self, position):
+        raw_id, offset, length, encoding, flags = ENTRY.unpack_from(
+            self.map, self.index_offset + position * ENTRY.size)
+        return raw_id, offset, length, encoding, flags
+
+    def _find(self, level_id):
+        """Binary-search the index for a level, returning its entry or None"""
+        key = level_id.encode('utf-8')
+        if len(key) > MAX_ID_BYTES:
+            return None
+        key = key.ljust(MAX_ID_BYTES, b'\0')
+
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            entry = self._entry(middle)
+            if entry[0] < key:
+                low = middle + 1
+            elif entry[0] > key:
+                high = middle
+            else:
+                return entry
+        return None
+
+    def level_ids(self):
+        """Return every level ID in the pack, sorted"""
+        return [self._entry(i)[0].rstrip(b'\0').decode('utf-8') for i in range(self.count)]
+
+    def is_editor_level(self, level_id):
+        entry = self._find(level_id)
+        return entry is not None and bool(entry[4] & LEVEL_EDITOR)
+
+    def read_raw(self, level_id):
+        """
+        Return a level's encoded payload without decoding it
+
+        Returns:
+            (encoding, bytes), or None if the pack doesn't hold the level
+        """
+        entry = self._find(level_id)
+        if entry is None:
+            return None
+        _, offset, length, encoding, _ = entry
+        return encoding, self.map[offset:offset + length]
+
+    def read_level(self, level_id):
+        """
+        Decode a level from the pack
+
+        Args:
+            level_id: Level ID
+
+        Returns:
+            Dictionary containing level data, or None if the pack doesn't hold
+            the level. Decoded levels are cached and shared, so callers that
+            modify them must copy them first.
+        """
+        level_data = self.decoded.get(level_id)
+        if level_data is not None:
+            return level_data
+
+        raw = self.read_raw(level_id)
+        if raw is None:
+            return None
+        encoding, payload = raw
+        if encoding == ENCODING_GRID:
+            level_data = level_codec.decode_level(payload)
+        else:
+            level_data = json.loads(payload.decode('utf-8'))
+        self.decoded[level_id] = level_data
+        return level_data
+
+    def iter_levels(self):
+        """Yield (level_id, level data) for every level, decoding one at a time"""
+        for level_id in self.level_ids():
+            yield level_id, self.read_level(level_id)
+
+    def close(self):
+        self.decoded = {}
+        self.map.close()
+
+def open_pack(path):
+    """
+    Return the open pack for a path, reopening it if the file was replaced
+
+    Args:
+        path: Path to the pack file, or None
+
+    Returns:
+        LevelPack, or None if no path is given or the file doesn't exist
+    """
+    if not path:
+        return None
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+
+    pack = _open_packs.get(path)
+    if pack is not None and pack.mtime == mtime:
+        return pack
+
+    # Readers may still hold the old pack, so let it be closed when collected
+    pack = LevelPack(path)
+    _open_packs[path] = pack
+    return pack
+
+def _encode_payload(level_data):
+    """Encode a level as grid data when it fits, else as compact JSON"""
+    try:
+        encoded = level_codec.encode_level(level_data)
+        # Only use the grid when it round-trips exactly
+        if level_codec.normalized_level(level_codec.decode_level(encoded)) == level_codec.normalized_level(level_data):
+            return ENCODING_GRID, encoded
+    except (ValueError, KeyError, TypeError, struct.error):
+        pass
+    return ENCODING_JSON, json.dumps(level_data, separators=(',', ':')).encode('utf-8')
+
+def write_pack(path, levels):
+    """
+    Write levels to a pack file as a stream
+
+    Only the small index is kept in memory; payloads are written as they
+    arrive. The pack is written to a temporary file and moved into place, so
+    servers reading the old pack are never handed a half-written one.
+
+    Args:
+        path: Destination pack path
+        levels: Iterable of (level_id, level data) pairs
+
+    Returns:
+        Number of levels written
+    """
+    entries = {}
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        # Placeholder header, rewritten once the index offset is known
+        f.write(HEADER.pack(MAGIC, VERSION, 0, 0, 0))
+        offset = HEADER.size
+
+        for level_id, level_data in levels:
+            key = level_id.encode('utf-8')
+            if len(key) > MAX_ID_BYTES:
+                print(f"Not packing level {level_id}: ID longer than {MAX_ID_BYTES} bytes")
+                continue
+            encoding, payload = _encode_payload(level_data)
+            flags = LEVEL_EDITOR if level_data.get('editor_version', False) else 0
+            f.write(payload)
+            entries[key] = (offset, len(payload), encoding, flags)
+            offset += len(payload)
+
+        index_offset = offset
+        for key in sorted(entries):
+            f.write(ENTRY.pack(key, *entries[key]))
+
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, VERSION, 0, len(entries), index_offset))
+
+    os.replace(temp_path, path)
+    return len(entries)
+
+def export_pack(levels_dir, path):
+    """
+    Pack every level file in a directory
+
+    Args:
+        levels_dir: Directory containing level files
+        path: Destination pack path
+
+    Returns:
+        Number of levels written
+    """
+    from .level_loader import list_level_files, read_level_file
+
+    def levels():
+        for level_file in list_level_files(levels_dir):
+            level_id = os.path.splitext(level_file)[0]
+            try:
+                yield level_id, read_level_file(os.path.join(levels_dir, level_file))
+            except Exception as e:
+                print(f"Not packing level file {level_file}: {e}")
+
+    return write_pack(path, levels())
+
+def import_pack(path, levels_dir, extension='.json'):
+    """
+    Unpack every level in a pack into individual level files
+
+    Args:
+        path: Pack file to read
+        levels_dir: Directory to write level files into
+        extension: '.json' or '.grid'
+
+    Returns:
+        Number of levels written
+    """
+    if not os.path.exists(levels_dir):
+        os.makedirs(levels_dir)
+
+    count = 0
+    with LevelPack(path) as pack:
+        for level_id in pack.level_ids():
+            encoding, payload = pack.read_raw(level_id)
+            level_path = os.path.join(levels_dir, level_id + extension)
+            if extension == level_codec.EXTENSION:
+                data = payload if encoding == ENCODING_GRID else level_codec.encode_level(json.loads(payload.decode('utf-8')))
+                with open(level_path, 'wb') as f:
+                    f.write(data)
+            else:
+                with open(level_path, 'w') as f:
+                    json.dump(pack.read_level(level_id), f, indent=2)
+            count += 1
+    return count
@@ -0,0 +1,187 @@
+"""
+Background preparation of the next level for Brick Breaker
+
+Advancing used to take two round trips with a blocking load in between:
+POST /api/levels/advance (the engine found, read and compiled the next
+level, or generated one), then GET /api/levels/level-N+1 for the
+client's copy. Now, once a session has few bricks left, the next level is
+prepared on a background worker:
+
+- read from its file or the level pack, or generated and saved the way
+  GET /api/levels/<id> saves missing levels
+- compiled into a LevelPrototype (see level_prototype.py)
+- encoded as a LevelBody (see level_responses.py)
+
+The advance route then takes the prepared level, builds the engine's
+bricks from its prototype and returns the encoded level inline, so the
+transition is one request answered from memory. If the level isn't
+ready, take() waits for the worker or prepares it on the spot.
+
+Prepared levels are shared by every session in the process. Saves drop
+them (invalidate), and take() checks a prepared level is still what
+level_loader reads, so a level changed by another process isn't served.
+"""
+
+import collections
+import concurrent.futures
+import json
+import os
+import threading
+
+from . import level_responses, log
+from .level_loader import read_level, generate_level
+from .level_prototype import get_prototype
+
+# Prepared levels kept before the oldest are dropped
+MAX_PREPARED = 32
+
+logger = log.get_logger('level_prefetch')
+
+class PreparedLevel:
+    """A level ready to play: its parsed data, compiled prototype and encoded body"""
+
+    def __init__(self, level_num, level_data, prototype, body, generated=False):
+        self.level_num = level_num
+        self.level_id = f"level-{level_num}"
+        self.level_data = level_data
+        self.prototype = prototype
+        self.body = body
+        self.generated = generated
+
+class LevelPrefetcher:
+    """Prepares levels on a background thread ahead of the advance that needs them"""
+
+    def __init__(self, levels_dir, pack_path=None, screen_width=800, screen_height=600, max_prepared=MAX_PREPARED):
+        """
+        Create a prefetcher
+
+        Args:
+            levels_dir: Directory level files are read from (and generated levels saved to)
+            pack_path: Optional level pack to read levels without a file from
+            screen_width: Screen width levels are generated for
+            screen_height: Screen height levels are generated for
+            max_prepared: Prepared levels kept before the oldest are dropped
+        """
+        self.levels_dir = levels_dir
+        self.pack_path = pack_path
+        self.screen_width = screen_width
+        self.screen_height = screen_height
+        self.max_prepared = max_prepared
+        # Futures of prepared (or in-flight) levels by level number, oldest first
+        self.prepared = collections.OrderedDict()
+        self.lock = threading.Lock()
+        # Started on first use, so each pre-forked worker gets its own thread
+        self.executor = None
+        self.counts = {'prefetches': 0, 'hits': 0, 'waits': 0, 'misses': 0, 'stale': 0, 'errors': 0}
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        """The worker thread doesn't survive fork(): start over in the child"""
+        self.executor = None
+        self.prepared = collections.OrderedDict()
+        self.lock = threading.Lock()
+
+    def prefetch(self, level_num):
+        """
+        Start preparing a level in the background unless it's already prepared or under way
+
+        Returns:
+            Whether preparation was started
+        """
+        with self.lock:
+            if level_num in self.prepared:
+                return False
+            if self.executor is None:
+                self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix='level-prefetch')
+            self.prepared[level_num] = self.executor.submit(self.prepare, level_num)
+            while len(self.prepared) > self.max_prepared:
+                self.prepared.popitem(last=False)
+            self.counts['prefetches'] += 1
+        return True
+
+    def take(self, level_num):
+        """
+        Return a prepared level, waiting for its preparation or doing it now if needed
+
+        Returns:
+            PreparedLevel, or None if the level couldn't be prepared
+        """
+        with self.lock:
+            future = self.prepared.get(level_num)
+        if future is not None:
+            outcome = 'hits' if future.done() else 'waits'
+            try:
+                prepared = future.result()
+                if read_level(self.levels_dir, prepared.level_id, self.pack_path) is prepared.level_data:
+                    self._count(outcome)
+                    return prepared
+                outcome = 'stale'
+            except Exception as e:
+                outcome = 'errors'
+                logger.warning("Level prefetch failed", extra={'level': level_num, 'error': str(e)})
+            self._count(outcome)
+            with self.lock:
+                if self.prepared.get(level_num) is future:
+                    del self.prepared[level_num]
+        else:
+            self._count('misses')
+
+        try:
+            return self.prepare(level_num)
+        except Exception as e:
+            self._count('errors')
+            logger.error("Error preparing level", extra={'level': level_num, 'error': str(e)})
+            return None
+
+    def _count(self, name):
+        """Add one to a prefetch count"""
+        with self.lock:
+            self.counts[name] += 1
+
+    def prepare(self, level_num):
+        """Read (or generate and save), compile and encode a level; returns a PreparedLevel"""
+        level_id = f"level-{level_num}"
+        level_data = read_level(self.levels_dir, level_id, self.pack_path)
+        generated = level_data is None
+        if generated:
+            level_data = self._generate(level_num)
+
+        prepared = PreparedLevel(level_num, level_data, get_prototype(level_data),
+                                 level_responses.get_body(level_id, level_data)[0], generated)
+        if __debug__ and log.debug_enabled:
+            logger.debug("Prepared level", extra={'level': level_num, 'generated': generated,
+                                                  'bricks': len(prepared.prototype)})
+        return prepared
+
+    def _generate(self, level_num):
+        """Generate a missing level and save it, as GET /api/levels/<id> does, so every process plays the same one"""
+        level_id = f"level-{level_num}"
+        level_data = generate_level(level_num, self.screen_width, self.screen_height)
+        level_data['id'] = level_id
+
+        os.makedirs(self.levels_dir, exist_ok=True)
+        level_path = os.path.join(self.levels_dir, f"{level_id}.json")
+        temp_path = f"{level_path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(level_data, f, indent=2)
+        os.replace(temp_path, level_path)
+
+        # Read it back so the prepared data is the copy level_loader shares (and checks against)
+        return read_level(self.levels_dir, level_id, self.pack_path)
+
+    def invalidate(self, level_num=None):
+        """Drop prepared levels (one, or all of them) after levels change"""
+        with self.lock:
+            if level_num is None:
+                self.prepared.clear()
+            else:
+                self.prepared.pop(level_num, None)
+
+    def snapshot(self):
+        """Return prefetch counts and the hit rate of advances"""
+        counts = dict(self.counts)
+        takes = counts['hits'] + counts['waits'] + counts['misses'] + counts['stale'] + counts['errors']
+        counts['hit_rate'] = counts['hits'] / takes if takes else 0.0
+        counts['prepared'] = len(self.prepared)
+        return counts
@@ -0,0 +1,294 @@
+"""
+Compiled level prototypes for Brick Breaker
+
+Resetting a level used to rebuild it from the parsed level data every
+time: walk the brick dictionaries, construct each Brick (rolling a
+powerup chance that the level data then overrides) and print a line per
+brick. A LevelPrototype does that work once per level. It holds the
+immutable part of a level:
+
+- one (x, y, strength, has_powerup, powerup_type) tuple per brick, with
+  the powerup assignment already resolved
+- a BrickGrid, a uniform-grid spatial index from cell to the bricks that
+  touch it, so collision checks only look at bricks near a ball or laser
+
+GameEngine.load_prototype then only has to fill its brick store from the
+tuples (the mutable portion: strength, broken flag, store slot) and point
+the grid at the new Brick objects.
+
+Prototypes are cached by the identity of the level data they were built
+from. Level files and pack levels are already parsed once and shared (see
+level_loader.read_level_file and LevelPack.read_level), so a prototype
+lives exactly as long as its level is unchanged.
+
+Levels in a shared-memory brick table (see shared_levels) get a
+SharedLevelPrototype instead. Its brick tuples are unpacked from the
+table as they are read, and its grid (packed by pack_grid when the table
+is published) is looked up in the table too. So a pre-forked worker
+holds no per-brick objects for them, however many levels it plays.
+"""
+
+# Side of a grid cell in pixels (bricks are 75x20, balls 10-20)
+CELL_SIZE = 64
+
+# Prototypes kept before the oldest are dropped (edited levels leave stale entries)
+MAX_PROTOTYPES = 256
+
+_prototypes = {}
+
+class BrickGrid:
+    """Uniform grid mapping each cell to the indices of the bricks overlapping it"""
+
+    def __init__(self, bounds, cell_size=CELL_SIZE):
+        """
+        Args:
+            bounds: Sequence of (x, y, width, height) brick rects
+            cell_size: Side of a grid cell in pixels
+        """
+        self.cell_size = cell_size
+        cells = {}
+        for index, (x, y, width, height) in enumerate(bounds):
+            for cell in self._cells(x, y, width, height):
+                cells.setdefault(cell, []).append(index)
+        self.cells = {cell: tuple(indices) for cell, indices in cells.items()}
+
+    def _cells(self, x, y, width, height):
+        """Cells covered by a rect (right and bottom edges are exclusive, as in Rect)"""
+        size = self.cell_size
+        for cell_x in range(int(x // size), int((x + width - 1) // size) + 1):
+            for cell_y in range(int(y // size), int((y + height - 1) // size) + 1):
+                yield cell_x, cell_y
+
+    def query(self, x, y, width, height):
+        """
+        Return the indices of the bricks in the cells a rect covers
+
+        Args:
+            x, y, width, height: Rect to look up
+
+        Returns:
+            Collection of brick indices (a superset of the bricks the rect overlaps)
+        """
+        cells = self.cells
+        found = None
+        for cell in self._cells(x, y, width, height):
+            indices = cells.get(cell)
+            if indices:
+                if found is None:
+                    found = indices
+                else:
+                    found = set(found).union(indices)
+        return found or ()
+
+def pack_grid(bounds, cell_size=CELL_SIZE):
+    """
+    Pack a BrickGrid into 16-bit words for a shared-memory table
+
+    Args:
+        bounds: Sequence of (x, y, width, height) brick rects
+        cell_size: Side of a grid cell in pixels
+
+    Returns:
+        (first cell x, first cell y, columns, rows, words): one (start, count)
+        pair per cell, row by row, then the brick indices the starts point into
+
+    Raises:
+        ValueError: If the grid doesn't fit in 16-bit words
+    """
+    cells = BrickGrid(bounds, cell_size).cells
+    if not cells:
+        return 0, 0, 0, 0, []
+    first_x = min(cell_x for cell_x, _ in cells)
+    first_y = min(cell_y for _, cell_y in cells)
+    columns = max(cell_x for cell_x, _ in cells) - first_x + 1
+    rows = max(cell_y for _, cell_y in cells) - first_y + 1
+
+    ranges = []
+    indices = []
+    for row in range(rows):
+        for column in range(columns):
+            found = cells.get((first_x + column, first_y + row), ())
+            ranges.extend((len(indices), len(found)))
+            indices.extend(found)
+    words = ranges + indices
+    if len(indices) > 0xFFFF or len(bounds) > 0xFFFF or max(columns, rows) > 0xFFFF:
+        raise ValueError('brick grid too large to share')
+    return first_x, first_y, columns, rows, words
+
+class SharedBrickGrid:
+    """BrickGrid lookups against a grid packed into a shared-memory table (see pack_grid)"""
+
+    def __init__(self, table, offset, first_x, first_y, columns, rows, cell_size=CELL_SIZE):
+        """
+        Args:
+            table: SharedLevelTable holding the grid
+            offset: Position of the grid in the table's 16-bit words
+            first_x, first_y, columns, rows: Cells the grid covers
+            cell_size: Side of a grid cell in pixels
+        """
+        self.table = table
+        self.offset = offset
+        self.indices = offset + 2 * columns * rows
+        self.first_x = first_x
+        self.first_y = first_y
+        self.columns = columns
+        self.rows = rows
+        self.cell_size = cell_size
+
+    def query(self, x, y, width, height):
+        """Return the indices of the bricks in the cells a rect covers (as BrickGrid.query does)"""
+        size = self.cell_size
+        columns = self.columns
+        words = self.table.words
+        found = None
+        for column in range(max(0, int(x // size) - self.first_x),
+                            min(columns, int((x + width - 1) // size) - self.first_x + 1)):
+            for row in range(max(0, int(y // size) - self.first_y),
+                             min(self.rows, int((y + height - 1) // size) - self.first_y + 1)):
+                cell = self.offset + 2 * (row * columns + column)
+                count = words[cell + 1]
+                if count:
+                    start = self.indices + words[cell]
+                    indices = words[start:start + count]
+                    if found is None:
+                        found = indices
+                    else:
+                        found = set(found).union(indices)
+        return found or ()
+
+class LevelPrototype:
+    """Immutable, compiled form of a level: brick tuples plus their spatial index"""
+
+    def __init__(self, bricks, is_editor_level=False, brick_width=75, brick_height=20):
+        """
+        Args:
+            bricks: Sequence of (x, y, strength, has_powerup, powerup_type) tuples
+            is_editor_level: Whether the level was made in the editor
+            brick_width, brick_height: Size of every brick
+        """
+        self.bricks = tuple(bricks)
+        self.is_editor_level = is_editor_level
+        self.grid = BrickGrid([(x, y, brick_width, brick_height) for x, y, _, _, _ in self.bricks])
+        # Brick index by position, to re-link bricks restored from a snapshot
+        positions = {}
+        for index, (x, y, _, _, _) in enumerate(self.bricks):
+            positions[(x, y)] = index if (x, y) not in positions else None
+        self.positions = positions
+
+    def __len__(self):
+        return len(self.bricks)
+
+class SharedLevelPrototype:
+    """A LevelPrototype read from a shared-memory brick table, without per-brick objects"""
+
+    def __init__(self, table, level_id):
+        """
+        Args:
+            table: SharedLevelTable holding the level
+            level_id: Level ID
+        """
+        self.table = table
+        self.level_id = level_id
+        self.is_editor_level = table.is_editor_level(level_id)
+        self.grid = table.grid(level_id)
+        self.count = table.brick_count(level_id)
+        self._positions = None
+
+    @property
+    def bricks(self):
+        """(x, y, strength, has_powerup, powerup_type) per brick, unpacked from the table"""
+        return ((x, y, strength, bool(has_powerup), powerup_type if has_powerup else None)
+                for x, y, strength, has_powerup, powerup_type, _ in self.table.bricks(self.level_id))
+
+    @property
+    def positions(self):
+        """Brick index by position, built when a restored engine first needs it"""
+        if self._positions is None:
+            positions = {}
+            for index, (x, y, _, _, _) in enumerate(self.bricks):
+                positions[(x, y)] = index if (x, y) not in positions else None
+            self._positions = positions
+        return self._positions
+
+    def __len__(self):
+        return self.count
+
+def compile_level(level_data):
+    """
+    Compile parsed level data into a LevelPrototype
+
+    Powerups come from the level data, as GameEngine.load_level_data always did.
+
+    Args:
+        level_data: Dictionary containing level data
+
+    Returns:
+        LevelPrototype
+    """
+    bricks = []
+    for brick_data in level_data.get('bricks', []):
+        has_powerup = bool(brick_data.get('has_powerup', False))
+        bricks.append((
+            brick_data['x'],
+            brick_data['y'],
+            brick_data.get('strength', 1),
+            has_powerup,
+            brick_data.get('powerup_type', 0) if has_powerup else None
+        ))
+    return LevelPrototype(bricks, bool(level_data.get('editor_version', False)))
+
+def compile_shared(table, level_id):
+    """
+    Make the prototype of a level held in a shared-memory brick table
+
+    Args:
+        table: SharedLevelTable holding the level
+        level_id: Level ID
+
+    Returns:
+        SharedLevelPrototype
+    """
+    return SharedLevelPrototype(table, level_id)
+
+def get_prototype(level_data):
+    """
+    Return the prototype for parsed level data, compiling it on first use
+
+    Args:
+        level_data: Dictionary containing level data, as shared by the level
+            cache (it must not be modified afterwards)
+
+    Returns:
+        LevelPrototype
+    """
+    return _cached(id(level_data), level_data, lambda: compile_level(level_data))
+
+def get_shared_prototype(table, level_id):
+    """
+    Return the prototype for a level in a shared-memory brick table
+
+    Args:
+        table: SharedLevelTable holding the level
+        level_id: Level ID
+
+    Returns:
+        SharedLevelPrototype
+    """
+    return _cached((id(table), level_id), table, lambda: compile_shared(table, level_id))
+
+def _cached(key, source, build):
+    """Look up a prototype by key, checking it was built from the same source object"""
+    entry = _prototypes.get(key)
+    if entry is not None and entry[0] is source:
+        return entry[1]
+
+    prototype = build()
+    if len(_prototypes) >= MAX_PROTOTYPES:
+        # Dicts keep insertion order, so this drops the oldest entry
+        del _prototypes[next(iter(_prototypes))]
+    _prototypes[key] = (source, prototype)
+    return prototype
+
+def clear_cache():
+    """Forget every compiled prototype"""
+    _prototypes.clear()
@@ -0,0 +1,73 @@
+"""
+Encoded level responses for Brick Breaker
+
+The game and the editor fetch the same levels over and over (every
+restart, every advance). Instead of serializing the level on each
+request, the encoded body is kept per level version together with a
+gzip copy and a strong ETag derived from the content, so repeat requests
+can be answered with 304 Not Modified or a ready-made compressed body.
+
+Entries are tied to the parsed level dictionary they were built from.
+level_loader hands out a new dictionary whenever a level file changes,
+so a stale body is never served. Saving a level also drops the entries
+explicitly (invalidate).
+"""
+
+import gzip
+import hashlib
+import json
+import threading
+
+# Bodies smaller than this aren't worth compressing
+MIN_GZIP_SIZE = 256
+
+# Suffix distinguishing the gzip representation's ETag
+GZIP_ETAG_SUFFIX = '-gzip'
+
+_bodies = {}
+_lock = threading.Lock()
+
+class LevelBody:
+    """A level encoded once: JSON bytes, optional gzip bytes and the ETag of each"""
+
+    def __init__(self, level_data):
+        self.body = json.dumps(level_data, separators=(',', ':')).encode('utf-8')
+        self.etag = hashlib.sha256(self.body).hexdigest()[:32]
+        self.gzip_body = None
+        if len(self.body) >= MIN_GZIP_SIZE:
+            compressed = gzip.compress(self.body, compresslevel=9, mtime=0)
+            if len(compressed) < len(self.body):
+                self.gzip_body = compressed
+        self.gzip_etag = self.etag + GZIP_ETAG_SUFFIX
+
+    def matches(self, tags):
+        """Return whether an If-None-Match header (werkzeug ETags) names either representation"""
+        return tags.contains_weak(self.etag) or tags.contains_weak(self.gzip_etag)
+
+def get_body(level_id, level_data):
+    """
+    Return the encoded body for a level, encoding it on first use
+
+    Args:
+        level_id: Level ID the data was requested as
+        level_data: Parsed level dictionary, as shared by the level cache
+
+    Returns:
+        (LevelBody, whether it came from the cache)
+    """
+    entry = _bodies.get(level_id)
+    if entry is not None and entry[0] is level_data:
+        return entry[1], True
+
+    encoded = LevelBody(level_data)
+    with _lock:
+        _bodies[level_id] = (level_data, encoded)
+    return encoded, False
+
+def invalidate(level_id=None):
+    """Drop the encoded body of one level, or of every level"""
+    with _lock:
+        if level_id is None:
+            _bodies.clear()
+        else:
+            _bodies.pop(level_id, None)
@@ -0,0 +1,162 @@
+"""
+Structured, asynchronous logging for Brick Breaker
+
+Request handlers and engine code log through standard library loggers
+under 'brick_breaker'. Records go onto a queue, and a background thread
+formats them and writes them to stdout, so a slow terminal or pipe never
+blocks a request or a tick. Each record carries structured fields passed
+as `extra` (level_id, duration_ms, ...) plus any fields the context
+providers add (the app adds the session ID). They are written as
+key=value pairs, or as JSON lines with LOG_FORMAT=json.
+
+Debug output on hot paths is guarded so it costs nothing when off:
+
+    if __debug__ and log.debug_enabled:
+        logger.debug("Loaded level", extra={'level_id': level_id})
+
+debug_enabled follows the configured level, and under `python -O` the
+whole block is compiled out.
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+
+ROOT_LOGGER = 'brick_breaker'
+
+# Whether debug records are wanted (see the module docstring for the guard)
+debug_enabled = False
+
+# Callables returning extra fields for the current context (e.g. the session)
+_context_providers = []
+
+_listener = None
+_settings = None
+
+# Attributes every LogRecord has; anything else on a record is a structured field
+_STANDARD_ATTRIBUTES = set(logging.LogRecord('', 0, '', 0, '', (), None).__dict__) | {'message', 'asctime', 'taskName'}
+
+def get_logger(name):
+    """Return the logger for a module (e.g. get_logger('game_engine'))"""
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+def add_context(provider):
+    """Register a callable returning fields (a dict) to add to every record logged"""
+    _context_providers.append(provider)
+
+def fields(record):
+    """Return a record's structured fields"""
+    return {key: value for key, value in record.__dict__.items() if key not in _STANDARD_ATTRIBUTES}
+
+class StructuredFormatter(logging.Formatter):
+    """Formats records as 'time LEVEL logger message key=value ...' or as JSON lines"""
+
+    def __init__(self, json_lines=False):
+        super().__init__()
+        self.json_lines = json_lines
+
+    def format(self, record):
+        message = record.getMessage()
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        time_text = self.formatTime(record, '%Y-%m-%dT%H:%M:%S')
+        name = record.name[len(ROOT_LOGGER) + 1:] if record.name.startswith(ROOT_LOGGER + '.') else record.name
+
+        if self.json_lines:
+            entry = {'time': time_text, 'level': record.levelname, 'logger': name, 'message': message}
+            entry.update(fields(record))
+            if record.exc_text:
+                entry['exception'] = record.exc_text
+            return json.dumps(entry, default=str)
+
+        parts = [time_text, record.levelname, name, message]
+        parts.extend(f"{key}={value}" for key, value in fields(record).items())
+        line = ' '.join(parts)
+        if record.exc_text:
+            line += '\n' + record.exc_text
+        return line
+
+class _ContextHandler(logging.handlers.QueueHandler):
+    """Queue handler that adds context fields on the logging thread, before the record is queued"""
+
+    def prepare(self, record):
+        for provider in _context_providers:
+            try:
+                for key, value in provider().items():
+                    if value is not None and not hasattr(record, key):
+                        setattr(record, key, value)
+            except Exception:
+                pass
+        # The queue never leaves the process, so formatting is left to the
+        # writer thread (QueueHandler would format here, on the caller's time)
+        return record
+
+class _StdoutHandler(logging.StreamHandler):
+    """Writes to whatever sys.stdout is at the time (so redirections apply)"""
+
+    @property
+    def stream(self):
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, value):
+        pass
+
+def setup(level='INFO', fmt='text', handler=None):
+    """
+    Route 'brick_breaker' loggers through a queue to a background writer
+
+    Calling it again replaces the previous setup.
+
+    Args:
+        level: Level name or number (e.g. 'DEBUG')
+        fmt: 'text' for key=value lines or 'json' for JSON lines
+        handler: Handler the background thread writes to (default stdout)
+    """
+    global _listener, _settings, debug_enabled
+    shutdown()
+    _settings = (level, fmt, handler)
+
+    if handler is None:
+        handler = _StdoutHandler()
+    handler.setFormatter(StructuredFormatter(json_lines=(fmt == 'json')))
+
+    records = queue.SimpleQueue()
+    logger = logging.getLogger(ROOT_LOGGER)
+    logger.handlers[:] = [_ContextHandler(records)]
+    logger.propagate = False
+    logger.setLevel(level)
+    debug_enabled = logger.isEnabledFor(logging.DEBUG)
+
+    _listener = logging.handlers.QueueListener(records, handler, respect_handler_level=True)
+    _listener.start()
+
+def set_level(level):
+    """Change the level of every 'brick_breaker' logger"""
+    global debug_enabled
+    logger = logging.getLogger(ROOT_LOGGER)
+    logger.setLevel(level)
+    debug_enabled = logger.isEnabledFor(logging.DEBUG)
+
+def shutdown():
+    """Write out queued records and stop the background writer"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+def _after_fork():
+    """The writer thread doesn't survive fork(): give the child its own queue and thread"""
+    global _listener
+    if _listener is not None:
+        # The parent's thread is gone in the child; don't try to join it
+        _listener = None
+        setup(*_settings)
+
+atexit.register(shutdown)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork)
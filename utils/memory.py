@@ -0,0 +1,369 @@
+"""
+Memory accounting for Brick Breaker
+
+/admin/memory reports roughly how many bytes each subsystem holds: live
+session engines (their bricks, balls, particles, pools and tick history),
+the level caches (parsed files, prototypes, encoded responses, level
+packs), levels open in the editor and prefetched levels. Sizes are
+estimated with sys.getsizeof by walking containers and instance
+dictionaries, counting each object once per report. Objects shared by
+several subsystems are counted in the first one that reaches them.
+
+Reports are cheap enough to take in production. Engines are counted
+with len() alone, and per-object sizes are measured on a sample of them
+(SAMPLE_ENGINES engines, SAMPLE_OBJECTS objects of each kind) and scaled
+by the counts. MemorySampler takes a report every SAMPLE_INTERVAL seconds,
+after a response has been sent, and keeps the totals as metrics gauges.
+
+For finding what grows, AllocationTracer runs tracemalloc on demand and
+diffs snapshots taken at two points in time, grouped by the module in
+utils/ that made each allocation. Tracing slows every allocation and
+costs memory of its own, so it is off until started.
+"""
+
+import collections
+import os
+import sys
+import time
+import tracemalloc
+import types
+
+from . import level_loader, level_pack, level_prototype, level_responses, shared_levels, game_renderer
+from .metrics import metrics
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows
+    resource = None
+
+# Objects of each kind measured per report (the rest are scaled from them)
+SAMPLE_OBJECTS = 16
+# Engines sampled for per-object sizes and per-engine parts
+SAMPLE_ENGINES = 8
+
+# Seconds between periodic reports
+SAMPLE_INTERVAL = 60.0
+
+# Frames kept per traced allocation, so allocations made by the standard
+# library on behalf of utils/ code are attributed to that code
+TRACE_FRAMES = 16
+
+UTILS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Never walked into: shared by everything, and not owned by any subsystem
+_SKIPPED_TYPES = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType,
+                  types.MethodType, types.CodeType)
+# Objects without references worth following
+_LEAF_TYPES = (str, bytes, bytearray, int, float, complex, bool, type(None), memoryview, range)
+
+# Entity stores of an engine, by report part
+ENTITY_PARTS = ('balls', 'bricks', 'powerups', 'lasers')
+
+# (name, provider) pairs, reported in registration order
+_providers = []
+
+class Sizer:
+    """Estimates the bytes objects hold, counting each object once"""
+
+    def __init__(self, sample=SAMPLE_OBJECTS):
+        """
+        Args:
+            sample: Objects measured by average() (None measures them all)
+        """
+        self.seen = set()
+        self.sample = sample
+
+    def size(self, obj):
+        """Return the bytes held by obj and everything it references that wasn't counted yet"""
+        total = 0
+        stack = [obj]
+        seen = self.seen
+        while stack:
+            obj = stack.pop()
+            if id(obj) in seen or isinstance(obj, _SKIPPED_TYPES):
+                continue
+            seen.add(id(obj))
+            total += sys.getsizeof(obj, 0)
+            if isinstance(obj, _LEAF_TYPES):
+                continue
+            if isinstance(obj, dict):
+                # list() copies in one step, so other threads can't change it mid-walk
+                for key, value in list(obj.items()):
+                    stack.append(key)
+                    stack.append(value)
+            elif isinstance(obj, (list, tuple, set, frozenset, collections.deque)):
+                stack.extend(list(obj))
+            else:
+                attributes = getattr(obj, '__dict__', None)
+                if attributes is not None:
+                    stack.append(attributes)
+                for slot in getattr(type(obj), '__slots__', ()):
+                    stack.append(getattr(obj, slot, None))
+        return total
+
+    def average(self, items):
+        """Return the mean size of a sample of like objects (0.0 for none)"""
+        if not items:
+            return 0.0
+        picked = items
+        if self.sample is not None and len(items) > self.sample:
+            picked = items[::len(items) // self.sample][:self.sample]
+        return sum(self.size(item) for item in picked) / len(picked)
+
+def register(name, provider):
+    """
+    Add a subsystem to memory reports
+
+    Args:
+        name: Subsystem name in the report
+        provider: Callable taking a Sizer and returning a dict with 'bytes'
+                  (and any counts worth reporting)
+    """
+    _providers.append((name, provider))
+
+def session_memory(engines, sizer, sample_engines=SAMPLE_ENGINES):
+    """
+    Estimate the memory of a collection of game engines
+
+    Args:
+        engines: Game engines
+        sizer: Sizer for the report
+        sample_engines: Engines whose objects are measured
+
+    Returns:
+        Dictionary with bytes per part and object counts
+    """
+    engines = list(engines)
+    counts = dict.fromkeys(ENTITY_PARTS + ('particles',), 0)
+    for engine in engines:
+        for part in ENTITY_PARTS:
+            store = getattr(engine, part)
+            counts[part] += len(store.items) + len(store.pool)
+        counts['particles'] += len(engine.particles) + len(engine.particle_pool)
+
+    step = max(1, len(engines) // sample_engines)
+    sampled = engines[::step][:sample_engines]
+    parts = {}
+    for part in counts:
+        items = []
+        for engine in sampled:
+            if part == 'particles':
+                items.extend(engine.particles)
+                items.extend(engine.particle_pool)
+            else:
+                store = getattr(engine, part)
+                items.extend(store.items)
+                items.extend(store.pool)
+        parts[part] = int(sizer.average(items) * counts[part])
+
+    # Parts with one instance per engine are measured on the sample and scaled
+    scale = len(engines) / len(sampled) if sampled else 0
+    history = other = 0
+    for engine in sampled:
+        if engine.history is not None:
+            history += sizer.size(engine.history)
+        other += sizer.size([engine.paddle, engine.inputs, engine.vector_balls]) + sys.getsizeof(engine.__dict__)
+    parts['history'] = int(history * scale)
+    parts['other'] = int(other * scale)
+
+    return {'bytes': sum(parts.values()), 'parts': parts, 'engines': len(engines), 'objects': counts}
+
+def _level_files(sizer):
+    return {'bytes': sizer.size(level_loader._level_cache), 'levels': len(level_loader._level_cache)}
+
+def _level_prototypes(sizer):
+    return {'bytes': sizer.size(level_prototype._prototypes), 'prototypes': len(level_prototype._prototypes)}
+
+def _level_responses(sizer):
+    return {'bytes': sizer.size(level_responses._bodies), 'bodies': len(level_responses._bodies)}
+
+def _level_packs(sizer):
+    packs = list(level_pack._open_packs.values())
+    # The mapped file is page cache, shared and reclaimable, so it's reported apart from the heap
+    return {'bytes': sizer.size([pack.decoded for pack in packs]), 'packs': len(packs),
+            'mapped_bytes': sum(len(pack.map) for pack in packs if not pack.map.closed)}
+
+def _shared_levels(sizer):
+    table = shared_levels.get_table()
+    # Shared memory is mapped once for every worker, not allocated per process
+    return {'bytes': 0, 'shared_bytes': table.shm.size if table is not None else 0}
+
+def _renderer(sizer):
+    # Fonts live in FreeType's memory, which getsizeof can't see
+    return {'bytes': sizer.size(game_renderer._font_cache), 'fonts': len(game_renderer._font_cache)}
+
+register('level_files', _level_files)
+register('level_prototypes', _level_prototypes)
+register('level_responses', _level_responses)
+register('level_packs', _level_packs)
+register('shared_levels', _shared_levels)
+register('renderer', _renderer)
+
+def process_memory():
+    """Return the process's resident set size and its peak, in bytes (None where unknown)"""
+    rss = peak = None
+    try:
+        with open('/proc/self/statm') as f:
+            rss = int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        pass
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Kilobytes on Linux, bytes on macOS
+        if sys.platform != 'darwin':
+            peak *= 1024
+    return {'rss_bytes': rss, 'peak_rss_bytes': peak}
+
+def report():
+    """
+    Estimate the memory held by every registered subsystem
+
+    Returns:
+        Dictionary with a report per subsystem, their total, the process's
+        RSS and how long the report took
+    """
+    start = time.perf_counter()
+    sizer = Sizer()
+    subsystems = {}
+    for name, provider in _providers:
+        try:
+            subsystems[name] = provider(sizer)
+        except RuntimeError as e:
+            # A structure changed size under a walk; it's counted next time
+            subsystems[name] = {'bytes': 0, 'error': str(e)}
+    return {
+        'subsystems': subsystems,
+        'accounted_bytes': sum(subsystem['bytes'] for subsystem in subsystems.values()),
+        'process': process_memory(),
+        'duration_ms': round((time.perf_counter() - start) * 1000, 3)
+    }
+
+class MemorySampler:
+    """Takes a memory report every so often and keeps its totals as metrics gauges"""
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        self.interval = interval
+        self.last = None
+        self.last_time = None
+        self.samples = 0
+
+    def maybe_sample(self, now=None):
+        """Take a report if the interval has passed (call it outside ticks, e.g. after a response)"""
+        now = time.monotonic() if now is None else now
+        if not self.interval or (self.last_time is not None and now - self.last_time < self.interval):
+            return None
+        self.last_time = now
+        return self.sample()
+
+    def sample(self):
+        """Take a report now and record its totals"""
+        current = report()
+        for name, subsystem in current['subsystems'].items():
+            metrics.set(f"memory.{name}_bytes", subsystem['bytes'])
+        metrics.set('memory.accounted_bytes', current['accounted_bytes'])
+        if current['process']['rss_bytes'] is not None:
+            metrics.set('memory.rss_bytes', current['process']['rss_bytes'])
+        self.last = current
+        self.samples += 1
+        return current
+
+    def summary(self):
+        """Return the last report's bytes per subsystem (None before the first sample)"""
+        if self.last is None:
+            return None
+        return {
+            'bytes': {name: subsystem['bytes'] for name, subsystem in self.last['subsystems'].items()},
+            'accounted_bytes': self.last['accounted_bytes'],
+            'process': self.last['process'],
+            'duration_ms': self.last['duration_ms'],
+            'age_s': round(time.monotonic() - self.last_time, 1) if self.last_time is not None else None,
+            'samples': self.samples
+        }
+
+def _module_of(traceback):
+    """Return the utils/ module that made an allocation (innermost frame first), or None"""
+    for frame in reversed(traceback):
+        if os.path.dirname(frame.filename) == UTILS_DIR:
+            return os.path.basename(frame.filename)
+    return None
+
+def _by_module(snapshot):
+    """Total (bytes, allocations) of a snapshot's live allocations per utils/ module"""
+    totals = {}
+    for trace in snapshot.traces:
+        module = _module_of(trace.traceback) or '(other)'
+        entry = totals.setdefault(module, [0, 0])
+        entry[0] += trace.size
+        entry[1] += 1
+    return totals
+
+class AllocationTracer:
+    """On-demand tracemalloc snapshots, diffed per utils/ module"""
+
+    def __init__(self, frames=TRACE_FRAMES):
+        self.frames = frames
+        self.baseline = None
+        self.baseline_time = None
+        self.started_here = False
+
+    @property
+    def tracing(self):
+        return tracemalloc.is_tracing()
+
+    def start(self):
+        """Start tracing (if it isn't already) and take the baseline snapshot"""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self.started_here = True
+        self.rebase()
+
+    def rebase(self):
+        """Take a new baseline snapshot"""
+        self.baseline = _by_module(tracemalloc.take_snapshot())
+        self.baseline_time = time.time()
+
+    def diff(self, rebase=False, limit=None):
+        """
+        Compare live allocations now with the baseline, per utils/ module
+
+        Args:
+            rebase: Make this snapshot the next baseline
+            limit: Report only this many modules, largest change first
+
+        Returns:
+            Dictionary with the modules' size and count changes, or None if not tracing
+        """
+        if not tracemalloc.is_tracing() or self.baseline is None:
+            return None
+        current = _by_module(tracemalloc.take_snapshot())
+        modules = []
+        for module in set(current) | set(self.baseline):
+            size, count = current.get(module, (0, 0))
+            old_size, old_count = self.baseline.get(module, (0, 0))
+            modules.append({'module': module, 'size': size, 'size_diff': size - old_size,
+                            'count': count, 'count_diff': count - old_count})
+        modules.sort(key=lambda entry: abs(entry['size_diff']), reverse=True)
+
+        result = {
+            'since': self.baseline_time,
+            'seconds': round(time.time() - self.baseline_time, 3),
+            'modules': modules[:limit] if limit else modules,
+            'tracemalloc_bytes': tracemalloc.get_tracemalloc_memory()
+        }
+        if rebase:
+            self.baseline = current
+            self.baseline_time = time.time()
+        return result
+
+    def stop(self):
+        """Stop tracing (unless something else started it) and drop the baseline"""
+        if self.started_here:
+            tracemalloc.stop()
+            self.started_here = False
+        self.baseline = None
+        self.baseline_time = None
+
+# The process's periodic sampler and allocation tracer
+sampler = MemorySampler()
+tracer = AllocationTracer()
@@ -0,0 +1,48 @@
+"""
+Process-wide counters for Brick Breaker
+
+Request handlers count things here (responses served, cache hits, bytes
+sent) and /admin/metrics reports them. Counters are per process: with
+pre-forked workers, each worker reports its own.
+"""
+
+import threading
+
+class Metrics:
+    """Thread-safe named counters"""
+
+    def __init__(self):
+        self.counters = {}
+        self.lock = threading.Lock()
+
+    def incr(self, name, amount=1):
+        """Add to a counter, creating it at zero"""
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def set(self, name, value):
+        """Set a counter to a value (for gauges sampled now and then, e.g. memory)"""
+        with self.lock:
+            self.counters[name] = value
+
+    def get(self, name):
+        """Return a counter's value (0 if it was never incremented)"""
+        return self.counters.get(name, 0)
+
+    def ratio(self, part, whole):
+        """Return one counter as a fraction of another (0.0 when the whole is 0)"""
+        total = self.get(whole)
+        return self.get(part) / total if total else 0.0
+
+    def snapshot(self):
+        """Return a copy of every counter"""
+        with self.lock:
+            return dict(self.counters)
+
+    def reset(self):
+        """Zero every counter"""
+        with self.lock:
+            self.counters.clear()
+
+# The process's counters
+metrics = Metrics()
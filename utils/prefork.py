@@ -0,0 +1,390 @@
+"""
+Pre-fork server for Brick Breaker
+
+This module runs the Flask app across several worker processes so the
+CPU-heavy engine and PIL rendering can use more than one core.
+
+The master process:
+- warms shared read-only state (parsed levels, fonts) before forking, so
+  workers share those pages copy-on-write, and publishes brick layouts in
+  shared memory (see shared_levels)
+- accepts every connection itself, peeks at the request head for the
+  session ID (bb_session cookie or X-Session-ID header) and passes the
+  socket to the worker that owns that session, so each player's in-memory
+  GameEngine always lives in the same process
+- restarts workers one at a time on SIGHUP, and respawns crashed workers
+
+Requests without a session go to workers round-robin; the worker then
+mints a session ID that hashes back to itself.
+
+Pre-fork mode needs os.fork and socket.send_fds (Linux/macOS).
+"""
+
+import errno
+import os
+import selectors
+import signal
+import socket
+import time
+import zlib
+
+# Index of this process's worker, or None in the master / single-process mode
+current_worker = None
+worker_count = 1
+
+# Largest request head we look at when routing, and how long we wait for it
+PEEK_BYTES = 8192
+PEEK_TIMEOUT = 5.0
+# How long a retiring worker gets to finish in-flight requests
+GRACEFUL_TIMEOUT = 30.0
+
+def worker_for_session(session_id, workers):
+    """Return the index of the worker that owns a session"""
+    return zlib.crc32(session_id.encode('utf-8')) % workers
+
+def owns_session(session_id):
+    """Whether this process should own a session (always true outside pre-fork workers)"""
+    if current_worker is None:
+        return True
+    return worker_for_session(session_id, worker_count) == current_worker
+
+def session_from_request_head(head):
+    """
+    Extract the session ID from raw request head bytes
+
+    Args:
+        head: Bytes of the HTTP request line and headers
+
+    Returns:
+        The session ID, or None if the request doesn't carry one
+    """
+    # Imported here to keep the dependency one-way (session_manager doesn't need us)
+    from .session_manager import SESSION_COOKIE, SESSION_HEADER
+
+    header_name = SESSION_HEADER.lower()
+    for line in head.split(b'\r\n')[1:]:
+        if not line:
+            break
+        name, _, value = line.partition(b':')
+        name = name.strip().lower().decode('latin-1')
+        value = value.strip().decode('latin-1')
+
+        if name == header_name and value:
+            return value
+        if name == 'cookie':
+            for part in value.split(';'):
+                key, _, cookie_value = part.strip().partition('=')
+                if key == SESSION_COOKIE and cookie_value:
+                    return cookie_value
+    return None
+
+def warm_shared_state(levels_dir, level_pack=None):
+    """
+    Load read-only state that workers should share copy-on-write
+
+    The returned shared brick table is owned by the caller, which should
+    close() it when the server stops.
+
+    Args:
+        levels_dir: Directory containing level files
+        level_pack: Optional level pack path to map before forking
+
+    Returns:
+        Dictionary describing what was warmed
+    """
+    from .level_loader import preload_levels
+    from .level_pack import open_pack
+    from .game_renderer import warm_fonts
+    from . import shared_levels
+
+    levels = preload_levels(levels_dir)
+    warm_fonts()
+
+    # Map the level pack once; workers inherit the mapping and share its pages
+    pack = open_pack(level_pack)
+
+    # Publish brick layouts once; forked workers inherit the mapping
+    table = shared_levels.SharedLevelTable.publish(levels_dir)
+    shared_levels.set_table(table)
+    return {'levels': levels, 'level_pack': pack, 'shared_levels': table}
+
+class _Worker:
+    """Master-side handle for one worker process"""
+
+    def __init__(self, index, pid, channel):
+        self.index = index
+        self.pid = pid
+        self.channel = channel
+        self.retired_at = None
+
+class PreforkServer:
+    """Master process that forks workers and routes connections to them"""
+
+    def __init__(self, app, host='127.0.0.1', port=5000, workers=2):
+        self.app = app
+        self.host = host
+        self.port = port
+        self.worker_total = workers
+        self.workers = []
+        self.retiring = []
+        self.listener = None
+        self.selector = None
+        self.pending = {}
+        self.recheck = []
+        self.next_worker = 0
+        self.stopping = False
+        self.restart_requested = False
+
+    def serve_forever(self):
+        """Fork the workers and route connections until SIGTERM/SIGINT"""
+        global worker_count
+        worker_count = self.worker_total
+
+        self.listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.listener.bind((self.host, self.port))
+        self.listener.listen(128)
+        self.listener.setblocking(False)
+
+        for index in range(self.worker_total):
+            self.workers.append(self._spawn_worker(index))
+
+        signal.signal(signal.SIGHUP, self._on_sighup)
+        signal.signal(signal.SIGTERM, self._on_stop)
+        signal.signal(signal.SIGINT, self._on_stop)
+
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(self.listener, selectors.EVENT_READ, None)
+        print(f"Pre-fork master {os.getpid()} serving on {self.host}:{self.port} "
+              f"with {self.worker_total} workers")
+
+        try:
+            while not self.stopping:
+                self._poll()
+                if self.restart_requested:
+                    self.restart_requested = False
+                    self.restart_workers()
+                self._reap_children()
+        finally:
+            self._shutdown()
+
+    def restart_workers(self):
+        """Replace every worker, one at a time, letting old ones finish in-flight requests"""
+        print("Restarting workers...")
+        for index in range(self.worker_total):
+            old = self.workers[index]
+            self.workers[index] = self._spawn_worker(index)
+            self._retire(old)
+
+    # Signal handlers only set flags; the main loop acts on them
+
+    def _on_sighup(self, signum, frame):
+        self.restart_requested = True
+
+    def _on_stop(self, signum, frame):
+        self.stopping = True
+
+    # Worker lifecycle
+
+    def _spawn_worker(self, index):
+        master_end, worker_end = socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+        pid = os.fork()
+        if pid == 0:
+            exit_code = 0
+            try:
+                master_end.close()
+                self.listener.close()
+                for other in self.workers + self.retiring:
+                    other.channel.close()
+                for sock in self.pending:
+                    sock.close()
+                signal.signal(signal.SIGHUP, signal.SIG_DFL)
+                signal.signal(signal.SIGTERM, signal.SIG_DFL)
+                signal.signal(signal.SIGINT, signal.SIG_IGN)
+                _run_worker(self.app, index, self.worker_total, worker_end)
+            except BaseException as e:
+                print(f"Worker {index} crashed: {e}")
+                exit_code = 1
+            finally:
+                os._exit(exit_code)
+
+        worker_end.close()
+        print(f"Started worker {index} (pid {pid})")
+        return _Worker(index, pid, master_end)
+
+    def _retire(self, worker):
+        """Stop routing to a worker; closing its channel tells it to drain and exit"""
+        worker.retired_at = time.time()
+        worker.channel.close()
+        self.retiring.append(worker)
+
+    def _reap_children(self):
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                break
+
+            self.retiring = [w for w in self.retiring if w.pid != pid]
+            for index, worker in enumerate(self.workers):
+                if worker.pid == pid and not self.stopping:
+                    print(f"Worker {index} (pid {pid}) exited unexpectedly, respawning")
+                    worker.channel.close()
+                    self.workers[index] = self._spawn_worker(index)
+
+        # Force out workers that take too long to drain
+        now = time.time()
+        for worker in self.retiring:
+            if now - worker.retired_at > GRACEFUL_TIMEOUT:
+                _kill(worker.pid)
+
+    def _shutdown(self):
+        print("Stopping workers...")
+        for sock in list(self.pending):
+            sock.close()
+        self.pending.clear()
+        for worker in self.workers:
+            self._retire(worker)
+        self.workers = []
+        self.listener.close()
+
+        deadline = time.time() + GRACEFUL_TIMEOUT
+        while self.retiring and time.time() < deadline:
+            self._reap_children()
+            time.sleep(0.05)
+        for worker in self.retiring:
+            _kill(worker.pid)
+        self._reap_children()
+
+    # Connection routing
+
+    def _poll(self):
+        # Re-arm connections whose request head was incomplete last time
+        for sock in self.recheck:
+            if sock in self.pending:
+                self.selector.register(sock, selectors.EVENT_READ, 'client')
+        timeout = 0.01 if self.recheck else 0.5
+        self.recheck = []
+
+        for key, _ in self.selector.select(timeout):
+            if key.data is None:
+                self._accept()
+            else:
+                self._inspect(key.fileobj)
+
+        # Route connections that never sent a complete head
+        now = time.time()
+        for sock, (deadline, _) in list(self.pending.items()):
+            if now > deadline:
+                self._dispatch(sock, None)
+
+    def _accept(self):
+        while True:
+            try:
+                sock, _ = self.listener.accept()
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError as e:
+                if e.errno in (errno.EMFILE, errno.ENFILE):
+                    return
+                raise
+            sock.setblocking(False)
+            self.pending[sock] = (time.time() + PEEK_TIMEOUT, -1)
+            self.selector.register(sock, selectors.EVENT_READ, 'client')
+
+    def _inspect(self, sock):
+        try:
+            head = sock.recv(PEEK_BYTES, socket.MSG_PEEK)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            head = b''
+
+        if not head:
+            # Client went away before sending anything
+            self._forget(sock)
+            sock.close()
+            return
+
+        end = head.find(b'\r\n\r\n')
+        if end >= 0 or len(head) >= PEEK_BYTES:
+            self._dispatch(sock, session_from_request_head(head[:end if end >= 0 else len(head)]))
+            return
+
+        # Incomplete head: stop polling this socket until the next loop pass
+        deadline, _ = self.pending[sock]
+        self.pending[sock] = (deadline, len(head))
+        self.selector.unregister(sock)
+        self.recheck.append(sock)
+
+    def _dispatch(self, sock, session_id):
+        self._forget(sock)
+
+        if session_id:
+            index = worker_for_session(session_id, self.worker_total)
+        else:
+            index = self.next_worker
+            self.next_worker = (self.next_worker + 1) % self.worker_total
+
+        # The worker shares this socket's file description, so restore blocking mode
+        sock.setblocking(True)
+        worker = self.workers[index]
+        try:
+            socket.send_fds(worker.channel, [b'c'], [sock.fileno()])
+        except OSError as e:
+            print(f"Could not hand connection to worker {index}: {e}")
+        finally:
+            sock.close()
+
+    def _forget(self, sock):
+        self.pending.pop(sock, None)
+        try:
+            self.selector.unregister(sock)
+        except (KeyError, ValueError):
+            pass
+
+def _run_worker(app, index, workers, channel):
+    """Worker main loop: receive connections from the master and serve them"""
+    global current_worker, worker_count
+    from werkzeug.serving import ThreadedWSGIServer
+
+    class WorkerServer(ThreadedWSGIServer):
+        # Join request threads on close so retiring workers drain cleanly
+        daemon_threads = False
+        block_on_close = True
+
+    current_worker = index
+    worker_count = workers
+
+    # The server's own listening socket is never used; connections come from the master
+    server = WorkerServer('127.0.0.1', 0, app)
+    server.socket.close()
+
+    try:
+        while True:
+            try:
+                message, fds, _, _ = socket.recv_fds(channel, 16, 1)
+            except InterruptedError:
+                continue
+            if not message:
+                # Master closed our channel: stop taking connections
+                break
+
+            for fd in fds:
+                conn = socket.socket(fileno=fd)
+                try:
+                    address = conn.getpeername()
+                except OSError:
+                    address = ('', 0)
+                server.process_request(conn, address)
+    finally:
+        channel.close()
+        server.server_close()
+
+def _kill(pid):
+    try:
+        os.kill(pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
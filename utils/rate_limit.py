@@ -0,0 +1,172 @@
+"""
+Admission control for Brick Breaker
+
+The API is unauthenticated, and some endpoints are expensive: the level
+list renders a preview per level, previews are PIL renders, and
+requesting an unknown level generates and writes one. A few clients
+hammering those can take every CPU cycle from the sessions playing.
+Two mechanisms keep that in check, and both reject with 429 Too Many
+Requests immediately instead of queueing:
+
+- RateLimiter: a token bucket per (client, route class). Each route class
+  has its own rate and burst, so the game's own endpoints (inputs,
+  advance, level loads) get a generous budget that browsing levels or
+  rendering previews can't use up.
+- ConcurrencyLimit: a cap on expensive operations running at once across
+  all clients. Game routes never take a slot, so however many expensive
+  requests arrive, at most `limit` threads do that work while ticks
+  keep running. A few requests (`queue`) may wait up to `max_wait`
+  seconds for a slot, so players who happen to open the level list at
+  the same time aren't turned away; beyond that they are rejected.
+
+Buckets are per process. With pre-forked workers, sessions stick to one
+worker, but a client without a session cookie may be spread over all of
+them, so its effective rate is up to `workers` times the limit.
+"""
+
+import collections
+import threading
+import time
+
+# Buckets kept before the least recently used are dropped (bounds memory
+# when clients rotate addresses; a dropped client starts with a full bucket)
+MAX_CLIENTS = 10000
+
+class RateLimited(Exception):
+    """Raised when a request is over its rate limit or no expensive-operation slot is free"""
+
+    def __init__(self, route_class, retry_after, reason='rate'):
+        super().__init__(f"Too many requests ({route_class})")
+        self.route_class = route_class
+        self.retry_after = retry_after
+        self.reason = reason
+
+class TokenBucket:
+    """Allows `rate` requests a second on average, and bursts of up to `burst`"""
+
+    __slots__ = ('rate', 'burst', 'tokens', 'updated')
+
+    def __init__(self, rate, burst, now):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def take(self, now):
+        """Take a token; returns 0.0 if one was available, else the seconds until one is"""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+class RateLimiter:
+    """Token buckets per client and route class"""
+
+    def __init__(self, limits, max_clients=MAX_CLIENTS):
+        """
+        Create a rate limiter
+
+        Args:
+            limits: Dictionary of route class -> (requests per second, burst).
+                    Classes not in it aren't limited.
+            max_clients: Buckets kept before the least recently used are dropped
+        """
+        self.limits = dict(limits)
+        self.max_clients = max_clients
+        self.buckets = collections.OrderedDict()
+        self.lock = threading.Lock()
+        self.allowed = collections.Counter()
+        self.rejected = collections.Counter()
+
+    def check(self, client, route_class, now=None):
+        """
+        Count a request against its client's bucket
+
+        Raises:
+            RateLimited: If the bucket is empty
+        """
+        limit = self.limits.get(route_class)
+        if limit is None:
+            return
+        now = time.monotonic() if now is None else now
+        key = (client, route_class)
+        with self.lock:
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                bucket = self.buckets[key] = TokenBucket(limit[0], limit[1], now)
+                if len(self.buckets) > self.max_clients:
+                    self.buckets.popitem(last=False)
+            else:
+                self.buckets.move_to_end(key)
+            wait = bucket.take(now)
+            if wait:
+                self.rejected[route_class] += 1
+                raise RateLimited(route_class, wait)
+            self.allowed[route_class] += 1
+
+    def snapshot(self):
+        """Return allowed and rejected requests per route class"""
+        with self.lock:
+            return {
+                'limits': {route_class: {'rate': rate, 'burst': burst}
+                           for route_class, (rate, burst) in self.limits.items()},
+                'allowed': dict(self.allowed),
+                'rejected': dict(self.rejected),
+                'clients': len(self.buckets)
+            }
+
+class ConcurrencyLimit:
+    """A cap on operations running at once, with a short bounded wait for a slot"""
+
+    def __init__(self, limit, queue=0, max_wait=0.5, route_class='expensive', retry_after=1.0):
+        """
+        Args:
+            limit: Operations allowed to run at once (0 for no cap)
+            queue: Operations allowed to wait for a slot (more are rejected at once)
+            max_wait: Seconds an operation waits for a slot before it is rejected
+            route_class: Name reported in RateLimited errors
+            retry_after: Seconds suggested to rejected clients
+        """
+        self.limit = limit
+        self.queue = queue
+        self.max_wait = max_wait
+        self.route_class = route_class
+        self.retry_after = retry_after
+        self.semaphore = threading.BoundedSemaphore(limit) if limit else None
+        self.lock = threading.Lock()
+        self.running = 0
+        self.waiting = 0
+        self.rejected = 0
+        self.completed = 0
+
+    def __enter__(self):
+        if self.semaphore is not None and not self.semaphore.acquire(blocking=False):
+            with self.lock:
+                wait = self.waiting < self.queue
+                if wait:
+                    self.waiting += 1
+            if wait:
+                acquired = self.semaphore.acquire(timeout=self.max_wait)
+                with self.lock:
+                    self.waiting -= 1
+            if not wait or not acquired:
+                with self.lock:
+                    self.rejected += 1
+                raise RateLimited(self.route_class, self.retry_after, reason='busy')
+        with self.lock:
+            self.running += 1
+        return self
+
+    def __exit__(self, *exc_info):
+        with self.lock:
+            self.running -= 1
+            self.completed += 1
+        if self.semaphore is not None:
+            self.semaphore.release()
+
+    def snapshot(self):
+        """Return the cap, the operations running and waiting, and how many were rejected"""
+        return {'limit': self.limit, 'queue': self.queue, 'running': self.running, 'waiting': self.waiting,
+                'rejected': self.rejected, 'completed': self.completed}
@@ -0,0 +1,200 @@
+"""
+Session manager for Brick Breaker
+
+This module keeps one GameEngine per player session so that concurrent
+players don't share (and overwrite) each other's game state. Engines are
+created lazily the first time a session is used.
+
+With hibernation enabled, engines idle for longer than a timeout (or the
+least recently used ones, beyond a cap on live engines) are snapshotted to
+disk and dropped from memory; the next request for the session restores
+the engine transparently. Idle engines are swept during get(), at most
+once per sweep interval, so no background thread is needed.
+"""
+
+import hashlib
+import os
+import secrets
+import threading
+import time
+
+from . import log
+
+SESSION_COOKIE = 'bb_session'
+SESSION_HEADER = 'X-Session-ID'
+
+SNAPSHOT_EXTENSION = '.snap'
+# Minimum seconds between sweeps for idle engines
+SWEEP_INTERVAL = 5.0
+
+logger = log.get_logger('session_manager')
+
+class SessionManager:
+    """Maps session IDs to live GameEngine instances"""
+
+    def __init__(self, engine_factory, id_filter=None, hibernate_dir=None, idle_timeout=None,
+                 max_live=None, engine_restorer=None):
+        """
+        Create a session manager
+
+        Args:
+            engine_factory: Callable returning a new GameEngine
+            id_filter: Optional predicate a new session ID must satisfy
+                       (pre-fork workers use it to mint IDs that hash to themselves)
+            hibernate_dir: Directory for hibernated sessions (None disables hibernation)
+            idle_timeout: Seconds without a request before an engine is hibernated
+            max_live: Optional cap on engines kept in memory
+            engine_restorer: Callable building an engine from snapshot bytes
+                             (defaults to snapshot.restore_engine with no config)
+        """
+        self.engine_factory = engine_factory
+        self.id_filter = id_filter
+        self.engines = {}
+        self.last_used = {}
+        self.lock = threading.Lock()
+
+        self.hibernate_dir = hibernate_dir
+        self.idle_timeout = idle_timeout
+        self.max_live = max_live
+        self.engine_restorer = engine_restorer
+        self.last_sweep = time.monotonic()
+        self.hibernated_count = 0
+        self.restored_count = 0
+
+    def new_session_id(self):
+        """Generate a new, unused session ID"""
+        while True:
+            session_id = secrets.token_hex(16)
+            if session_id in self.engines:
+                continue
+            if self.id_filter is None or self.id_filter(session_id):
+                return session_id
+
+    def get(self, session_id):
+        """Return the engine for a session, restoring or creating it on first use"""
+        now = time.monotonic()
+        if self.hibernate_dir and now - self.last_sweep >= SWEEP_INTERVAL:
+            self.hibernate_idle(now)
+
+        engine = self.engines.get(session_id)
+        if engine is None:
+            with self.lock:
+                engine = self.engines.get(session_id)
+                if engine is None:
+                    engine = self._restore(session_id) or self.engine_factory()
+                    self.engines[session_id] = engine
+        self.last_used[session_id] = now
+        return engine
+
+    def discard(self, session_id):
+        """Forget a session and its engine, including any hibernated copy"""
+        with self.lock:
+            self.engines.pop(session_id, None)
+            self.last_used.pop(session_id, None)
+            if self.hibernate_dir:
+                try:
+                    os.remove(self._snapshot_path(session_id))
+                except OSError:
+                    pass
+
+    def hibernate_idle(self, now=None):
+        """
+        Snapshot idle engines to disk and drop them from memory
+
+        Args:
+            now: Current time.monotonic() value (defaults to now)
+
+        Returns:
+            Number of engines hibernated
+        """
+        if not self.hibernate_dir:
+            return 0
+        now = time.monotonic() if now is None else now
+
+        with self.lock:
+            self.last_sweep = now
+            idle = []
+            if self.idle_timeout is not None:
+                idle = [session_id for session_id, used in self.last_used.items()
+                        if now - used >= self.idle_timeout and session_id in self.engines]
+
+            # Beyond the cap, hibernate the least recently used engines as well
+            if self.max_live is not None and len(self.engines) - len(idle) > self.max_live:
+                idle_set = set(idle)
+                active = sorted((used, session_id) for session_id, used in self.last_used.items()
+                                if session_id not in idle_set and session_id in self.engines)
+                excess = len(self.engines) - len(idle) - self.max_live
+                idle.extend(session_id for _, session_id in active[:excess])
+
+            for session_id in idle:
+                self.hibernate(session_id)
+            return len(idle)
+
+    def hibernate(self, session_id):
+        """Write one session's engine to disk and drop it from memory (caller holds the lock)"""
+        from .snapshot import snapshot_engine
+
+        engine = self.engines.get(session_id)
+        if engine is None:
+            return False
+
+        path = self._snapshot_path(session_id)
+        try:
+            os.makedirs(self.hibernate_dir, exist_ok=True)
+            temp_path = path + '.tmp'
+            with open(temp_path, 'wb') as f:
+                f.write(snapshot_engine(engine))
+            os.replace(temp_path, path)
+        except OSError as e:
+            # Keep the engine in memory if it can't be written out
+            logger.warning("Could not hibernate session", extra={'session': session_id, 'error': str(e)})
+            return False
+
+        del self.engines[session_id]
+        self.last_used.pop(session_id, None)
+        self.hibernated_count += 1
+        return True
+
+    def _restore(self, session_id):
+        """Load a hibernated engine for a session, or None (caller holds the lock)"""
+        if not self.hibernate_dir:
+            return None
+        path = self._snapshot_path(session_id)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+
+        try:
+            if self.engine_restorer is not None:
+                engine = self.engine_restorer(data)
+            else:
+                from .snapshot import restore_engine
+                engine = restore_engine(data)
+        except Exception as e:
+            logger.warning("Could not restore hibernated session", extra={'session': session_id, 'error': str(e)})
+            engine = None
+
+        # The snapshot is consumed either way; a live engine supersedes it
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        if engine is not None:
+            self.restored_count += 1
+        return engine
+
+    def _snapshot_path(self, session_id):
+        # Session IDs come from clients, so never use them as file names directly
+        name = hashlib.sha256(session_id.encode('utf-8')).hexdigest()[:32]
+        return os.path.join(self.hibernate_dir, name + SNAPSHOT_EXTENSION)
+
+    def is_hibernated(self, session_id):
+        return bool(self.hibernate_dir) and os.path.exists(self._snapshot_path(session_id))
+
+    def __contains__(self, session_id):
+        return session_id in self.engines or self.is_hibernated(session_id)
+
+    def __len__(self):
+        return len(self.engines)
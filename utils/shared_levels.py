@@ -0,0 +1,218 @@
+"""
+Shared-memory brick tables for Brick Breaker
+
+This module publishes the immutable brick layout of every level file once
+into a multiprocessing.shared_memory block, so that pre-forked workers (or
+any process that attaches by name) can build levels without re-reading and
+re-parsing levels/*.json, and without each holding its own parsed copy.
+
+Block layout (little-endian):
+
+    header     magic 'BBSL', version, level count, offset of the records
+    directory  one fixed-size entry per level: level ID, first record,
+               record count, flags, the source file's mtime, and where
+               its grid is and which cells it covers
+    records    one fixed-width record per brick:
+               x, y, strength, has_powerup, powerup_type, flags
+    grids      per level, the BrickGrid packed by level_prototype.pack_grid
+               (16-bit words)
+
+Only per-session mutable state (the Brick objects' strength and broken
+flags) is allocated when a level is loaded from the table. Collision
+lookups read the grid from the table (level_prototype.SharedBrickGrid).
+"""
+
+import os
+import struct
+import sys
+from multiprocessing import shared_memory
+
+from . import log
+
+MAGIC = b'BBSL'
+VERSION = 2
+
+HEADER = struct.Struct('<4sHHII')        # magic, version, reserved, level count, records offset
+ENTRY = struct.Struct('<64sIIIQIhhHH')   # level id, first record, record count, flags, mtime_ns,
+                                         # grid offset (in words), first grid cell x/y, grid columns/rows
+RECORD = struct.Struct('<iiBBBB')        # x, y, strength, has_powerup, powerup_type, flags
+
+LEVEL_EDITOR = 0x1                       # Directory flag: editor-created level
+BRICK_EDITOR_PLACED = 0x1                # Record flag: editor-placed brick
+
+# Size of every brick, for the grid (as in level_prototype.LevelPrototype)
+BRICK_WIDTH = 75
+BRICK_HEIGHT = 20
+
+logger = log.get_logger('shared_levels')
+
+# Table used by GameEngine.load_level in this process, if any
+_active_table = None
+
+def get_table():
+    """Return the shared brick table active in this process, or None"""
+    return _active_table
+
+def set_table(table):
+    """Make a table the one GameEngine.load_level reads from (None to disable)"""
+    global _active_table
+    _active_table = table
+
+class SharedLevelTable:
+    """Read access to a published shared-memory brick table"""
+
+    def __init__(self, shm, owner=False):
+        self.shm = shm
+        self.owner = owner
+        self.view = shm.buf
+
+        magic, version, _, count, records_offset = HEADER.unpack_from(self.view, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Shared memory block {shm.name} is not a version {VERSION} brick table")
+
+        self.records_offset = records_offset
+        # The whole block as 16-bit words, for grid lookups (released by close())
+        self.words = self.view[:len(self.view) // 2 * 2].cast('H')
+        self.directory = {}
+        for i in range(count):
+            raw_id, first, length, flags, mtime_ns, *grid = ENTRY.unpack_from(self.view, HEADER.size + i * ENTRY.size)
+            level_id = raw_id.rstrip(b'\0').decode('utf-8')
+            self.directory[level_id] = (first, length, flags, mtime_ns, tuple(grid))
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    @classmethod
+    def publish(cls, levels_dir='levels', name=None):
+        """
+        Pack every level file in a directory into a new shared memory block
+
+        Args:
+            levels_dir: Directory containing level files
+            name: Optional shared memory name (random if omitted)
+
+        Returns:
+            SharedLevelTable that owns the block
+        """
+        from .level_loader import read_level_file, list_level_files
+        from .level_prototype import pack_grid
+
+        levels = []
+        for level_file in list_level_files(levels_dir) if os.path.exists(levels_dir) else []:
+            level_id = os.path.splitext(level_file)[0]
+            if len(level_id.encode('utf-8')) > 64:
+                continue
+            level_path = os.path.join(levels_dir, level_file)
+            try:
+                mtime_ns = os.stat(level_path).st_mtime_ns
+                level_data = read_level_file(level_path)
+                records = _pack_bricks(level_data)
+                grid = pack_grid([(x, y, BRICK_WIDTH, BRICK_HEIGHT) for x, y, *_ in records])
+            except Exception as e:
+                # Levels we can't represent are simply served from their files
+                logger.warning("Not sharing level", extra={'level': level_file, 'error': str(e)})
+                continue
+            flags = LEVEL_EDITOR if level_data.get('editor_version', False) else 0
+            levels.append((level_id, records, flags, mtime_ns, grid))
+
+        records_offset = HEADER.size + ENTRY.size * len(levels)
+        total_records = sum(len(records) for _, records, _, _, _ in levels)
+        grids_offset = records_offset + RECORD.size * total_records
+        total_words = sum(len(grid[4]) for _, _, _, _, grid in levels)
+        size = max(2, grids_offset + 2 * total_words)
+
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        buf = shm.buf
+        HEADER.pack_into(buf, 0, MAGIC, VERSION, 0, len(levels), records_offset)
+
+        first = 0
+        word = grids_offset // 2
+        for i, (level_id, records, flags, mtime_ns, grid) in enumerate(levels):
+            first_x, first_y, columns, rows, words = grid
+            ENTRY.pack_into(buf, HEADER.size + i * ENTRY.size, level_id.encode('utf-8'), first, len(records),
+                            flags, mtime_ns, word, first_x, first_y, columns, rows)
+            for j, record in enumerate(records):
+                RECORD.pack_into(buf, records_offset + (first + j) * RECORD.size, *record)
+            struct.pack_into(f'<{len(words)}H', buf, 2 * word, *words)
+            first += len(records)
+            word += len(words)
+
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name):
+        """Attach to a table published by another process"""
+        shm = shared_memory.SharedMemory(name=name)
+        if sys.version_info < (3, 13):
+            # Before 3.13 attaching registers the block with this process's
+            # resource tracker, which would unlink it when we exit
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, 'shared_memory')
+        return cls(shm, owner=False)
+
+    def __contains__(self, level_id):
+        return level_id in self.directory
+
+    def __len__(self):
+        return len(self.directory)
+
+    def is_current(self, level_id, level_path):
+        """Whether the table holds this level and the file hasn't changed since publishing"""
+        entry = self.directory.get(level_id)
+        if entry is None:
+            return False
+        try:
+            return os.stat(level_path).st_mtime_ns == entry[3]
+        except OSError:
+            return False
+
+    def is_editor_level(self, level_id):
+        return bool(self.directory[level_id][2] & LEVEL_EDITOR)
+
+    def brick_count(self, level_id):
+        return self.directory[level_id][1]
+
+    def grid(self, level_id):
+        """Return a level's brick grid, read from the table (see level_prototype.SharedBrickGrid)"""
+        from .level_prototype import SharedBrickGrid
+        return SharedBrickGrid(self, *self.directory[level_id][4])
+
+    def bricks(self, level_id):
+        """
+        Iterate a level's brick records without copying the table
+
+        Yields:
+            (x, y, strength, has_powerup, powerup_type, flags) tuples
+        """
+        first, length, _, _, _ = self.directory[level_id]
+        start = self.records_offset + first * RECORD.size
+        return RECORD.iter_unpack(self.view[start:start + length * RECORD.size])
+
+    def close(self):
+        """Detach from the block, unlinking it if this table published it"""
+        self.words.release()
+        self.words = self.view = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+    def __del__(self):
+        # An exported view would stop SharedMemory.__del__ closing the block
+        if getattr(self, 'words', None) is not None:
+            self.words.release()
+
+def _pack_bricks(level_data):
+    """Convert a level's brick dictionaries into record tuples"""
+    records = []
+    for brick in level_data.get('bricks', []):
+        x = brick['x']
+        y = brick['y']
+        if int(x) != x or int(y) != y:
+            raise ValueError('non-integer brick position')
+        has_powerup = bool(brick.get('has_powerup', False))
+        powerup_type = (brick.get('powerup_type') or 0) if has_powerup else 0
+        flags = BRICK_EDITOR_PLACED if brick.get('editor_placed', False) else 0
+        records.append((int(x), int(y), int(brick.get('strength', 1)),
+                        int(has_powerup), int(powerup_type), flags))
+    return records
@@ -0,0 +1,259 @@
+"""
+Engine snapshots for Brick Breaker
+
+This module captures the complete state of a GameEngine (score, lives and
+level, the paddle including its laser timer, balls, remaining bricks,
+falling powerups, lasers and particles) in a compact, versioned binary
+form and restores it into a new engine. The session manager uses it to
+hibernate idle sessions to disk, and the engine's tick history (see
+tick_history) to roll back.
+
+Layout (little-endian):
+
+    header     magic 'BBSS', version, reserved
+    frame      everything that changes from tick to tick:
+               state     lives, score, level, high score, screen size, status flags,
+                         tick and random seed
+               paddle    one fixed-size paddle record
+               counts    number of balls, powerups, lasers and particles
+               next ids  next entity ID for balls, powerups and lasers
+               records   one fixed-size record per object, in that order
+    bricks     brick count and next brick ID, then one fixed-size record per brick
+
+Bricks are a separate section because they rarely change between ticks,
+so the tick history can share one packed copy across many frames.
+
+Ball, powerup, laser and brick records carry the entity's store ID (see
+entity_store), so clients see the same IDs after a restore or rollback.
+Records that hold positions also carry a bitmask of which fields were
+ints, so restored values keep their original types as well as their values.
+
+Restored engines are built without loading a level, so restoring costs
+about as much as snapshotting.
+"""
+
+import struct
+
+from .game_objects import Paddle, Rect
+
+MAGIC = b'BBSS'
+VERSION = 4
+
+HEADER = struct.Struct('<4sHH')          # magic, version, reserved
+STATE = struct.Struct('<iqiqHHBBBBQQ')   # lives, score, level, high score, width, height, game over, complete, paused, editor, tick, seed
+PADDLE = struct.Struct('<10d4BH')        # x, y, width, height, original width, speed, laser time, cooldown, clock, last shot, flags, int mask
+COUNTS = struct.Struct('<4I')            # balls, powerups, lasers, particles
+NEXT_IDS = struct.Struct('<3I')          # next ball, powerup and laser IDs
+BALL = struct.Struct('<I6dHBBB')         # id, x, y, speed x/y, rect x/y, size, active, thru, int mask
+POWERUP = struct.Struct('<IdddBBB')      # id, x, y, angle, type, collected, int mask
+LASER = struct.Struct('<IddB')           # id, x, y, int mask
+PARTICLE = struct.Struct('<4dB3BdB')     # x, y, vx, vy, size, color r/g/b, lifetime, int mask
+BRICK_COUNT = struct.Struct('<II')       # count, next brick ID
+BRICK = struct.Struct('<IddiiBBBBB')     # id, x, y, strength, max strength, has powerup, powerup type, broken, editor placed, int mask
+
+NO_TYPE = 255                            # Stands in for a powerup_type of None
+
+def _int_mask(*values):
+    """Bitmask of which values are ints (bit i for values[i])"""
+    mask = 0
+    for i, value in enumerate(values):
+        if type(value) is int:
+            mask |= 1 << i
+    return mask
+
+def _typed(values, mask):
+    """Undo the float conversion struct applied to the values flagged in mask"""
+    if not mask:
+        return values
+    return [int(value) if mask & (1 << i) else value for i, value in enumerate(values)]
+
+def snapshot_engine(engine):
+    """
+    Capture an engine's full game state
+
+    Args:
+        engine: GameEngine to snapshot
+
+    Returns:
+        Snapshot as bytes
+    """
+    return HEADER.pack(MAGIC, VERSION, 0) + pack_frame(engine) + pack_bricks(engine)
+
+def restore_engine(data, config=None):
+    """
+    Build a GameEngine from a snapshot
+
+    Args:
+        data: Snapshot bytes from snapshot_engine
+        config: Engine configuration (as passed to GameEngine)
+
+    Returns:
+        GameEngine in the captured state
+
+    Raises:
+        ValueError: if the data isn't a snapshot this version can read
+    """
+    from .game_engine import GameEngine
+
+    magic, version, _ = HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"Not a version {VERSION} engine snapshot")
+
+    engine = GameEngine(config, start=False)
+    offset = unpack_frame(engine, data, HEADER.size)
+    unpack_bricks(engine, data, offset)
+    # Randomness from here on depends only on the seed and tick, as it does with a tick history
+    engine.random.seed(engine.seed + engine.tick)
+    return engine
+
+def pack_frame(engine):
+    """Pack everything but the bricks (see the module docstring for the layout)"""
+    paddle = engine.paddle
+    paddle_values = (paddle.x, paddle.y, paddle.width, paddle.height, paddle.original_width, paddle.speed,
+                     paddle.laser_time, paddle.laser_cooldown, paddle.clock, paddle.last_laser_time)
+    parts = [
+        STATE.pack(engine.lives, engine.score, engine.level, engine.high_score,
+                   engine.screen_width, engine.screen_height, engine.game_over,
+                   engine.level_complete, engine.paused, bool(engine.is_editor_level), engine.tick, engine.seed),
+        PADDLE.pack(*paddle_values, paddle.use_mouse, paddle.laser_active, paddle.move_left,
+                    paddle.move_right, _int_mask(*paddle_values)),
+        COUNTS.pack(len(engine.balls), len(engine.powerups), len(engine.lasers), len(engine.particles)),
+        NEXT_IDS.pack(engine.balls.next_id, engine.powerups.next_id, engine.lasers.next_id)
+    ]
+    parts.extend(BALL.pack(b.id, b.x, b.y, b.speed_x, b.speed_y, b.rect.x, b.rect.y, b.size, b.active, b.thru,
+                           _int_mask(b.x, b.y, b.speed_x, b.speed_y, b.rect.x, b.rect.y))
+                 for b in engine.balls)
+    parts.extend(POWERUP.pack(p.id, p.x, p.y, p.angle, NO_TYPE if p.type is None else p.type, p.collected,
+                              _int_mask(p.x, p.y, p.angle))
+                 for p in engine.powerups)
+    parts.extend(LASER.pack(l.id, l.x, l.y, _int_mask(l.x, l.y)) for l in engine.lasers)
+    parts.extend(PARTICLE.pack(p['x'], p['y'], p['vx'], p['vy'], p['size'], *p['color'], p['lifetime'],
+                               _int_mask(p['x'], p['y'], p['vx'], p['vy'], p['lifetime']))
+                 for p in engine.particles)
+    return b''.join(parts)
+
+def pack_bricks(engine):
+    """Pack the engine's bricks"""
+    parts = [BRICK_COUNT.pack(len(engine.bricks), engine.bricks.next_id)]
+    parts.extend(BRICK.pack(b.id, b.x, b.y, b.strength, b.max_strength, b.has_powerup,
+                            NO_TYPE if b.powerup_type is None else b.powerup_type,
+                            b.broken, b.editor_placed, _int_mask(b.x, b.y))
+                 for b in engine.bricks)
+    return b''.join(parts)
+
+def unpack_frame(engine, data, offset=0):
+    """
+    Replace an engine's frame state (everything but the bricks) from packed data
+
+    Returns:
+        Offset just past the frame
+    """
+    (engine.lives, engine.score, engine.level, engine.high_score, width, height,
+     game_over, level_complete, paused, is_editor_level, engine.tick, engine.seed) = STATE.unpack_from(data, offset)
+    offset += STATE.size
+    engine.screen_width = width
+    engine.screen_height = height
+    engine.game_over = bool(game_over)
+    engine.level_complete = bool(level_complete)
+    engine.paused = bool(paused)
+    engine.is_editor_level = bool(is_editor_level)
+
+    record = PADDLE.unpack_from(data, offset)
+    offset += PADDLE.size
+    paddle = Paddle(width, height)
+    (paddle.x, paddle.y, paddle.width, paddle.height, paddle.original_width, paddle.speed,
+     paddle.laser_time, paddle.laser_cooldown, paddle.clock, paddle.last_laser_time) = _typed(record[:10], record[14])
+    paddle.use_mouse = bool(record[10])
+    paddle.laser_active = bool(record[11])
+    paddle.move_left = bool(record[12])
+    paddle.move_right = bool(record[13])
+    paddle.rect = Rect(paddle.x, paddle.y, paddle.width, paddle.height)
+    engine.paddle = paddle
+
+    ball_count, powerup_count, laser_count, particle_count = COUNTS.unpack_from(data, offset)
+    offset += COUNTS.size
+    next_ball_id, next_powerup_id, next_laser_id = NEXT_IDS.unpack_from(data, offset)
+    offset += NEXT_IDS.size
+
+    # Objects come from the engine's pools, so rolling back doesn't allocate them
+    balls = engine.balls
+    balls.clear()
+    for record in _records(BALL, data, offset, ball_count):
+        x, y, speed_x, speed_y, rect_x, rect_y = _typed(record[1:7], record[10])
+        ball = balls.obtain(width, height, x, y, speed_x, speed_y)
+        ball.size = record[7]
+        ball.rect.x = rect_x
+        ball.rect.y = rect_y
+        ball.rect.width = ball.rect.height = ball.size
+        ball.active = bool(record[8])
+        ball.thru = bool(record[9])
+        balls.add(ball, record[0])
+    balls.next_id = next_ball_id
+    offset += BALL.size * ball_count
+
+    powerups = engine.powerups
+    powerups.clear()
+    for powerup_id, x, y, angle, powerup_type, collected, mask in _records(POWERUP, data, offset, powerup_count):
+        x, y, angle = _typed((x, y, angle), mask)
+        powerup = powerups.obtain(x, y, None if powerup_type == NO_TYPE else powerup_type)
+        powerup.angle = angle
+        powerup.collected = bool(collected)
+        powerups.add(powerup, powerup_id)
+    powerups.next_id = next_powerup_id
+    offset += POWERUP.size * powerup_count
+
+    lasers = engine.lasers
+    lasers.clear()
+    for laser_id, x, y, mask in _records(LASER, data, offset, laser_count):
+        lasers.add(lasers.obtain(*_typed((x, y), mask)), laser_id)
+    lasers.next_id = next_laser_id
+    offset += LASER.size * laser_count
+
+    particles = engine.particles
+    pool = engine.particle_pool
+    pool.extend(particles)
+    particles.clear()
+    for x, y, vx, vy, size, r, g, b, lifetime, mask in _records(PARTICLE, data, offset, particle_count):
+        x, y, vx, vy, lifetime = _typed((x, y, vx, vy, lifetime), mask)
+        particle = pool.pop() if pool else {}
+        particle['x'] = x
+        particle['y'] = y
+        particle['vx'] = vx
+        particle['vy'] = vy
+        particle['size'] = size
+        particle['color'] = (r, g, b)
+        particle['lifetime'] = lifetime
+        particles.append(particle)
+    offset += PARTICLE.size * particle_count
+
+    return offset
+
+def unpack_bricks(engine, data, offset=0):
+    """
+    Replace an engine's bricks from packed data
+
+    Returns:
+        Offset just past the bricks
+    """
+    count, next_brick_id = BRICK_COUNT.unpack_from(data, offset)
+    offset += BRICK_COUNT.size
+
+    bricks = engine.bricks
+    bricks.clear()
+    for brick_id, x, y, strength, max_strength, has_powerup, powerup_type, broken, editor_placed, mask in \
+            _records(BRICK, data, offset, count):
+        x, y = _typed((x, y), mask)
+        brick = bricks.obtain(x, y, max_strength, 0.0)
+        brick.strength = strength
+        brick.has_powerup = bool(has_powerup)
+        brick.powerup_type = None if powerup_type == NO_TYPE else powerup_type
+        brick.broken = bool(broken)
+        brick.editor_placed = bool(editor_placed)
+        bricks.add(brick, brick_id)
+    bricks.next_id = next_brick_id
+    engine.relink_bricks()
+    return offset + BRICK.size * count
+
+def _records(record, data, offset, count):
+    """Iterate count fixed-size records starting at offset"""
+    return record.iter_unpack(memoryview(data)[offset:offset + record.size * count])
@@ -0,0 +1,134 @@
+"""
+Tick history for Brick Breaker
+
+This module keeps a ring buffer of the engine's last K ticks: for each tick
+the state it started from (packed with snapshot.pack_frame) and the input
+applied to it. When an input arrives late, the engine rewinds to the tick
+it was meant for and re-simulates forward to the present in one call.
+
+Bricks change far less often than the rest of the state, so their packed
+form is reused across frames until a brick is hit (the engine bumps
+brick_revision), rather than being packed every tick.
+
+Replays are exact because the engine reseeds its own random generator from
+(seed, tick) at the start of every tick while history is enabled, and the
+paddle's laser cooldown runs on the simulated clock instead of wall time.
+"""
+
+from .snapshot import pack_frame, pack_bricks, unpack_frame, unpack_bricks
+
+class TickHistory:
+    """Ring buffer of the last K ticks' starting state and input"""
+
+    def __init__(self, size):
+        """
+        Create an empty history
+
+        Args:
+            size: Number of ticks to keep (K)
+        """
+        self.size = size
+        self.entries = [None] * size
+        self.bricks_key = None
+        self.bricks_data = None
+        self.frames_recorded = 0
+        self.frames_resimulated = 0
+
+    def record(self, engine, dt, input_data):
+        """Store the state the engine's current tick starts from, and its input"""
+        # Reuse the packed bricks until a brick changes (copy-on-write)
+        key = (engine.brick_revision, id(engine.bricks), len(engine.bricks))
+        if key != self.bricks_key:
+            self.bricks_key = key
+            self.bricks_data = pack_bricks(engine)
+
+        self.entries[engine.tick % self.size] = (
+            engine.tick, dt, dict(input_data) if input_data else None,
+            pack_frame(engine), self.bricks_data
+        )
+        self.frames_recorded += 1
+
+    def get(self, tick):
+        """Return the entry for a tick, or None if it isn't in the buffer"""
+        entry = self.entries[tick % self.size]
+        if entry is None or entry[0] != tick:
+            return None
+        return entry
+
+    def oldest_tick(self):
+        """Return the earliest tick that can still be rolled back to, or None"""
+        ticks = [entry[0] for entry in self.entries if entry is not None]
+        return min(ticks) if ticks else None
+
+    def input_for(self, tick):
+        """Return the input recorded for a tick (None if there was none or it's gone)"""
+        entry = self.get(tick)
+        return entry[2] if entry else None
+
+    def replace_input(self, tick, input_data):
+        """
+        Change the input recorded for a past tick (the next rollback through it replays the new one)
+
+        Raises:
+            ValueError: if the tick is no longer in the buffer
+        """
+        entry = self.get(tick)
+        if entry is None:
+            raise ValueError(f"Tick {tick} is not in the history")
+        self.entries[tick % self.size] = (entry[0], entry[1], dict(input_data) if input_data else None,
+                                          entry[3], entry[4])
+
+    def restore(self, engine, tick):
+        """
+        Put the engine back in the state a tick started from
+
+        Raises:
+            ValueError: if the tick is no longer in the buffer
+        """
+        entry = self.get(tick)
+        if entry is None:
+            raise ValueError(f"Tick {tick} is not in the history")
+
+        _, _, _, frame, bricks = entry
+        unpack_frame(engine, frame)
+        unpack_bricks(engine, bricks)
+        engine.tick = tick
+
+        # The restored bricks match the stored packing, so keep sharing it
+        engine.brick_revision += 1
+        self.bricks_key = (engine.brick_revision, id(engine.bricks), len(engine.bricks))
+        self.bricks_data = bricks
+
+    def rollback(self, engine, tick, input_data):
+        """
+        Replace a past tick's input and re-simulate up to the present
+
+        Args:
+            engine: GameEngine this history belongs to
+            tick: Tick the input was meant for (must be before engine.tick)
+            input_data: Input to apply at that tick instead of the recorded one
+
+        Returns:
+            Number of ticks re-simulated
+
+        Raises:
+            ValueError: if the tick isn't in the past or has left the buffer
+        """
+        present = engine.tick
+        if tick >= present:
+            raise ValueError(f"Tick {tick} is not in the past (current tick {present})")
+
+        # Copy the replay inputs out first; re-simulating overwrites the entries
+        replay = []
+        for past in range(tick, present):
+            entry = self.get(past)
+            if entry is None:
+                raise ValueError(f"Tick {past} is not in the history")
+            replay.append((entry[1], entry[2]))
+        replay[0] = (replay[0][0], input_data)
+
+        self.restore(engine, tick)
+        for dt, past_input in replay:
+            engine.update(dt, past_input)
+        self.frames_resimulated += len(replay)
+        return len(replay)
@@ -0,0 +1,160 @@
+"""
+Adaptive tick scheduling for many game engines
+
+Most live sessions aren't doing anything that needs a 60 Hz simulation:
+the game is paused, the ball is still sitting on the paddle, or the
+player is looking at the level-complete or game-over screen. TickScheduler
+classifies every engine on each pass and only ticks what needs it:
+
+- ACTIVE: a ball in flight, powerups, lasers or particles on screen, an
+  active laser, or the paddle moving under keyboard control. Ticked every
+  pass, at full rate.
+- IDLE: the ball rests on the paddle and nothing else moves (the paddle
+  only moves on input). Ticked every
+  idle_interval passes with the time it missed, so timers keep up.
+- PAUSED, FINISHED (level complete or game over): ticked only when input
+  arrives, since engine.update does nothing useful for them otherwise.
+  A paused engine with stamped inputs queued (GameEngine.submit_inputs)
+  is ticked every pass until they run out: its paused frames only count
+  ticks, but that is how it reaches a queued pause press.
+
+Any engine that gets input (passed in, or queued for its current tick) is
+ticked on that pass, whatever its class, so sessions wake immediately.
+Input usually makes them ACTIVE (launching the ball), but only a pause
+press unpauses a paused engine; for anything else, its frame stays
+paused. An idle engine ticked at a low rate ends up in the same state as
+one ticked every pass, except that engine.tick counts the ticks actually
+run.
+
+Engines are counted as ticked only when engine.update simulated a frame;
+paused frames count as skipped.
+"""
+
+ACTIVE = 'active'
+IDLE = 'idle'
+PAUSED = 'paused'
+FINISHED = 'finished'
+
+CLASSES = (ACTIVE, IDLE, PAUSED, FINISHED)
+
+# Idle engines are ticked once every this many passes (10 Hz at 60 FPS)
+DEFAULT_IDLE_INTERVAL = 6
+
+def classify(engine):
+    """
+    Work out how often an engine needs ticking
+
+    Args:
+        engine: GameEngine
+
+    Returns:
+        ACTIVE, IDLE, PAUSED or FINISHED
+    """
+    if engine.paused:
+        return PAUSED
+    if engine.game_over or engine.level_complete:
+        return FINISHED
+
+    paddle = engine.paddle
+    if (engine.lasers or engine.powerups or engine.particles or paddle.laser_active or
+            paddle.move_left or paddle.move_right):
+        return ACTIVE
+    # A ball waiting to be launched is idle once it sits on the paddle (a new one
+    # needs a tick to get there, or a launch would start it from the wrong place)
+    for ball in engine.balls:
+        if ball.active or not _resting(ball, paddle):
+            return ACTIVE
+    return IDLE
+
+def _resting(ball, paddle):
+    """Return whether an inactive ball is where Ball.stick_to_paddle puts it"""
+    return ball.x == paddle.x + paddle.width // 2 - ball.size // 2 and ball.y == paddle.y - ball.size
+
+class TickScheduler:
+    """Ticks a population of GameEngines at a rate that depends on their activity"""
+
+    def __init__(self, idle_interval=DEFAULT_IDLE_INTERVAL, stepper=None):
+        """
+        Args:
+            idle_interval: Passes between ticks of an idle engine
+            stepper: Optional BatchStepper used for the engines ticked at full
+                     rate (otherwise each one's update is called)
+        """
+        self.idle_interval = idle_interval
+        self.stepper = stepper
+        # Time each idle engine has missed since it was last ticked, keyed by id(engine)
+        self.owed = {}
+        self.passes = 0
+        self.ticked = dict.fromkeys(CLASSES, 0)
+        self.skipped = dict.fromkeys(CLASSES, 0)
+
+    def step(self, engines, dt, inputs=None):
+        """
+        Run one scheduling pass (call it once per frame)
+
+        Args:
+            engines: Sequence of GameEngines
+            dt: Frame time in seconds
+            inputs: Optional sequence of input dicts (or None), one per engine
+
+        Returns:
+            Number of engines that simulated a frame
+        """
+        inputs = inputs if inputs is not None else [None] * len(engines)
+        owed = self.owed
+        full_rate = []
+        full_rate_inputs = []
+        ticked = 0
+
+        for engine, input_data in zip(engines, inputs):
+            kind = classify(engine)
+            if kind == ACTIVE:
+                full_rate.append(engine)
+                full_rate_inputs.append(input_data)
+                self.ticked[kind] += 1
+                continue
+
+            key = id(engine)
+            if kind == IDLE:
+                # Stagger idle engines so their ticks spread over the interval
+                due = (self.passes + key // 16) % self.idle_interval == 0
+                elapsed = owed.get(key, 0.0) + dt
+            else:
+                # Paused engines work through queued inputs to reach an unpause
+                due = kind == PAUSED and bool(engine.inputs)
+                elapsed = dt
+
+            if due or input_data or engine.inputs.due(engine.tick):
+                owed.pop(key, None)
+                if engine.update(elapsed, input_data):
+                    self.ticked[kind] += 1
+                    ticked += 1
+                    continue
+            elif kind == IDLE:
+                owed[key] = elapsed
+            self.skipped[kind] += 1
+
+        if full_rate:
+            if self.stepper is not None:
+                ticked += self.stepper.step(full_rate, dt, full_rate_inputs)
+            else:
+                for engine, input_data in zip(full_rate, full_rate_inputs):
+                    if engine.update(dt, input_data):
+                        ticked += 1
+
+        # Engines that were dropped or became active don't owe anything any more
+        if len(owed) > len(engines) - len(full_rate):
+            live = {id(engine) for engine in engines}
+            for key in [key for key in owed if key not in live]:
+                del owed[key]
+        if owed:
+            for engine in full_rate:
+                owed.pop(id(engine), None)
+
+        self.passes += 1
+        return ticked
+
+    def saved(self):
+        """Return the fraction of engine ticks skipped so far"""
+        total = sum(self.ticked.values()) + sum(self.skipped.values())
+        return sum(self.skipped.values()) / total if total else 0.0
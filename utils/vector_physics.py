@@ -0,0 +1,300 @@
+"""
+Vectorized ball physics for Brick Breaker
+
+With many balls in play (POWERUP_MULTI stacks), GameEngine.update_balls
+spends most of a tick scanning every brick for every ball in Python. This
+module runs the same step with NumPy when it is installed: ball positions
+and velocities are gathered into arrays, and integration, wall bounces,
+the paddle test and a broad-phase overlap test against all bricks each
+run as a handful of array operations.
+
+The step works on a population of sessions at once: every array carries
+a session index, and bricks are only paired with balls of their own
+session. A single engine (VectorBalls) is a population of one; the batch
+stepper (see batch_stepper) passes every live session.
+
+Results are identical to the scalar path, not just close:
+
+- Integration, wall bounces and the rect truncation are the same float64
+  operations the scalar code does, element by element.
+- The paddle bounce (which needs sin/cos) is applied by the scalar
+  Ball.handle_paddle_collision, only to the balls the array test flags.
+- The broad phase only finds the bricks each ball overlaps at the start of
+  the step. The hits themselves are then resolved ball by ball, in the
+  engine's order, by GameEngine._check_ball_brick_collisions. That keeps
+  brick removal, particles and the engine's random draws in the same
+  sequence as the scalar path.
+
+NumPy is optional: available() is False without it and the engine keeps
+using the scalar path. It is imported on the first vector step (load()),
+not with this module: importing NumPy takes longer than the rest of the
+app's startup, and most sessions never have enough balls to need it.
+"""
+
+import importlib.util
+
+# NumPy, once load() has imported it
+np = None
+
+# Whether NumPy is installed (looked up once, without importing it)
+_installed = None
+
+# Below this many balls, gathering into arrays costs more than it saves
+DEFAULT_MIN_BALLS = 10
+
+def available():
+    """Return whether NumPy is installed"""
+    global _installed
+    if _installed is None:
+        _installed = np is not None or importlib.util.find_spec('numpy') is not None
+    return _installed
+
+def load():
+    """Import NumPy on first use; returns whether it is available"""
+    global np
+    if np is None and available():
+        import numpy
+        np = numpy
+    return np is not None
+
+def step_arrays(x, y, speed_x, speed_y, size, active, screen_width, screen_height,
+                paddle_x, paddle_y, paddle_width, paddle_height):
+    """
+    Move balls one tick and work out wall and paddle collisions
+
+    Screen and paddle arguments may be scalars or per-ball arrays (one value
+    per ball, taken from the ball's session).
+
+    Args:
+        x, y, speed_x, speed_y, size: float64 arrays of ball state
+        active: bool array, False for balls still sitting on the paddle
+        screen_width, screen_height: Playfield size
+        paddle_x, paddle_y, paddle_width, paddle_height: Paddle rect
+
+    Returns:
+        Tuple of arrays (x, y, speed_x, speed_y, rect_x, rect_y, lost, live, paddle_hit):
+        new state, truncated rect position, balls that fell off the bottom,
+        balls still in play, and balls that should bounce off the paddle
+    """
+    # Ball.update (inactive balls don't move)
+    x = np.where(active, x + speed_x, x)
+    y = np.where(active, y + speed_y, y)
+    rect_x = np.trunc(x)
+    rect_y = np.trunc(y)
+
+    lost = active & (y >= screen_height)
+    live = active & ~lost
+
+    # Ball.handle_wall_collision
+    speed_x = np.where(live & ((x <= 0) | (x >= screen_width - size)), -speed_x, speed_x)
+    speed_y = np.where(live & (y <= 0), -speed_y, speed_y)
+
+    # Rect.colliderect against the paddle, moving downwards only
+    paddle_hit = (live & (speed_y > 0) &
+                  (rect_x < paddle_x + paddle_width) & (rect_x + size > paddle_x) &
+                  (rect_y < paddle_y + paddle_height) & (rect_y + size > paddle_y))
+
+    return x, y, speed_x, speed_y, rect_x, rect_y, lost, live, paddle_hit
+
+def brick_overlaps(left, top, width, height, session, sessions):
+    """
+    Broad phase: find every (rect, brick) pair that overlaps, pairing each
+    rect only with the bricks of its own session
+
+    Args:
+        left, top, width, height: float64 arrays, one entry per moving rect
+        session: int array, the session index of each rect
+        sessions: SessionArrays the rects belong to
+
+    Returns:
+        (rect indices, brick indices into sessions.brick_items) arrays
+    """
+    brick_x, brick_y, brick_width, brick_height = sessions.bounds
+    if len(sessions.engines) == 1:
+        # One session: test every rect against every brick directly
+        left = left[:, None]
+        top = top[:, None]
+        overlap = ((left < brick_x + brick_width) & (left + width[:, None] > brick_x) &
+                   (top < brick_y + brick_height) & (top + height[:, None] > brick_y))
+        return np.nonzero(overlap)
+
+    # Only rects that reach into their session's brick area can hit anything
+    extent_left, extent_top, extent_right, extent_bottom = sessions.brick_extent
+    near = np.flatnonzero((left < extent_right[session]) & (left + width > extent_left[session]) &
+                          (top < extent_bottom[session]) & (top + height > extent_top[session]))
+    counts = sessions.brick_count[session[near]]
+    total = int(counts.sum())
+    if total == 0:
+        empty = np.zeros(0, dtype=np.intp)
+        return empty, empty
+
+    # Expand to one row per (rect, brick of the same session) pair
+    rects = np.repeat(near, counts)
+    first = np.repeat(np.cumsum(counts) - counts, counts)
+    bricks = np.repeat(sessions.brick_start[session[near]], counts) + (np.arange(total) - first)
+
+    rect_left = left[rects]
+    rect_top = top[rects]
+    overlap = ((rect_left < brick_x[bricks] + brick_width[bricks]) &
+               (rect_left + width[rects] > brick_x[bricks]) &
+               (rect_top < brick_y[bricks] + brick_height[bricks]) &
+               (rect_top + height[rects] > brick_y[bricks]))
+    return rects[overlap], bricks[overlap]
+
+def brick_bounds(bricks):
+    """Return an (n, 4) float64 array of brick rects (x, y, width, height)"""
+    return np.array([(b.rect.x, b.rect.y, b.rect.width, b.rect.height) for b in bricks],
+                    dtype=np.float64).reshape(-1, 4)
+
+def bounds_extent(bounds):
+    """Return the (left, top, right, bottom) box around a set of brick rects (empty if there are none)"""
+    if not len(bounds):
+        return (0.0, 0.0, 0.0, 0.0)
+    return (bounds[:, 0].min(), bounds[:, 1].min(),
+            (bounds[:, 0] + bounds[:, 2]).max(), (bounds[:, 1] + bounds[:, 3]).max())
+
+class BoundsCache:
+    """Brick bounds per engine, rebuilt only when its bricks change (see GameEngine.brick_revision)"""
+
+    def __init__(self):
+        self.keys = {}
+        self.bounds = {}
+
+    def get(self, engine):
+        """Return the engine's (brick bounds, extent), rebuilding them if its bricks changed"""
+        key = (engine.brick_revision, id(engine.bricks), len(engine.bricks))
+        engine_id = id(engine)
+        if self.keys.get(engine_id) != key:
+            bounds = brick_bounds(engine.bricks)
+            self.keys[engine_id] = key
+            self.bounds[engine_id] = (bounds, bounds_extent(bounds))
+        return self.bounds[engine_id]
+
+    def retain(self, engines):
+        """Forget every engine not in the given collection"""
+        keep = {id(engine) for engine in engines}
+        for engine_id in [engine_id for engine_id in self.keys if engine_id not in keep]:
+            del self.keys[engine_id]
+            del self.bounds[engine_id]
+
+class SessionArrays:
+    """Per-session values (screen, paddle, bricks) for a population of engines"""
+
+    def __init__(self, engines, bounds_cache):
+        self.engines = engines
+        self.screen_width = np.array([e.screen_width for e in engines], dtype=np.float64)
+        self.screen_height = np.array([e.screen_height for e in engines], dtype=np.float64)
+        paddles = np.array([(e.paddle.rect.x, e.paddle.rect.y, e.paddle.rect.width, e.paddle.rect.height)
+                            for e in engines], dtype=np.float64).reshape(-1, 4)
+        self.paddle_x, self.paddle_y, self.paddle_width, self.paddle_height = paddles.T
+
+        # Every session's bricks, concatenated; brick_items[i] is the Brick behind row i
+        self.brick_items = []
+        for engine in engines:
+            self.brick_items.extend(engine.bricks.items)
+        self.brick_count = np.array([len(e.bricks) for e in engines], dtype=np.intp)
+        self.brick_start = np.cumsum(self.brick_count) - self.brick_count
+        cached = [bounds_cache.get(e) for e in engines]
+        if self.brick_items:
+            bounds = np.concatenate([bounds for bounds, _ in cached])
+        else:
+            bounds = np.zeros((0, 4), dtype=np.float64)
+        self.bounds = tuple(bounds.T)
+        # Box around each session's bricks, to skip rects nowhere near them
+        self.brick_extent = tuple(np.array([extent for _, extent in cached], dtype=np.float64).reshape(-1, 4).T)
+
+def gather(engines, kind):
+    """Concatenate one kind of entity ('balls', 'lasers', ...) across engines, with each one's session index"""
+    items = []
+    counts = []
+    for engine in engines:
+        store = getattr(engine, kind)
+        items.extend(store.items)
+        counts.append(len(store.items))
+    return items, np.repeat(np.arange(len(engines)), counts)
+
+def candidate_bricks(rects, bricks, brick_items):
+    """Group broad-phase pairs into {rect index: [Brick, ...]}"""
+    candidates = {}
+    for rect, brick in zip(rects.tolist(), bricks.tolist()):
+        candidates.setdefault(rect, []).append(brick_items[brick])
+    return candidates
+
+def present_in_order(candidates, store):
+    """Candidate bricks still in the store, in store order (earlier hits may have removed some)"""
+    return sorted((brick for brick in candidates if brick in store), key=lambda brick: brick.slot)
+
+def step_balls(sessions):
+    """Advance every ball of every session one tick, exactly as GameEngine.update_balls would"""
+    engines = sessions.engines
+    balls, session = gather(engines, 'balls')
+    count = len(balls)
+    if count == 0:
+        return
+
+    # Gather
+    state = np.array([(b.x, b.y, b.speed_x, b.speed_y, b.size) for b in balls],
+                     dtype=np.float64).reshape(count, 5)
+    active = np.fromiter((b.active for b in balls), dtype=bool, count=count)
+    size = state[:, 4]
+
+    x, y, speed_x, speed_y, rect_x, rect_y, lost, live, paddle_hit = step_arrays(
+        state[:, 0], state[:, 1], state[:, 2], state[:, 3], size, active,
+        sessions.screen_width[session], sessions.screen_height[session],
+        sessions.paddle_x[session], sessions.paddle_y[session],
+        sessions.paddle_width[session], sessions.paddle_height[session]
+    )
+
+    # Broad phase against the bricks as they stand before any ball moves
+    candidates = {}
+    if sessions.brick_items and live.any():
+        moving = np.flatnonzero(live)
+        rects, bricks = brick_overlaps(rect_x[moving], rect_y[moving], size[moving], size[moving],
+                                       session[moving], sessions)
+        candidates = candidate_bricks(moving[rects], bricks, sessions.brick_items)
+
+    # Scatter the moved balls back
+    for i, ball_x, ball_y, ball_speed_x, ball_speed_y, ball_rect_x, ball_rect_y in zip(
+            np.flatnonzero(active).tolist(), x[active].tolist(), y[active].tolist(),
+            speed_x[active].tolist(), speed_y[active].tolist(),
+            rect_x[active].tolist(), rect_y[active].tolist()):
+        ball = balls[i]
+        ball.x = ball_x
+        ball.y = ball_y
+        ball.speed_x = ball_speed_x
+        ball.speed_y = ball_speed_y
+        ball.rect.x = int(ball_rect_x)
+        ball.rect.y = int(ball_rect_y)
+
+    session = session.tolist()
+    for i in np.flatnonzero(paddle_hit).tolist():
+        balls[i].handle_paddle_collision(engines[session[i]].paddle)
+
+    # Anything with side effects runs per ball, in the scalar loop's order
+    lost = lost.tolist()
+    active = active.tolist()
+    for i in range(count - 1, -1, -1):
+        ball = balls[i]
+        engine = engines[session[i]]
+        if not active[i]:
+            ball.stick_to_paddle(engine.paddle)
+        elif lost[i]:
+            engine._handle_ball_lost(ball)
+        elif i in candidates:
+            engine._check_ball_brick_collisions(ball, present_in_order(candidates[i], engine.bricks))
+
+class VectorBalls:
+    """NumPy replacement for GameEngine.update_balls, used above a ball count"""
+
+    def __init__(self, min_balls=DEFAULT_MIN_BALLS):
+        self.min_balls = min_balls
+        self.bounds_cache = BoundsCache()
+
+    def applies(self, engine):
+        """Return whether there are enough balls for the vector path to pay off"""
+        return len(engine.balls) >= self.min_balls
+
+    def update(self, engine, dt):
+        """Advance every ball one tick, exactly as GameEngine.update_balls would"""
+        load()
+        step_balls(SessionArrays([engine], self.bounds_cache))